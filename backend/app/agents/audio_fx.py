@@ -0,0 +1,314 @@
+"""In-process post-processing of rendered segments with NumPy.
+
+Agents carry speed, pitch and volume settings (pitch and volume as ratios,
+1.0 meaning unchanged). Instead of an ffmpeg pass per setting and segment,
+process_podcast() decodes each segment once into mono float PCM and then:
+
+- time-stretches and pitch-shifts it in one phase vocoder pass (stretch by
+  speed / pitch, then resample by pitch), and applies the volume as gain;
+- trims leading and trailing silence;
+- normalizes loudness per speaker to AUDIO_TARGET_LUFS, using the gated,
+  K-weighted measure of ITU-R BS.1770 over all of the speaker's segments,
+  so every voice ends up equally loud;
+- joins the segments with their pauses and encodes the podcast once.
+
+Every step works on whole arrays (STFT frames, blocks, samples), not on
+Python loops over samples. MP3 is decoded and encoded by one ffmpeg pipe per
+file; WAV is read and written directly.
+"""
+import os
+import subprocess
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from decouple import config
+
+# "auto": only podcasts with a segment that has effects; "always"; or "off"
+AUDIO_POSTPROCESS = config('AUDIO_POSTPROCESS', default='auto')
+AUDIO_SAMPLE_RATE = config('AUDIO_SAMPLE_RATE', default=24000, cast=int)
+AUDIO_TARGET_LUFS = config('AUDIO_TARGET_LUFS', default=-19.0, cast=float)
+AUDIO_MAX_GAIN_DB = config('AUDIO_MAX_GAIN_DB', default=20.0, cast=float)
+AUDIO_PEAK_CEILING_DB = config('AUDIO_PEAK_CEILING_DB', default=-1.0, cast=float)
+# Frames quieter than this (dBFS) at the start and end of a segment are trimmed, keeping a short pad
+AUDIO_TRIM_THRESHOLD_DB = config('AUDIO_TRIM_THRESHOLD_DB', default=-50.0, cast=float)
+AUDIO_TRIM_PAD_MS = config('AUDIO_TRIM_PAD_MS', default=80, cast=int)
+AUDIO_MP3_BITRATE = config('AUDIO_MP3_BITRATE', default='96k')
+# Segments decoded and processed at the same time
+AUDIO_WORKERS = config('AUDIO_WORKERS', default=4, cast=int)
+
+# Phase vocoder frame and hop; the hop divides the frame for overlap-add by blocks
+_N_FFT = 1024
+_HOP = 256
+_WINDOW = np.hanning(_N_FFT + 1)[:-1].astype(np.float32)
+
+# BS.1770 K-weighting (high shelf, then high pass) as biquads at 48 kHz
+_K_SHELF = ((1.53512485958697, -2.69169618940638, 1.19839281085285), (1.0, -1.69065929318241, 0.73248077421585))
+_K_HIGHPASS = ((1.0, -2.0, 1.0), (1.0, -1.99004745483398, 0.99007225036621))
+
+
+@dataclass(frozen=True)
+class Effects:
+    speed: float = 1.0
+    pitch: float = 1.0
+    volume: float = 1.0
+
+    @classmethod
+    def from_dict(cls, values: Optional[Dict]) -> "Effects":
+        """Effects from an agent or block dict, clamped to what the processing supports."""
+        values = values or {}
+
+        def ratio(name: str, low: float, high: float) -> float:
+            value = values.get(name)
+            return 1.0 if value is None else min(max(float(value), low), high)
+
+        return cls(ratio("speed", 0.25, 4.0), ratio("pitch", 0.5, 2.0), ratio("volume", 0.0, 4.0))
+
+    @property
+    def neutral(self) -> bool:
+        return self == Effects()
+
+
+def agent_effects(agent: Dict) -> Dict:
+    """The effects of an agent document, as stored on conversation blocks."""
+    return {name: agent.get(name, 1.0) for name in ("speed", "pitch", "volume")}
+
+
+def should_process(segments: Sequence[Dict]) -> bool:
+    if AUDIO_POSTPROCESS == "always":
+        return True
+    if AUDIO_POSTPROCESS != "auto":
+        return False
+    return any(not Effects.from_dict(segment.get("effects")).neutral for segment in segments)
+
+
+# Signal processing
+
+def _stft(x: np.ndarray) -> np.ndarray:
+    padded = np.pad(x, _N_FFT // 2, mode="reflect" if len(x) > _N_FFT // 2 else "constant")
+    if len(padded) < _N_FFT:
+        padded = np.pad(padded, (0, _N_FFT - len(padded)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, _N_FFT)[::_HOP]
+    return np.fft.rfft(frames * _WINDOW, axis=1)
+
+
+def _istft(spectrum: np.ndarray, length: int) -> np.ndarray:
+    frames = np.fft.irfft(spectrum, n=_N_FFT, axis=1).astype(np.float32) * _WINDOW
+    count = frames.shape[0]
+    blocks = _N_FFT // _HOP
+    out = np.zeros((count + blocks - 1) * _HOP, dtype=np.float32)
+    norm = np.zeros_like(out)
+    squared = (_WINDOW ** 2).reshape(blocks, _HOP)
+    # Overlap-add one hop-sized block of every frame at a time
+    for block in range(blocks):
+        part = frames[:, block * _HOP:(block + 1) * _HOP].reshape(-1)
+        out[block * _HOP:block * _HOP + part.size] += part
+        norm[block * _HOP:block * _HOP + part.size] += np.tile(squared[block], count)
+    out /= np.maximum(norm, 1e-6)
+    out = out[_N_FFT // 2:_N_FFT // 2 + length]
+    return np.pad(out, (0, length - len(out))) if len(out) < length else out
+
+
+def time_stretch(x: np.ndarray, rate: float) -> np.ndarray:
+    """Play x rate times faster without changing its pitch (phase vocoder)."""
+    if abs(rate - 1.0) < 1e-3 or len(x) == 0:
+        return x
+    spectrum = _stft(x)
+    if spectrum.shape[0] < 2:
+        return resample(x, rate)
+    steps = np.arange(0, spectrum.shape[0] - 1, rate)
+    index = steps.astype(int)
+    frac = (steps - index)[:, None]
+    magnitude = np.abs(spectrum)
+    phase = np.angle(spectrum)
+    stretched = (1 - frac) * magnitude[index] + frac * magnitude[index + 1]
+    # Per-bin phase advance: expected from the bin frequency plus the measured deviation
+    expected = 2 * np.pi * _HOP * np.arange(spectrum.shape[1]) / _N_FFT
+    deviation = phase[index + 1] - phase[index] - expected
+    deviation -= 2 * np.pi * np.round(deviation / (2 * np.pi))
+    advance = expected + deviation
+    phases = np.empty_like(advance)
+    phases[0] = phase[0]
+    np.cumsum(advance[:-1], axis=0, out=phases[1:])
+    phases[1:] += phase[0]
+    return _istft(stretched * np.exp(1j * phases), int(round(len(x) / rate)))
+
+
+def resample(x: np.ndarray, factor: float) -> np.ndarray:
+    """Linear interpolation to len(x) / factor samples (factor > 1 raises the pitch)."""
+    if abs(factor - 1.0) < 1e-3 or len(x) == 0:
+        return x
+    length = max(int(round(len(x) / factor)), 1)
+    return np.interp(np.arange(length) * factor, np.arange(len(x)), x).astype(np.float32)
+
+
+def apply_effects(x: np.ndarray, effects: Effects) -> np.ndarray:
+    """Speed and pitch in one stretch and one resample, then the volume as gain."""
+    x = resample(time_stretch(x, effects.speed / effects.pitch), effects.pitch)
+    if effects.volume != 1.0:
+        x = x * np.float32(effects.volume)
+    return x
+
+
+def trim_silence(
+    x: np.ndarray,
+    rate: int,
+    threshold_db: float = AUDIO_TRIM_THRESHOLD_DB,
+    pad_ms: int = AUDIO_TRIM_PAD_MS
+) -> np.ndarray:
+    """x without the frames quieter than threshold_db at its start and end, keeping pad_ms of them."""
+    frame = max(rate // 100, 1)  # 10 ms
+    count = len(x) // frame
+    if count == 0:
+        return x
+    energy = np.mean(np.square(x[:count * frame].reshape(count, frame)), axis=1)
+    loud = np.flatnonzero(energy > 10 ** (threshold_db / 10))
+    if loud.size == 0:
+        return x[:0]
+    pad = rate * pad_ms // 1000
+    start = max(loud[0] * frame - pad, 0)
+    end = min((loud[-1] + 1) * frame + pad, len(x))
+    return x[start:end]
+
+
+def _k_weighting(frequencies: np.ndarray) -> np.ndarray:
+    """Squared magnitude response of the K-weighting filter at the given frequencies (Hz)."""
+    z = np.exp(-2j * np.pi * frequencies / 48000)
+    response = np.ones_like(z)
+    for b, a in (_K_SHELF, _K_HIGHPASS):
+        response *= (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+    return np.abs(response) ** 2
+
+
+def loudness(x: np.ndarray, rate: int) -> float:
+    """Integrated loudness in LUFS (BS.1770 gating), or -inf for silence or audio under 400 ms."""
+    block = int(0.4 * rate)
+    step = block // 4
+    if len(x) < block:
+        return float("-inf")
+    # K-weighting applied in the frequency domain, on the whole signal at once
+    # (zero-padded to a power of two, which keeps the FFT fast for any length)
+    size = 1 << (len(x) - 1).bit_length()
+    response = np.sqrt(_k_weighting(np.fft.rfftfreq(size, 1 / rate)))
+    weighted = np.fft.irfft(np.fft.rfft(x, n=size) * response, n=size)[:len(x)]
+    energy = np.concatenate(([0.0], np.cumsum(np.square(weighted, dtype=np.float64))))
+    starts = np.arange(0, len(x) - block + 1, step)
+    power = (energy[starts + block] - energy[starts]) / block
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10 * np.log10(power)
+    gated = power[block_loudness > -70]
+    if gated.size == 0:
+        return float("-inf")
+    relative = -0.691 + 10 * np.log10(gated.mean()) - 10
+    with np.errstate(divide="ignore"):
+        gated = gated[-0.691 + 10 * np.log10(gated) > relative]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def normalize_speakers(
+    segments: List[np.ndarray],
+    speakers: Sequence[str],
+    rate: int,
+    target: float = AUDIO_TARGET_LUFS,
+    max_gain_db: float = AUDIO_MAX_GAIN_DB,
+    ceiling_db: float = AUDIO_PEAK_CEILING_DB
+) -> List[np.ndarray]:
+    """Scale each speaker's segments to target loudness, measured over all of them together."""
+    result = list(segments)
+    ceiling = 10 ** (ceiling_db / 20)
+    for speaker in dict.fromkeys(speakers):
+        indexes = [i for i, name in enumerate(speakers) if name == speaker]
+        measured = loudness(np.concatenate([segments[i] for i in indexes]), rate)
+        if not np.isfinite(measured):
+            continue
+        gain = 10 ** (min(max(target - measured, -max_gain_db), max_gain_db) / 20)
+        for i in indexes:
+            scaled = segments[i] * np.float32(gain)
+            peak = float(np.max(np.abs(scaled))) if scaled.size else 0.0
+            # Turned down as a whole rather than clipped
+            result[i] = scaled * np.float32(ceiling / peak) if peak > ceiling else scaled
+    return result
+
+
+def process_segments(
+    segments: List[np.ndarray],
+    effects: Sequence[Effects],
+    speakers: Sequence[str],
+    rate: int = AUDIO_SAMPLE_RATE
+) -> List[np.ndarray]:
+    """Effects, trimming and per-speaker loudness normalization of decoded segments."""
+    processed = [trim_silence(apply_effects(x, fx), rate) for x, fx in zip(segments, effects)]
+    return normalize_speakers(processed, speakers, rate)
+
+
+# Decoding and encoding
+
+def read_audio(path: str, rate: int = AUDIO_SAMPLE_RATE) -> np.ndarray:
+    """Decode path into mono float32 PCM at rate."""
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit WAV is supported")
+            channels, source_rate = f.getnchannels(), f.getframerate()
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").astype(np.float32) / 32768
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return resample(samples, source_rate / rate)
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(rate), "-"],
+        capture_output=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not decode {os.path.basename(path)}: {result.stderr.decode(errors='replace')}")
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768
+
+
+def write_audio(samples: np.ndarray, path: str, rate: int = AUDIO_SAMPLE_RATE, bitrate: str = AUDIO_MP3_BITRATE):
+    """Encode mono float PCM to path: WAV directly, anything else (MP3) with ffmpeg."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(pcm)
+        return
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "s16le", "-ar", str(rate), "-ac", "1", "-i", "-",
+         "-c:a", "libmp3lame", "-b:a", bitrate, path],
+        input=pcm, capture_output=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not encode {os.path.basename(path)}: {result.stderr.decode(errors='replace')}")
+
+
+def process_podcast(
+    audio_files: List[str],
+    effects: Sequence[Optional[Dict]],
+    speakers: Sequence[str],
+    silences: Sequence[float],
+    output_file: str,
+    rate: int = AUDIO_SAMPLE_RATE
+) -> List[float]:
+    """Decode, process and join segments into output_file; returns each segment's new duration.
+
+    silences[i] is the pause in seconds before audio_files[i].
+    """
+    fx = [Effects.from_dict(values) for values in effects]
+
+    def prepare(index: int) -> np.ndarray:
+        return trim_silence(apply_effects(read_audio(audio_files[index], rate), fx[index]), rate)
+
+    # Decoding waits on ffmpeg and the FFTs release the GIL, so segments overlap
+    with ThreadPoolExecutor(max_workers=AUDIO_WORKERS) as pool:
+        processed = list(pool.map(prepare, range(len(audio_files))))
+    processed = normalize_speakers(processed, speakers, rate)
+    parts = []
+    for pause, samples in zip(silences, processed):
+        if pause > 0:
+            parts.append(np.zeros(int(round(pause * rate)), dtype=np.float32))
+        parts.append(samples)
+    write_audio(np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32), output_file, rate)
+    return [len(samples) / rate for samples in processed]
@@ -0,0 +1,102 @@
+from typing import Dict, List
+
+from .sentences import iter_sentences
+
+
+def build_timeline(segments: List[Dict], pauses: List[float]) -> List[Dict]:
+    """Offset table of the merged podcast: one entry per rendered segment.
+
+    segments need "speaker", "turn", "text" and "duration"; pauses[i] is the
+    silence inserted before segment i.
+    """
+    timeline = []
+    position = 0.0
+    for index, (segment, pause) in enumerate(zip(segments, pauses)):
+        start = position + pause
+        end = start + segment["duration"]
+        timeline.append({
+            "index": index,
+            "speaker": segment["speaker"],
+            "turn": segment["turn"],
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "text": segment["text"]
+        })
+        position = end
+    return timeline
+
+
+def _cues(timeline: List[Dict]) -> List[Dict]:
+    """Split each segment into sentence cues, timed by their share of characters."""
+    cues = []
+    for entry in timeline:
+        sentences = list(iter_sentences(entry["text"]))
+        total_chars = sum(len(s) for s in sentences) or 1
+        span = entry["end"] - entry["start"]
+        position = entry["start"]
+        for sentence in sentences:
+            length = span * len(sentence) / total_chars
+            cues.append({
+                "start": position,
+                "end": position + length,
+                "speaker": entry["speaker"],
+                "text": sentence
+            })
+            position += length
+    return cues
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def to_webvtt(timeline: List[Dict]) -> str:
+    lines = ["WEBVTT", ""]
+    for number, cue in enumerate(_cues(timeline), start=1):
+        lines.append(str(number))
+        lines.append(f"{_timestamp(cue['start'], '.')} --> {_timestamp(cue['end'], '.')}")
+        lines.append(f"<v {cue['speaker']}>{cue['text']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def to_srt(timeline: List[Dict]) -> str:
+    lines = []
+    for number, cue in enumerate(_cues(timeline), start=1):
+        lines.append(str(number))
+        lines.append(f"{_timestamp(cue['start'], ',')} --> {_timestamp(cue['end'], ',')}")
+        lines.append(f"{cue['speaker']}: {cue['text']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def chapters(timeline: List[Dict]) -> List[Dict]:
+    """One chapter per speaker turn, for seek-to-turn in the player."""
+    result = []
+    for entry in timeline:
+        if result and result[-1]["speaker"] == entry["speaker"] and result[-1]["turn"] == entry["turn"]:
+            # Several segments of the same turn form one chapter
+            result[-1]["end"] = entry["end"]
+            continue
+        result.append({
+            "title": f"{entry['speaker']} - Turn {entry['turn']}",
+            "speaker": entry["speaker"],
+            "turn": entry["turn"],
+            "start": entry["start"],
+            "end": entry["end"]
+        })
+    return result
+
+
+def chapters_webvtt(timeline: List[Dict]) -> str:
+    lines = ["WEBVTT", ""]
+    for number, chapter in enumerate(chapters(timeline), start=1):
+        lines.append(str(number))
+        lines.append(f"{_timestamp(chapter['start'], '.')} --> {_timestamp(chapter['end'], '.')}")
+        lines.append(chapter["title"])
+        lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,209 @@
+"""Token-budgeted prompts for debate turns.
+
+Sending the whole research with every turn makes input tokens (and time to
+first token) grow with research length times turns. DebatePromptBuilder
+splits the research into passages once per debate and gives each turn at
+most DEBATE_RESEARCH_TOKENS of it:
+
+- the opening passages, up to DEBATE_CORE_TOKENS, in every turn. Together
+  with the system prompt they form a prefix that is the same on every turn
+  of a speaker, which the provider's prompt cache can reuse;
+- then the passages that best match the opponent's last response (BM25
+  over the passage words), in research order, until the budget is spent.
+
+Research that fits in the budget is sent whole. Token counts come from
+tiktoken when its encoding can be loaded, and are estimated otherwise.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from decouple import config
+
+from .providers import providers
+from .sentences import iter_sentences
+from ..metrics import DEBATE_PROMPT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Research tokens per turn, of which the first DEBATE_CORE_TOKENS are the same every turn
+DEBATE_RESEARCH_TOKENS = config('DEBATE_RESEARCH_TOKENS', default=600, cast=int)
+DEBATE_CORE_TOKENS = config('DEBATE_CORE_TOKENS', default=250, cast=int)
+# Paragraphs longer than this are split into groups of sentences
+DEBATE_PASSAGE_TOKENS = config('DEBATE_PASSAGE_TOKENS', default=120, cast=int)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has have this that with from they will "
+    "would there their what about which when make like than then them these some into more also just only "
+    "been were very your its it's i'm don't".split()
+)
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def estimate_tokens(text: str) -> int:
+    """About four characters per token, for English text."""
+    return (len(text) + 3) // 4
+
+
+@providers.register("tokenizer")
+def _tokenizer() -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception as e:
+        # tiktoken downloads its encodings on first use
+        logger.warning(f"Estimating token counts, tiktoken encoding unavailable: {str(e)}")
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens(text: str) -> int:
+    return providers.get("tokenizer")(text)
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in _STOPWORDS]
+
+
+@dataclass
+class Passage:
+    index: int
+    text: str
+    tokens: int
+    terms: Counter = field(repr=False)
+
+
+def split_passages(research: str, max_tokens: int = DEBATE_PASSAGE_TOKENS) -> List[Passage]:
+    """Paragraphs of research, with long ones split into runs of whole sentences."""
+    texts = []
+    for paragraph in re.split(r"\n\s*\n", research):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            texts.append(paragraph)
+            continue
+        current, size = [], 0
+        for sentence in iter_sentences(paragraph):
+            tokens = count_tokens(sentence)
+            if current and size + tokens > max_tokens:
+                texts.append(" ".join(current))
+                current, size = [], 0
+            current.append(sentence)
+            size += tokens
+        if current:
+            texts.append(" ".join(current))
+    return [Passage(i, text, count_tokens(text), Counter(_terms(text))) for i, text in enumerate(texts)]
+
+
+@dataclass
+class TurnPrompt:
+    messages: List
+    research: str
+    # Token counts: whole prompt, research sent, and research available
+    tokens: int
+    research_tokens: int
+    total_research_tokens: int
+    passages: int
+    total_passages: int
+
+    def report(self) -> Dict:
+        return {
+            "tokens": self.tokens,
+            "research_tokens": self.research_tokens,
+            "total_research_tokens": self.total_research_tokens,
+            "passages": self.passages,
+            "total_passages": self.total_passages
+        }
+
+
+class DebatePromptBuilder:
+    """Builds the prompt of each turn of one debate from its research."""
+
+    def __init__(
+        self,
+        research: str,
+        budget: int = DEBATE_RESEARCH_TOKENS,
+        core_budget: int = DEBATE_CORE_TOKENS
+    ):
+        self.passages = split_passages(research)
+        self.total_tokens = sum(passage.tokens for passage in self.passages)
+        self.budget = budget
+        self.core = self._leading(min(core_budget, budget))
+        lengths = [sum(passage.terms.values()) for passage in self.passages]
+        self._average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        document_frequency = Counter(term for passage in self.passages for term in passage.terms)
+        count = len(self.passages)
+        self._idf = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()
+        }
+
+    @classmethod
+    async def create(cls, research: str, **kwargs) -> "DebatePromptBuilder":
+        """A builder for async code: the tokenizer (which may download its encoding) is loaded off the event loop."""
+        await providers.aget("tokenizer")
+        return cls(research, **kwargs)
+
+    def _leading(self, budget: int) -> List[Passage]:
+        selected, used = [], 0
+        for passage in self.passages:
+            if used + passage.tokens > budget:
+                break
+            selected.append(passage)
+            used += passage.tokens
+        return selected
+
+    def _score(self, passage: Passage, query: List[str]) -> float:
+        length = sum(passage.terms.values())
+        norm = _K1 * (1 - _B + _B * length / self._average_length) if self._average_length else _K1
+        score = 0.0
+        for term in query:
+            tf = passage.terms.get(term, 0)
+            if tf:
+                score += self._idf[term] * tf * (_K1 + 1) / (tf + norm)
+        return score
+
+    def select(self, query: str) -> List[Passage]:
+        """Passages for a turn answering query, in research order."""
+        if self.total_tokens <= self.budget:
+            return self.passages
+        selected = list(self.core)
+        used = sum(passage.tokens for passage in selected)
+        chosen = {passage.index for passage in selected}
+        terms = set(_terms(query))
+        candidates = [passage for passage in self.passages if passage.index not in chosen]
+        if terms:
+            # Ties (and passages matching nothing) keep research order
+            candidates.sort(key=lambda passage: -self._score(passage, terms))
+        extra = []
+        for passage in candidates:
+            if used + passage.tokens <= self.budget:
+                extra.append(passage)
+                used += passage.tokens
+        # The core stays first so the prompt prefix does not change between turns
+        return selected + sorted(extra, key=lambda passage: passage.index)
+
+    def build(self, template, role: str, opponent_response: str, **values) -> TurnPrompt:
+        """Format template (a ChatPromptTemplate with a {research} variable) for one turn."""
+        passages = self.select(opponent_response)
+        research = "\n\n".join(passage.text for passage in passages)
+        messages = template.format_messages(research=research, **values)
+        # Plus a few tokens of message framing each
+        tokens = sum(count_tokens(message.content) + 4 for message in messages)
+        DEBATE_PROMPT_TOKENS.labels(role).observe(tokens)
+        return TurnPrompt(
+            messages=messages,
+            research=research,
+            tokens=tokens,
+            research_tokens=sum(passage.tokens for passage in passages),
+            total_research_tokens=self.total_tokens,
+            passages=len(passages),
+            total_passages=len(self.passages)
+        )
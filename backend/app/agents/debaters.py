@@ -1,153 +1,131 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 from decouple import config
-from typing import Dict, List, AsyncGenerator
-import json
+from typing import Dict, List, AsyncGenerator, Optional
 import logging
+from .debate_prompt import DebatePromptBuilder
+from .events import StreamEvent
+from .providers import providers
+from .sentences import chunk_text
+from ..metrics import timed
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-OPENAI_API_KEY = config('OPENAI_API_KEY')
+# Any OpenAI-compatible endpoint, e.g. a local stand-in for benchmarks
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='https://api.openai.com/v1')
 
-# Debug logging
-print(f"\nDebaters - Loaded OpenAI API Key: {OPENAI_API_KEY[:7]}...")
-print(f"Key starts with 'sk-proj-': {OPENAI_API_KEY.startswith('sk-proj-')}")
-print(f"Key starts with 'sk-': {OPENAI_API_KEY.startswith('sk-')}\n")
-
-believer_turn_prompt = ChatPromptTemplate.from_messages([
+BELIEVER_TURN_MESSAGES = [
     ("system", """You are an optimistic and enthusiastic podcast host who sees the positive potential in new developments.
     Your responses should be engaging, conversational, and STRICTLY LIMITED TO 100 WORDS.
     Focus on the opportunities, benefits, and positive implications of the topic.
     Maintain a non-chalant, happy, podcast-style tone while being informative.
     Your name is {name}, use 'I' when referring to yourself."""),
-    ("user", "Based on this research and the skeptic's last response (if any), provide your perspective for turn {turn_number}:\n\nResearch: {research}\nSkeptic's last response: {skeptic_response}")
-])
+    # Research first: with the system prompt it is the part that stays the same between turns
+    ("user", "Research: {research}\n\nBased on this research and the skeptic's last response (if any), provide your perspective for turn {turn_number}:\nSkeptic's last response: {skeptic_response}")
+]
 
-skeptic_turn_prompt = ChatPromptTemplate.from_messages([
+SKEPTIC_TURN_MESSAGES = [
     ("system", """You are a thoughtful and critical podcast host who carefully examines potential drawbacks and challenges.
     Your responses should be engaging, conversational, and STRICTLY LIMITED TO 100 WORDS.
     Focus on potential risks, limitations, and areas needing careful consideration.
     Maintain a enthusiastic and angry, podcast-style tone while being informative.
     Your name is {name}, use 'I' when referring to yourself."""),
-    ("user", "Based on this research and the believer's last response (if any), provide your perspective for turn {turn_number}:\n\nResearch: {research}\nBeliever's last response: {believer_response}")
-])
-
-# Initialize the LLMs with streaming
-believer_llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.7,
-    api_key=OPENAI_API_KEY,
-    streaming=True
-)
-
-skeptic_llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.7,
-    api_key=OPENAI_API_KEY,
-    streaming=True
-)
-
-def chunk_text(text: str, max_length: int = 3800) -> List[str]:
-    """Split text into chunks of maximum length while preserving sentence boundaries."""
-    # Split into sentences and trim whitespace
-    sentences = [s.strip() for s in text.split('.')]
-    sentences = [s + '.' for s in sentences if s]
-    
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for sentence in sentences:
-        sentence_length = len(sentence)
-        if current_length + sentence_length > max_length:
-            if current_chunk:  # If we have accumulated sentences, join them and add to chunks
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [sentence]
-                current_length = sentence_length
-            else:  # If a single sentence is too long, split it
-                if sentence_length > max_length:
-                    words = sentence.split()
-                    temp_chunk = []
-                    temp_length = 0
-                    for word in words:
-                        if temp_length + len(word) + 1 > max_length:
-                            chunks.append(' '.join(temp_chunk))
-                            temp_chunk = [word]
-                            temp_length = len(word)
-                        else:
-                            temp_chunk.append(word)
-                            temp_length += len(word) + 1
-                    if temp_chunk:
-                        chunks.append(' '.join(temp_chunk))
-                else:
-                    chunks.append(sentence)
-        else:
-            current_chunk.append(sentence)
-            current_length += sentence_length
-    
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    return chunks
-
-async def generate_debate_stream(research: str, believer_name: str, skeptic_name: str) -> AsyncGenerator[str, None]:
+    ("user", "Research: {research}\n\nBased on this research and the believer's last response (if any), provide your perspective for turn {turn_number}:\nBeliever's last response: {believer_response}")
+]
+
+def debater_llm(role: str):
+    """A streaming chat model whose token usage is counted under role."""
+    from langchain_openai import ChatOpenAI
+    from .token_usage import TokenUsage
+
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.7,
+        api_key=config('OPENAI_API_KEY'),
+        base_url=OPENAI_BASE_URL,
+        streaming=True,
+        stream_usage=True,
+        callbacks=[TokenUsage(role)]
+    )
+
+def _turn_prompt(messages):
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(messages)
+
+providers.register("believer_llm", lambda: debater_llm("believer"))
+providers.register("skeptic_llm", lambda: debater_llm("skeptic"))
+providers.register("believer_turn_prompt", lambda: _turn_prompt(BELIEVER_TURN_MESSAGES))
+providers.register("skeptic_turn_prompt", lambda: _turn_prompt(SKEPTIC_TURN_MESSAGES))
+
+async def generate_debate_stream(
+    research: str,
+    believer_name: str,
+    skeptic_name: str,
+    completed_turns: Optional[Dict[str, str]] = None
+) -> AsyncGenerator[StreamEvent, None]:
     """
     Generate a streaming podcast-style debate between believer and skeptic agents with alternating turns.
+    Each token is yielded as a partial StreamEvent of type "skeptic" or "believer".
+    Turns already in completed_turns (keyed like "skeptic_1") are not generated or streamed again.
+    Each turn gets the research passages that fit its token budget (see debate_prompt).
     """
     try:
         turns = 3  # Number of turns for each speaker
+        completed_turns = completed_turns or {}
+        prompts = await DebatePromptBuilder.create(research)
         skeptic_last_response = ""
         believer_last_response = ""
 
         # Start with skeptic for first turn
         for turn in range(1, turns + 1):
-            logger.info(f"Starting skeptic ({skeptic_name}) turn {turn}")
-            skeptic_response = ""
-            # Stream skeptic's perspective
-            async for chunk in skeptic_llm.astream(
-                skeptic_turn_prompt.format(
-                    research=research,
+            if f"skeptic_{turn}" in completed_turns:
+                skeptic_last_response = completed_turns[f"skeptic_{turn}"]
+            else:
+                prompt = prompts.build(
+                    await providers.aget("skeptic_turn_prompt"),
+                    "skeptic",
+                    believer_last_response,
                     name=skeptic_name,
                     turn_number=turn,
                     believer_response=believer_last_response
                 )
-            ):
-                skeptic_response += chunk.content
-                yield json.dumps({
-                    "type": "skeptic",
-                    "name": skeptic_name,
-                    "content": chunk.content,
-                    "turn": turn
-                }) + "\n"
-            skeptic_last_response = skeptic_response
-            logger.info(f"Skeptic turn {turn}: {skeptic_response}")
-
-            logger.info(f"Starting believer ({believer_name}) turn {turn}")
-            believer_response = ""
-            # Stream believer's perspective
-            async for chunk in believer_llm.astream(
-                believer_turn_prompt.format(
-                    research=research,
+                logger.info(f"Starting skeptic ({skeptic_name}) turn {turn}: {prompt.report()}")
+                skeptic_pieces = []
+                # Stream skeptic's perspective
+                skeptic_llm = await providers.aget("skeptic_llm")
+                with timed("debate_turn"):
+                    async for chunk in skeptic_llm.astream(prompt.messages):
+                        skeptic_pieces.append(chunk.content)
+                        yield StreamEvent("skeptic", chunk.content, name=skeptic_name, turn=turn, partial=True)
+                skeptic_last_response = "".join(skeptic_pieces)
+                logger.info(f"Skeptic turn {turn}: {skeptic_last_response}")
+
+            if f"believer_{turn}" in completed_turns:
+                believer_last_response = completed_turns[f"believer_{turn}"]
+            else:
+                prompt = prompts.build(
+                    await providers.aget("believer_turn_prompt"),
+                    "believer",
+                    skeptic_last_response,
                     name=believer_name,
                     turn_number=turn,
                     skeptic_response=skeptic_last_response
                 )
-            ):
-                believer_response += chunk.content
-                yield json.dumps({
-                    "type": "believer",
-                    "name": believer_name,
-                    "content": chunk.content,
-                    "turn": turn
-                }) + "\n"
-            believer_last_response = believer_response
-            logger.info(f"Believer turn {turn}: {believer_response}")
+                logger.info(f"Starting believer ({believer_name}) turn {turn}: {prompt.report()}")
+                believer_pieces = []
+                # Stream believer's perspective
+                believer_llm = await providers.aget("believer_llm")
+                with timed("debate_turn"):
+                    async for chunk in believer_llm.astream(prompt.messages):
+                        believer_pieces.append(chunk.content)
+                        yield StreamEvent("believer", chunk.content, name=believer_name, turn=turn, partial=True)
+                believer_last_response = "".join(believer_pieces)
+                logger.info(f"Believer turn {turn}: {believer_last_response}")
 
     except Exception as e:
         logger.error(f"Error in debate generation: {str(e)}")
-        yield json.dumps({"type": "error", "content": str(e)}) + "\n"
+        yield StreamEvent("error", str(e))
 
 async def generate_debate(research: str, believer_name: str, skeptic_name: str) -> List[Dict]:
     """
@@ -157,6 +135,7 @@ async def generate_debate(research: str, believer_name: str, skeptic_name: str)
     try:
         logger.info(f"Starting believer ({believer_name}) response generation")
         # Get believer's perspective
+        believer_llm = await providers.aget("believer_llm")
         believer_response = await believer_llm.ainvoke(
             believer_prompt.format(research=research, name=believer_name)
         )
@@ -164,6 +143,7 @@ async def generate_debate(research: str, believer_name: str, skeptic_name: str)
         
         logger.info(f"Starting skeptic ({skeptic_name}) response generation")
         # Get skeptic's perspective
+        skeptic_llm = await providers.aget("skeptic_llm")
         skeptic_response = await skeptic_llm.ainvoke(
             skeptic_prompt.format(research=research, name=skeptic_name)
         )
@@ -0,0 +1,175 @@
+"""Typed events streamed by the agents, and their batching for HTTP.
+
+The research and debate agents yield StreamEvent objects, which the
+streaming endpoints pass through and serialize only when writing the
+response, in the shape the client already reads ({"type": ..., "name": ...,
+"content": ..., "turn": ...}): as NDJSON here, or as server-sent events by
+app.streams.
+
+LLM streams produce one event per token. coalesce() batches them: partial
+events of the same turn are merged until the window has passed since the
+first of them or their text reaches a size limit, and everything pending is
+written as one frame. Interleaved turns (e.g. panelists speaking at the same
+time) are merged per turn, as long as no complete event is between them.
+Any complete event (research steps, segments, errors, the final result) is
+written at once, together with whatever partial text precedes it.
+"""
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from decouple import config
+
+# Coalescing of token events: maximum delay and text size of one frame
+STREAM_COALESCE_MS = config('STREAM_COALESCE_MS', default=50, cast=int)
+STREAM_COALESCE_CHARS = config('STREAM_COALESCE_CHARS', default=1024, cast=int)
+# Events buffered for a slow client before the producer waits for it
+STREAM_BUFFER_EVENTS = config('STREAM_BUFFER_EVENTS', default=256, cast=int)
+
+
+@dataclass
+class StreamEvent:
+    type: str
+    content: Optional[str] = None
+    name: Optional[str] = None
+    turn: Optional[int] = None
+    # A piece of a longer text (an LLM token); consecutive pieces of one turn may be merged
+    partial: bool = False
+    # Other fields of the serialized event, e.g. URLs of a rendered segment
+    data: Dict = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        result = {"type": self.type}
+        if self.name is not None:
+            result["name"] = self.name
+        if self.content is not None:
+            result["content"] = self.content
+        if self.turn is not None:
+            result["turn"] = self.turn
+        result.update(self.data)
+        return result
+
+
+def encode(events: Iterable[StreamEvent]) -> str:
+    """NDJSON for a batch of events."""
+    return "".join(json.dumps(event.to_dict()) + "\n" for event in events)
+
+
+class _Pending:
+    """A buffered event; merged partial text is kept as pieces until it is written."""
+
+    __slots__ = ("event", "pieces", "size")
+
+    def __init__(self, event: StreamEvent):
+        self.event = event
+        self.pieces = [event.content or ""]
+        self.size = len(self.pieces[0])
+
+    def accepts(self, event: StreamEvent) -> bool:
+        first = self.event
+        return (
+            first.partial and event.partial
+            and (first.type, first.name, first.turn) == (event.type, event.name, event.turn)
+        )
+
+    def add(self, event: StreamEvent):
+        self.pieces.append(event.content or "")
+        self.size += len(self.pieces[-1])
+
+    def build(self) -> StreamEvent:
+        if len(self.pieces) == 1:
+            return self.event
+        event = self.event
+        return StreamEvent(
+            event.type, "".join(self.pieces), event.name, event.turn, partial=True, data=event.data
+        )
+
+
+async def coalesce(
+    source: AsyncIterator[StreamEvent],
+    window: float = STREAM_COALESCE_MS / 1000,
+    max_chars: int = STREAM_COALESCE_CHARS,
+    max_buffered: int = STREAM_BUFFER_EVENTS
+) -> AsyncIterator[List[StreamEvent]]:
+    """Yield batches of events from source, each to be written as one frame.
+
+    source is read by its own task into a buffer of at most max_buffered
+    events. While the consumer is slow the buffer fills with merged text
+    rather than many small events, and only when it is full of events that
+    cannot be merged does the producer wait. Closing the generator cancels
+    the producer.
+    """
+    loop = asyncio.get_running_loop()
+    pending: deque = deque()
+    changed = asyncio.Event()
+    drained = asyncio.Event()
+    state = {"done": False, "error": None, "since": 0.0}
+
+    def mergeable(event: StreamEvent) -> Optional[_Pending]:
+        # The pending text of the same turn, looking back only over partial events
+        if event.partial:
+            for item in reversed(pending):
+                if not item.event.partial:
+                    break
+                if item.accepts(event):
+                    return item
+        return None
+
+    async def produce():
+        try:
+            async for event in source:
+                target = mergeable(event)
+                if target and (target.size < max_chars or len(pending) >= max_buffered):
+                    target.add(event)
+                else:
+                    while len(pending) >= max_buffered:
+                        drained.clear()
+                        await drained.wait()
+                    if not pending:
+                        state["since"] = loop.time()
+                    pending.append(_Pending(event))
+                changed.set()
+        except Exception as e:
+            state["error"] = e
+        finally:
+            state["done"] = True
+            changed.set()
+
+    def holding() -> bool:
+        # Only text that can still grow is held back
+        return all(item.event.partial for item in pending) and sum(item.size for item in pending) < max_chars
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            if not pending:
+                if state["done"]:
+                    break
+                changed.clear()
+                await changed.wait()
+                continue
+            if not state["done"] and window > 0 and holding():
+                remaining = state["since"] + window - loop.time()
+                if remaining > 0:
+                    changed.clear()
+                    try:
+                        await asyncio.wait_for(changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+            batch = [item.build() for item in pending]
+            pending.clear()
+            drained.set()
+            yield batch
+        if state["error"] is not None:
+            raise state["error"]
+    finally:
+        producer.cancel()
+
+
+async def encode_stream(source: AsyncIterator[StreamEvent], **options) -> AsyncIterator[str]:
+    """Coalesce source and serialize each batch; for StreamingResponse."""
+    async for batch in coalesce(source, **options):
+        yield encode(batch)
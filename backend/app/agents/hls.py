@@ -0,0 +1,69 @@
+import logging
+import os
+from typing import List, Tuple
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Declared upper bound for segment length; it may not change once published
+HLS_TARGET_DURATION = config('HLS_TARGET_DURATION', default=60, cast=int)
+# Characters per second of the slowest TTS voice at speed 1, a conservative
+# estimate used to split text into segments that fit the target duration
+HLS_CHARS_PER_SECOND = config('HLS_CHARS_PER_SECOND', default=12.0, cast=float)
+
+
+def max_segment_chars(speed: float = 1.0, target_duration: int = HLS_TARGET_DURATION) -> int:
+    """Longest text that renders within target_duration at the given TTS speed."""
+    return max(int(target_duration * HLS_CHARS_PER_SECOND * speed), 1)
+
+
+class HLSPlaylist:
+    """A growing HLS EVENT playlist of MP3 segments.
+
+    The playlist is rewritten atomically on every append, so players polling it
+    through the /audio endpoint (app.delivery.AudioDelivery, which serves it
+    no-cache and the segments by byte range) never see a half-written file.
+    The target duration is written with the header and never changes, as
+    the spec requires; segments have to be cut to fit it beforehand (see
+    max_segment_chars).
+    """
+
+    def __init__(self, path: str, target_duration: int = HLS_TARGET_DURATION):
+        self.path = path
+        self.target_duration = target_duration
+        self.segments: List[Tuple[str, float]] = []
+        self.ended = False
+        self._write()
+
+    def append(self, uri: str, duration: float):
+        if round(duration) > self.target_duration:
+            logger.warning(
+                f"HLS segment {uri} is {duration:.1f}s, over the playlist's "
+                f"target duration of {self.target_duration}s"
+            )
+        self.segments.append((uri, duration))
+        self._write()
+
+    def close(self):
+        self.ended = True
+        self._write()
+
+    def _write(self):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for uri, duration in self.segments:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(uri)
+        if self.ended:
+            lines.append("#EXT-X-ENDLIST")
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,271 @@
+import os
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+# Bitrates in kbps indexed by [version_is_v1][layer][bitrate_index]
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+
+# Version field values from the header -> MPEG version (1, 2 or 2.5 as 25)
+_VERSIONS = {0b11: 1, 0b10: 2, 0b00: 25}
+_LAYERS = {0b11: 1, 0b10: 2, 0b01: 3}
+
+MONO = 0b11
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    version: int  # 1, 2 or 25 (MPEG 2.5)
+    layer: int
+    bitrate: int  # kbps
+    sample_rate: int
+    padding: int
+    channel_mode: int
+    frame_length: int
+    samples: int
+
+    @property
+    def channels(self) -> int:
+        return 1 if self.channel_mode == MONO else 2
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    @property
+    def side_info_length(self) -> int:
+        if self.version == 1:
+            return 17 if self.channel_mode == MONO else 32
+        return 9 if self.channel_mode == MONO else 17
+
+
+def _samples_per_frame(version: int, layer: int) -> int:
+    if layer == 1:
+        return 384
+    if layer == 3 and version != 1:
+        return 576
+    return 1152
+
+
+def frame_length(version: int, layer: int, bitrate: int, sample_rate: int, padding: int) -> int:
+    if layer == 1:
+        return (12 * bitrate * 1000 // sample_rate + padding) * 4
+    slot_factor = 72 if (layer == 3 and version != 1) else 144
+    return slot_factor * bitrate * 1000 // sample_rate + padding
+
+
+def parse_header(data: bytes, offset: int = 0) -> Optional[FrameHeader]:
+    """Decode the 4-byte frame header at offset, or None if it is not one."""
+    if offset + 4 > len(data) or data[offset] != 0xFF:
+        return None
+    return _decode_header(bytes(data[offset:offset + 4]))
+
+
+@lru_cache(maxsize=1024)
+def _decode_header(raw: bytes) -> Optional[FrameHeader]:
+    # A stream only uses a handful of distinct headers, so decode each once
+    b0, b1, b2, b3 = raw
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = _VERSIONS.get((b1 >> 3) & 0b11)
+    layer = _LAYERS.get((b1 >> 1) & 0b11)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = _BITRATES[(version == 1, layer)][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 1
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        padding=padding,
+        channel_mode=(b3 >> 6) & 0b11,
+        frame_length=frame_length(version, layer, bitrate, sample_rate, padding),
+        samples=_samples_per_frame(version, layer),
+    )
+
+
+def _id3v2_length(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_info_frame(data: bytes, offset: int, header: FrameHeader) -> bool:
+    """True for Xing/Info/VBRI frames, which carry metadata and no audio."""
+    tag_offset = offset + 4 + header.side_info_length
+    if data[tag_offset:tag_offset + 4] in (b"Xing", b"Info"):
+        return True
+    return data[offset + 36:offset + 40] == b"VBRI"
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, FrameHeader]]:
+    """Yield (offset, header) for every audio frame in an MP3 byte string.
+
+    ID3 tags and a leading Xing/Info header frame are skipped; garbage between
+    frames is stepped over until the next valid sync word.
+    """
+    end = len(data)
+    if end >= 128 and data[-128:-125] == b"TAG":
+        end -= 128
+    offset = _id3v2_length(data)
+    first = True
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header is None or offset + header.frame_length > end:
+            offset += 1
+            continue
+        if not (first and _is_info_frame(data, offset, header)):
+            yield offset, header
+        first = False
+        offset += header.frame_length
+
+
+def probe(path: str) -> Tuple[Optional[FrameHeader], float]:
+    """(first frame header, duration in seconds) from frame headers, without decoding."""
+    with open(path, "rb") as f:
+        data = f.read()
+    first_header = None
+    duration = 0.0
+    for _, header in iter_frames(data):
+        if first_header is None:
+            first_header = header
+        duration += header.duration
+    return first_header, duration
+
+
+def probe_duration(path: str) -> float:
+    """Duration in seconds computed from frame headers, without decoding."""
+    return probe(path)[1]
+
+
+def audio_payload(data: bytes) -> Tuple[bytes, Optional[FrameHeader], int]:
+    """Return (frames, first header, frame count) with tags and info frames stripped."""
+    chunks = []
+    first_header = None
+    for offset, header in iter_frames(data):
+        if first_header is None:
+            first_header = header
+        chunks.append(data[offset:offset + header.frame_length])
+    return b"".join(chunks), first_header, len(chunks)
+
+
+def _encode_header(version: int, layer: int, bitrate: int, sample_rate: int, channel_mode: int) -> bytes:
+    version_bits = {v: k for k, v in _VERSIONS.items()}[version]
+    layer_bits = {v: k for k, v in _LAYERS.items()}[layer]
+    bitrate_index = _BITRATES[(version == 1, layer)].index(bitrate)
+    sample_rate_index = _SAMPLE_RATES[version].index(sample_rate)
+    return bytes([
+        0xFF,
+        0xE0 | (version_bits << 3) | (layer_bits << 1) | 1,  # no CRC
+        (bitrate_index << 4) | (sample_rate_index << 2),
+        channel_mode << 6,
+    ])
+
+
+def _blank_frame(fmt: FrameHeader, min_length: int) -> bytearray:
+    """A Layer III frame with all-zero side info, which decodes to silence."""
+    for bitrate in _BITRATES[(fmt.version == 1, fmt.layer)][1:]:
+        length = frame_length(fmt.version, fmt.layer, bitrate, fmt.sample_rate, 0)
+        if length >= min_length:
+            frame = bytearray(length)
+            frame[:4] = _encode_header(fmt.version, fmt.layer, bitrate, fmt.sample_rate, fmt.channel_mode)
+            return frame
+    raise ValueError("No bitrate gives a large enough frame")
+
+
+@lru_cache(maxsize=64)
+def _silence_run(fmt: FrameHeader, frames: int) -> bytes:
+    return bytes(_blank_frame(fmt, 4 + fmt.side_info_length)) * frames
+
+
+def silence_frame_count(fmt: FrameHeader, seconds: float) -> int:
+    return max(0, round(seconds * fmt.sample_rate / fmt.samples))
+
+
+def pause_duration(fmt: FrameHeader, seconds: float) -> float:
+    """Length of the pause concat_files actually inserts for seconds."""
+    return silence_frame_count(fmt, seconds) * fmt.duration
+
+
+def silence(fmt: FrameHeader, frames: int) -> bytes:
+    """Pre-encoded silence matching fmt.
+
+    Runs are cached per (format, length), so the handful of pause lengths a
+    podcast uses are built once per process.
+    """
+    if frames <= 0:
+        return b""
+    key = replace(fmt, bitrate=0, padding=0, frame_length=0)
+    return _silence_run(key, frames)
+
+
+def info_frame(fmt: FrameHeader, frame_count: int, byte_count: int) -> bytes:
+    """A Xing header frame so players know the exact length of a joined file."""
+    tag_offset = 4 + fmt.side_info_length
+    frame = _blank_frame(fmt, tag_offset + 16)
+    frame[tag_offset:tag_offset + 16] = (
+        b"Xing"
+        + (0x1 | 0x2).to_bytes(4, "big")  # frame count and byte count present
+        + frame_count.to_bytes(4, "big")
+        + (byte_count + len(frame)).to_bytes(4, "big")
+    )
+    return bytes(frame)
+
+
+def concat_files(paths: List[str], output_file: str, silences: List[float]) -> bool:
+    """Join MP3 files frame by frame, inserting silences[i] seconds before paths[i].
+
+    Returns False, leaving output_file untouched, when the inputs are not Layer
+    III streams sharing one sample rate and channel count; callers then need
+    to re-encode.
+    """
+    payloads = []
+    fmt = None
+    for path in paths:
+        with open(path, "rb") as f:
+            frames, header, count = audio_payload(f.read())
+        if header is None or header.layer != 3:
+            return False
+        if fmt is None:
+            fmt = header
+        elif (header.version, header.sample_rate, header.channels) != (fmt.version, fmt.sample_rate, fmt.channels):
+            return False
+        payloads.append((frames, count))
+
+    parts = []
+    frame_count = 0
+    for (frames, count), pause in zip(payloads, silences):
+        pause_frames = silence_frame_count(fmt, pause)
+        parts.append(silence(fmt, pause_frames))
+        parts.append(frames)
+        frame_count += pause_frames + count
+    byte_count = sum(len(part) for part in parts)
+
+    tmp_path = f"{output_file}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(info_frame(fmt, frame_count, byte_count))
+        for part in parts:
+            out.write(part)
+    os.replace(tmp_path, output_file)
+    return True
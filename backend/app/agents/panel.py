@@ -0,0 +1,176 @@
+"""Panel debates between any number of the user's agents.
+
+A panel is a set of agents (documents of the agents collection) and a
+schedule: rounds, each a list of agent ids in speaking order. An opening
+statement depends only on the research, so the whole opening round is
+generated concurrently; a turn of a later round answers the previous round
+and starts once that round is finished. Turns run as a dependency graph
+(see plan_turns), at most PANEL_MAX_CONCURRENCY at a time.
+
+Tokens of all running turns are yielded as they arrive, interleaved, each
+tagged with its panelist: type "panelist", the agent's name, the turn's
+position in the schedule (from 1) and, in data, the agent id and round.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, List
+
+from decouple import config
+
+from .audio_fx import agent_effects
+from .debate_prompt import DebatePromptBuilder
+from .debaters import debater_llm
+from .events import StreamEvent
+from .providers import providers
+from ..metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Turns generated at the same time by one panel
+PANEL_MAX_CONCURRENCY = config('PANEL_MAX_CONCURRENCY', default=4, cast=int)
+
+PANELIST_TURN_MESSAGES = [
+    ("system", """You are {name}, a host on a podcast panel discussing a topic with other hosts.
+    Your personality: {personality}
+    Your responses should be engaging, conversational, and STRICTLY LIMITED TO 100 WORDS.
+    Stay in character, use 'I' when referring to yourself and address the other panelists by name."""),
+    # Research first, so the prefix stays the same between a panelist's turns
+    ("user", "Research: {research}\n\nPanelists: {panelists}\n\n{instructions}")
+]
+
+_OPENING = "Give your opening statement on this research for round 1."
+_RESPONSE = "This is round {round}. The previous round:\n\n{transcript}\n\nRespond to the other panelists' points."
+
+
+def _turn_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(PANELIST_TURN_MESSAGES)
+
+providers.register("panel_llm", lambda: debater_llm("panel"))
+providers.register("panelist_turn_prompt", _turn_prompt)
+
+
+@dataclass
+class PanelTurn:
+    index: int  # position in the schedule, from 0
+    round: int  # from 1
+    agent: Dict
+    depends_on: List[int]
+
+
+def default_schedule(agent_ids: List[str], rounds: int = 3) -> List[List[str]]:
+    """Every agent once per round, in the given order."""
+    return [list(agent_ids) for _ in range(rounds)]
+
+
+def plan_turns(agents: Dict[str, Dict], schedule: List[List[str]]) -> List[PanelTurn]:
+    """Turns of schedule in order; each turn depends on every turn of the previous round.
+
+    Raises ValueError for an empty schedule or an agent id missing from agents.
+    """
+    turns: List[PanelTurn] = []
+    previous: List[int] = []
+    for number, agent_ids in enumerate(schedule, start=1):
+        current = []
+        for agent_id in agent_ids:
+            if agent_id not in agents:
+                raise ValueError(f"Agent {agent_id} is scheduled but not on the panel")
+            current.append(len(turns))
+            turns.append(PanelTurn(len(turns), number, agents[agent_id], list(previous)))
+        if current:
+            previous = current
+    if not turns:
+        raise ValueError("The panel schedule has no turns")
+    return turns
+
+
+async def generate_panel_stream(
+    research: str,
+    agents: Dict[str, Dict],
+    schedule: List[List[str]],
+    max_concurrency: int = PANEL_MAX_CONCURRENCY
+) -> AsyncGenerator[StreamEvent, None]:
+    """Generate a panel debate, yielding the tokens of every turn as partial "panelist" events."""
+    turns = plan_turns(agents, schedule)
+    prompts = await DebatePromptBuilder.create(research)
+    panelists = ", ".join(
+        f"{agent['name']} ({agent.get('personality') or 'no stated personality'})" for agent in agents.values()
+    )
+    texts: Dict[int, str] = {}
+    finished = {turn.index: asyncio.Event() for turn in turns}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run(turn: PanelTurn):
+        for index in turn.depends_on:
+            await finished[index].wait()
+        agent = turn.agent
+        async with semaphore:
+            transcript = "\n\n".join(f"{turns[i].agent['name']}: {texts[i]}" for i in turn.depends_on)
+            prompt = prompts.build(
+                await providers.aget("panelist_turn_prompt"),
+                "panelist",
+                transcript,
+                name=agent["name"],
+                personality=agent.get("personality") or "balanced and curious",
+                panelists=panelists,
+                instructions=_RESPONSE.format(round=turn.round, transcript=transcript) if transcript else _OPENING
+            )
+            logger.info(f"Starting panelist {agent['name']} turn {turn.index + 1} (round {turn.round}): {prompt.report()}")
+            pieces = []
+            llm = await providers.aget("panel_llm")
+            with timed("debate_turn"):
+                async for chunk in llm.astream(prompt.messages):
+                    pieces.append(chunk.content)
+                    await events.put(StreamEvent(
+                        "panelist", chunk.content, name=agent["name"], turn=turn.index + 1, partial=True,
+                        data={"agent_id": str(agent["_id"]), "round": turn.round}
+                    ))
+        texts[turn.index] = "".join(pieces)
+        finished[turn.index].set()
+
+    tasks = [asyncio.create_task(run(turn)) for turn in turns]
+
+    async def run_all():
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await events.put(None)
+
+    runner = asyncio.create_task(run_all())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        # Raises the first failure of a turn
+        await runner
+    except Exception as e:
+        logger.error(f"Error in panel generation: {str(e)}")
+        yield StreamEvent("error", str(e))
+    finally:
+        for task in tasks:
+            task.cancel()
+        runner.cancel()
+
+
+def build_panel_blocks(agents: Dict[str, Dict], schedule: List[List[str]], texts: Dict[int, str]) -> List[Dict]:
+    """Conversation blocks in schedule order from turn texts keyed by turn number (from 1)."""
+    blocks = []
+    for turn in plan_turns(agents, schedule):
+        text = texts.get(turn.index + 1, "")
+        if not text.strip():
+            continue
+        agent = turn.agent
+        blocks.append({
+            "name": f"{agent['name']}'s Turn {turn.round}",
+            "content": text,
+            "silence_before": 1,
+            "voice_id": agent["voice_id"],
+            # Applied after rendering, so renders at the default speed stay cacheable
+            "effects": agent_effects(agent),
+            "model": "tts-1",
+            "type": agent["name"],
+            "turn": turn.round
+        })
+    return blocks
@@ -1,36 +1,41 @@
-import requests
+import asyncio
 import json
 import os
+import re
 import shutil
 import subprocess
 from datetime import datetime
 from decouple import config
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Dict, List
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
 import logging
 from fastapi import HTTPException, status
+from .synthesis import SynthesisEngine, TTS_MAX_INPUT_CHARS
+from .sentences import iter_chunks
+from .segment_cache import SegmentCache
+from .hls import HLSPlaylist, max_segment_chars
+from . import audio_fx, captions, mp3
+from ..checkpoints import Checkpoint
+from ..database import podcasts
+from ..metrics import PODCASTS_IN_FLIGHT, STAGE_ERRORS, TTS_CHARACTERS, timed
 
 logger = logging.getLogger(__name__)
 
 class Settings:
-    MONGODB_URL = config('MONGODB_URL')
     SECRET_KEY = config('SECRET_KEY')
     OPENAI_API_KEY = config('OPENAI_API_KEY')
+    OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='https://api.openai.com/v1')
     # Other settings...
 
 settings = Settings()
 
-client = AsyncIOMotorClient(settings.MONGODB_URL)
-db = client.podcraft
-podcasts = db.podcasts
-
 class PodcastManager:
     def __init__(self):
-        self.tts_url = "https://api.openai.com/v1/audio/speech"
-        self.headers = {
-            "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        self.tts_url = f"{settings.OPENAI_BASE_URL.rstrip('/')}/audio/speech"
+        # Pooled async TTS client shared by every podcast rendered by this manager
+        self.synthesis = SynthesisEngine(self.tts_url, settings.OPENAI_API_KEY)
+        # Rendered segments are reused across jobs when text and voice settings match
+        self.segment_cache = SegmentCache()
         # Create absolute path for temp directory
         self.temp_dir = os.path.abspath("temp_audio")
         os.makedirs(self.temp_dir, exist_ok=True)
@@ -38,67 +43,175 @@ class PodcastManager:
         # Define allowed voices
         self.allowed_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer", "ash", "sage", "coral"]
 
-    def generate_speech(self, text: str, voice_id: str, filename: str) -> bool:
+    def tts_payload(self, text: str, voice_id: str, model: str = "tts-1", speed: float = 1.0) -> Dict:
+        """Build the TTS request body, normalizing the voice."""
+        # Validate and normalize voice_id
+        voice = voice_id.lower().strip()
+        if voice not in self.allowed_voices:
+            print(f"Warning: Invalid voice ID: {voice_id}. Using default voice 'alloy'")
+            voice = "alloy"
+        return {
+            "model": model or "tts-1",
+            "input": text,
+            "voice": voice,
+            "speed": speed or 1.0
+        }
+
+    def segment_hash(self, payload: Dict) -> str:
+        """Content hash of everything that affects a rendered segment."""
+        return self.segment_cache.make_key(
+            payload["input"], payload["voice"], payload["model"], payload["speed"], "mp3"
+        )
+
+    async def generate_speech(
+        self,
+        text: str,
+        voice_id: str,
+        filename: str,
+        model: str = "tts-1",
+        speed: float = 1.0
+    ) -> bool:
         """Generate speech using OpenAI's TTS API."""
+        with timed("tts_segment"):
+            ok = await self._generate_speech(text, voice_id, filename, model, speed)
+        if not ok:
+            STAGE_ERRORS.labels("tts_segment").inc()
+        return ok
+
+    async def _generate_speech(self, text: str, voice_id: str, filename: str, model: str, speed: float) -> bool:
         try:
-            # Debug logging for voice selection
-            print(f"\n=== TTS Generation Details ===")
-            print(f"File: {filename}")
-            print(f"Voice ID (original): {voice_id}")
-            print(f"Voice ID (lowercase): {voice_id.lower()}")
-            print(f"Allowed voices: {self.allowed_voices}")
-            
-            # Validate and normalize voice_id
-            voice = voice_id.lower().strip()
-            if voice not in self.allowed_voices:
-                print(f"Warning: Invalid voice ID: {voice_id}. Using default voice 'alloy'")
-                voice = "alloy"
-            
-            print(f"Final voice selection: {voice}")
+            payload = self.tts_payload(text, voice_id, model, speed)
+            print(f"TTS generation: {os.path.basename(filename)} (voice: {payload['voice']}, {len(text)} chars)")
 
             # Ensure the output directory exists
             output_dir = os.path.dirname(filename)
             os.makedirs(output_dir, exist_ok=True)
 
-            payload = {
-                "model": "tts-1",
-                "input": text,
-                "voice": voice
-            }
-            
-            print(f"TTS API payload: {json.dumps(payload, indent=2)}")
-            print(f"Request headers: {json.dumps({k: '***' if k == 'Authorization' else v for k, v in self.headers.items()}, indent=2)}")
+            cache_key = self.segment_hash(payload)
+            if await self.segment_cache.fetch(cache_key, filename):
+                print(f"TTS cache hit: {os.path.basename(filename)}")
+                TTS_CHARACTERS.labels("cache").inc(len(text))
+                return True
 
-            response = requests.post(self.tts_url, json=payload, headers=self.headers)
-            if response.status_code != 200:
-                print(f"API error response: {response.status_code} - {response.text}")
+            if not await self.synthesis.synthesize(payload, filename):
                 return False
-                
-            # Write the audio content to the file
-            with open(filename, "wb") as f:
-                f.write(response.content)
-            
-            print(f"Successfully generated speech file: {filename}")
-            print(f"File size: {os.path.getsize(filename)} bytes")
-            
+
             # Verify the file exists and has content
             if not os.path.exists(filename) or os.path.getsize(filename) == 0:
                 print(f"Error: Generated file is empty or does not exist: {filename}")
                 return False
-                
+
+            print(f"Successfully generated speech file: {filename} ({os.path.getsize(filename)} bytes)")
+            await self.segment_cache.store(cache_key, filename)
+            TTS_CHARACTERS.labels("synthesized").inc(len(text))
             return True
         except Exception as e:
             print(f"Error generating speech: {str(e)}")
             logger.exception(f"Error generating speech: {str(e)}")
             return False
 
-    def merge_audio_files(self, audio_files: List[str], output_file: str) -> bool:
-        """Merge multiple audio files into one using ffmpeg."""
+    def split_long_segments(self, segments: List[Dict], max_chars: int = TTS_MAX_INPUT_CHARS) -> List[Dict]:
+        """Split segments whose text is over max_chars (the TTS input limit by default) at sentence ends.
+
+        The parts keep the segment's speaker, turn and voice, so they render
+        concurrently like any other segment and merge back into one turn in
+        the captions and chapters. Only the first part keeps the pause.
+        """
+        result = []
+        for segment in segments:
+            if len(segment["text"]) <= max_chars:
+                result.append(segment)
+                continue
+            base, extension = os.path.splitext(segment["audio_file"])
+            for part, text in enumerate(iter_chunks(segment["text"], max_chars)):
+                result.append({
+                    **segment,
+                    "text": text,
+                    "audio_file": f"{base}_part{part + 1}{extension}",
+                    "silence_before": segment["silence_before"] if part == 0 else 0
+                })
+        return result
+
+    async def synthesize_segments(
+        self,
+        segments: List[Dict],
+        on_ready: Optional[Callable[[int, Dict], Awaitable[None]]] = None,
+        checkpoint: Optional[Checkpoint] = None
+    ) -> List[bool]:
+        """Render all segments concurrently; results come back in segment order.
+
+        If on_ready is given it is awaited for each segment as soon as it and
+        every segment before it have rendered, i.e. in transcript order.
+        Segments already recorded in checkpoint with the same content hash
+        are not rendered again. Rendered segments get their MP3 "format"
+        header and "duration" set.
+        """
+        results: List[Optional[bool]] = [None] * len(segments)
+
+        async def render(index: int, segment: Dict):
+            payload = self.tts_payload(
+                segment["text"],
+                segment["voice_id"],
+                segment.get("model", "tts-1"),
+                segment.get("speed", 1.0)
+            )
+            digest = self.segment_hash(payload)
+            if checkpoint and checkpoint.has_segment(index, digest, segment["audio_file"]):
+                print(f"Reusing checkpointed segment: {os.path.basename(segment['audio_file'])}")
+                TTS_CHARACTERS.labels("checkpoint").inc(len(segment["text"]))
+                ok = True
+            else:
+                ok = await self.generate_speech(
+                    segment["text"],
+                    segment["voice_id"],
+                    segment["audio_file"],
+                    model=segment.get("model", "tts-1"),
+                    speed=segment.get("speed", 1.0)
+                )
+                if ok and checkpoint:
+                    await checkpoint.save_segment(index, digest, segment["audio_file"])
+            if ok:
+                # Time the segment from its frame headers while it is fresh
+                with timed("probe"):
+                    segment["format"], segment["duration"] = mp3.probe(segment["audio_file"])
+            results[index] = ok
+
+        tasks = [asyncio.ensure_future(render(i, segment)) for i, segment in enumerate(segments)]
+        ready = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                await finished
+                # Release the contiguous prefix that is now complete
+                while on_ready and ready < len(segments) and results[ready]:
+                    await on_ready(ready, segments[ready])
+                    ready += 1
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return [bool(result) for result in results]
+
+    def merge_audio_files(
+        self,
+        audio_files: List[str],
+        output_file: str,
+        silences: Optional[List[float]] = None
+    ) -> bool:
+        """Merge multiple audio files into one.
+
+        silences[i] is the pause in seconds inserted before audio_files[i]
+        (default: 0.3 s between files). MP3 segments that share one stream
+        format are joined frame by frame without re-encoding; anything else
+        falls back to ffmpeg.
+        """
+        with timed("merge"):
+            ok = self._merge_audio_files(audio_files, output_file, silences)
+        if not ok:
+            STAGE_ERRORS.labels("merge").inc()
+        return ok
+
+    def _merge_audio_files(self, audio_files: List[str], output_file: str, silences: Optional[List[float]]) -> bool:
         try:
-            # Ensure output directory exists
-            output_dir = os.path.dirname(os.path.abspath(output_file))
-            os.makedirs(output_dir, exist_ok=True)
-            
             if not audio_files:
                 print("No audio files to merge")
                 return False
@@ -111,30 +224,47 @@ class PodcastManager:
 
             # Ensure all paths are absolute
             output_file = os.path.abspath(output_file)
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+            if silences is None:
+                silences = [0] + [0.3] * (len(audio_files) - 1)
+
+            if mp3.concat_files(audio_files, output_file, silences):
+                print(f"Successfully joined {len(audio_files)} audio files without re-encoding: {output_file}")
+                return True
+
+            print("Audio files do not share one MP3 stream format, re-encoding with ffmpeg")
+            return self._merge_with_ffmpeg(audio_files, output_file, silences)
+        except Exception as e:
+            print(f"Error merging audio files: {str(e)}")
+            return False
+
+    def _merge_with_ffmpeg(self, audio_files: List[str], output_file: str, silences: List[float]) -> bool:
+        """Merge audio files by decoding and re-encoding them with ffmpeg."""
+        try:
             output_dir = os.path.dirname(output_file)
-            os.makedirs(output_dir, exist_ok=True)
             
             # Create temporary files in the same directory
             list_file = os.path.join(output_dir, "files.txt")
-            silence_file = os.path.join(output_dir, "silence.mp3")
             
             print(f"Output directory: {output_dir}")
             print(f"List file: {list_file}")
-            print(f"Silence file: {silence_file}")
             
-            # Generate shorter silence file (0.3 seconds instead of 1 second)
-            silence_result = subprocess.run([
-                'ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono', 
-                '-t', '0.3', '-q:a', '9', '-acodec', 'libmp3lame', silence_file
-            ], capture_output=True, text=True)
-
-            if silence_result.returncode != 0:
-                print(f"Error generating silence file: {silence_result.stderr}")
-                return False
+            # Generate one silence file per distinct pause length
+            silence_files = {}
+            for pause in set(silences):
+                if pause <= 0:
+                    continue
+                silence_file = os.path.join(output_dir, f"silence_{int(pause * 1000)}ms.mp3")
+                silence_result = subprocess.run([
+                    'ffmpeg', '-y', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono', 
+                    '-t', str(pause), '-q:a', '9', '-acodec', 'libmp3lame', silence_file
+                ], capture_output=True, text=True)
 
-            if not os.path.exists(silence_file):
-                print("Failed to create silence file")
-                return False
+                if silence_result.returncode != 0 or not os.path.exists(silence_file):
+                    print(f"Error generating silence file: {silence_result.stderr}")
+                    return False
+                silence_files[pause] = silence_file
 
             # IMPORTANT: The order here determines the final audio order
             print("\nGenerating files list in exact provided order:")
@@ -143,31 +273,22 @@ class PodcastManager:
                     for i, audio_file in enumerate(audio_files):
                         abs_audio_path = os.path.abspath(audio_file)
                         print(f"{i+1}. Adding audio file: {os.path.basename(abs_audio_path)}")
+                        # Add the block's pause before its audio
+                        if silences[i] in silence_files:
+                            silence_path = silence_files[silences[i]].replace('\\', '/')
+                            f.write(f"file '{silence_path}'\n")
                         # Use forward slashes for ffmpeg compatibility
                         abs_audio_path = abs_audio_path.replace('\\', '/')
-                        silence_path = silence_file.replace('\\', '/')
                         f.write(f"file '{abs_audio_path}'\n")
-                        # Add a shorter silence after each audio segment (except the last one)
-                        if i < len(audio_files) - 1:
-                            f.write(f"file '{silence_path}'\n")
             except Exception as e:
                 print(f"Error writing list file: {str(e)}")
                 return False
 
-            if not os.path.exists(list_file):
-                print("Failed to create list file")
-                return False
-
-            # Print the contents of the list file for debugging
-            print("\nContents of files.txt:")
-            with open(list_file, 'r', encoding='utf-8') as f:
-                print(f.read())
-
             # Merge all files using the concat demuxer with optimized settings
             try:
                 # Use concat demuxer with additional parameters for better playback
-                result = subprocess.run(
-                    ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_file,
+                subprocess.run(
+                    ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_file,
                      '-c:a', 'libmp3lame', '-q:a', '4', '-ar', '44100',
                      output_file],
                     capture_output=True,
@@ -196,25 +317,69 @@ class PodcastManager:
         conversation_blocks: List[Dict],
         believer_voice_id: str,
         skeptic_voice_id: str,
-        user_id: str = None
+        user_id: str = None,
+        on_segment: Optional[Callable[[Dict], Awaitable[None]]] = None,
+        checkpoint: Optional[Checkpoint] = None
+    ) -> Dict:
+        """Create a podcast by converting text to speech and storing the results.
+
+        When on_segment is given the podcast is rendered progressively: each
+        segment is appended to an HLS playlist in the podcast directory as soon
+        as it is ready, and on_segment is awaited with the playlist details.
+
+        With a checkpoint the podcast directory and every rendered segment are
+        recorded, so a failed or interrupted run resumes in the same directory
+        and only renders the segments that are missing. Once the podcast is
+        saved its result is recorded too, and a resumed run returns it as is.
+        """
+        with PODCASTS_IN_FLIGHT.track_inprogress(), timed("podcast"):
+            result = await self._create_podcast(
+                topic, research, conversation_blocks, believer_voice_id, skeptic_voice_id,
+                user_id, on_segment, checkpoint
+            )
+        if "error" in result:
+            STAGE_ERRORS.labels("podcast").inc()
+        return result
+
+    async def _create_podcast(
+        self,
+        topic: str,
+        research: str,
+        conversation_blocks: List[Dict],
+        believer_voice_id: str,
+        skeptic_voice_id: str,
+        user_id: Optional[str],
+        on_segment: Optional[Callable[[Dict], Awaitable[None]]],
+        checkpoint: Optional[Checkpoint]
     ) -> Dict:
-        """Create a podcast by converting text to speech and storing the results."""
         podcast_temp_dir = None
         try:
+            saved = checkpoint.get("podcast") if checkpoint else None
+            if saved:
+                # An earlier attempt saved the podcast but did not finish the job
+                print(f"Podcast already saved by an earlier attempt: {saved['podcast_id']}")
+                return saved
+
             # Debug logging for voice IDs
-            print(f"\nPodcast Creation - Voice Configuration:")
+            print("\nPodcast Creation - Voice Configuration:")
             print(f"Believer Voice ID: {believer_voice_id}")
             print(f"Skeptic Voice ID: {skeptic_voice_id}")
             
-            # Create a unique directory with absolute path
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            podcast_temp_dir = os.path.abspath(os.path.join(self.temp_dir, timestamp))
+            # Create a unique directory with absolute path (or resume in the checkpointed one)
+            podcast_temp_dir = checkpoint.get("workspace") if checkpoint else None
+            if not podcast_temp_dir:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                podcast_temp_dir = os.path.abspath(
+                    os.path.join(self.temp_dir, f"{timestamp}_{uuid.uuid4().hex[:8]}")
+                )
+                if checkpoint:
+                    await checkpoint.save("workspace", podcast_temp_dir)
             os.makedirs(podcast_temp_dir, exist_ok=True)
             
             print(f"Created temp directory: {podcast_temp_dir}")
             print(f"Processing conversation blocks: {json.dumps(conversation_blocks, indent=2)}")
             
-            audio_files = []
+            segments = []
             
             # Process the blocks differently based on format:
             # 1. New turn-based format with "type" and "turn" fields
@@ -237,22 +402,31 @@ class PodcastManager:
                         if not content.strip():  # Skip empty content
                             continue
                             
-                        # Use the correct voice based on agent type
-                        voice_id = believer_voice_id if agent_type == "believer" else skeptic_voice_id
-                        file_prefix = "believer" if agent_type == "believer" else "skeptic"
+                        # A block may carry its own voice (panel debates); otherwise the agent type decides
+                        voice_id = block.get("voice_id") or (
+                            believer_voice_id if agent_type == "believer" else skeptic_voice_id
+                        )
+                        file_prefix = re.sub(r"\W+", "_", agent_type).strip("_").lower() or "speaker"
                         
                         # Create a unique filename with turn number
                         audio_file = os.path.join(podcast_temp_dir, f"{file_prefix}_turn_{turn}_{idx}.mp3")
                         
-                        print(f"\nProcessing {agent_type} turn {turn} (index {idx}) with voice {voice_id}")
+                        print(f"\nQueueing {agent_type} turn {turn} (index {idx}) with voice {voice_id}")
                         print(f"Content preview: {content[:100]}...")
                         
-                        if self.generate_speech(content, voice_id, audio_file):
-                            # Add to our audio files list IN THE ORIGINAL ORDER
-                            audio_files.append(audio_file)
-                            print(f"Generated {agent_type} audio for turn {turn}, added to position {len(audio_files)}")
-                        else:
-                            raise Exception(f"Failed to generate audio for {agent_type} turn {turn}")
+                        # Add to our segments list IN THE ORIGINAL ORDER
+                        segments.append({
+                            "text": content,
+                            "voice_id": voice_id,
+                            "speaker": agent_type,
+                            "turn": turn,
+                            "audio_file": audio_file,
+                            "model": block.get("model", "tts-1"),
+                            "speed": block.get("speed", 1.0),
+                            "effects": block.get("effects"),
+                            "silence_before": block.get("silence_before", 0.3),
+                            "error": f"Failed to generate audio for {agent_type} turn {turn}"
+                        })
                 
             # Second check: Blocks with input field and possibly turn information
             elif any("input" in block for block in conversation_blocks):
@@ -278,14 +452,21 @@ class PodcastManager:
                             speaker_type = "believer" if is_believer else "skeptic"
                             turn = block.get("turn", idx + 1)
                             
-                            print(f"\nProcessing {speaker_type} block with turn {turn} using voice {voice_id}")
+                            print(f"\nQueueing {speaker_type} block with turn {turn} using voice {voice_id}")
                             audio_file = os.path.join(podcast_temp_dir, f"{speaker_type}_turn_{turn}_{idx}.mp3")
                             
-                            if self.generate_speech(block["input"], voice_id, audio_file):
-                                audio_files.append(audio_file)
-                                print(f"Generated audio for {speaker_type} turn {turn}")
-                            else:
-                                raise Exception(f"Failed to generate audio for {speaker_type} turn {turn}")
+                            segments.append({
+                                "text": block["input"],
+                                "voice_id": voice_id,
+                                "speaker": speaker_type,
+                                "turn": turn,
+                                "audio_file": audio_file,
+                                "model": block.get("model", "tts-1"),
+                                "speed": block.get("speed", 1.0),
+                                "effects": block.get("effects"),
+                                "silence_before": block.get("silence_before", 0.3),
+                                "error": f"Failed to generate audio for {speaker_type} turn {turn}"
+                            })
                 else:
                     # Old format - process blocks sequentially as they appear
                     print("Processing old format blocks sequentially")
@@ -296,20 +477,60 @@ class PodcastManager:
                             voice_id = believer_voice_id if is_believer else skeptic_voice_id
                             speaker_type = "believer" if is_believer else "skeptic"
                             
-                            print(f"\nProcessing {speaker_type} block {i+1} with voice {voice_id}")
+                            print(f"\nQueueing {speaker_type} block {i+1} with voice {voice_id}")
                             print(f"Block name: {block.get('name', '')}")  # Debug logging
                             
                             audio_file = os.path.join(podcast_temp_dir, f"part_{i+1}.mp3")
-                            if self.generate_speech(block["input"], voice_id, audio_file):
-                                audio_files.append(audio_file)
-                                print(f"Generated audio for part {i+1}")
-                            else:
-                                raise Exception(f"Failed to generate audio for part {i+1}")
+                            segments.append({
+                                "text": block["input"],
+                                "voice_id": voice_id,
+                                "speaker": speaker_type,
+                                "turn": i + 1,
+                                "audio_file": audio_file,
+                                "model": block.get("model", "tts-1"),
+                                "speed": block.get("speed", 1.0),
+                                "effects": block.get("effects"),
+                                "silence_before": block.get("silence_before", 0.3),
+                                "error": f"Failed to generate audio for part {i+1}"
+                            })
             else:
                 raise Exception("Invalid conversation blocks format - no recognizable structure found")
 
-            if not audio_files:
+            if not segments:
                 raise Exception("No audio files were generated from the conversation blocks")
+            max_chars = TTS_MAX_INPUT_CHARS
+            if on_segment:
+                # The playlist's target duration is fixed once published, so
+                # every segment has to fit it, even in the slowest voice
+                slowest = min(segment.get("speed") or 1.0 for segment in segments)
+                max_chars = min(max_chars, max_segment_chars(slowest))
+            segments = self.split_long_segments(segments, max_chars)
+
+            playlist = None
+            if on_segment:
+                playlist = HLSPlaylist(os.path.join(podcast_temp_dir, "playlist.m3u8"))
+
+                async def publish_segment(index: int, segment: Dict):
+                    playlist.append(os.path.basename(segment["audio_file"]), segment["duration"])
+                    await on_segment({
+                        "index": index,
+                        "total": len(segments),
+                        "audio_path": segment["audio_file"],
+                        "playlist_path": playlist.path,
+                        "duration": segment["duration"]
+                    })
+
+            # Render every segment concurrently; results keep transcript order
+            print(f"\nSynthesizing {len(segments)} segments concurrently")
+            results = await self.synthesize_segments(
+                segments,
+                on_ready=publish_segment if on_segment else None,
+                checkpoint=checkpoint
+            )
+            for segment, ok in zip(segments, results):
+                if not ok:
+                    raise Exception(segment["error"])
+            audio_files = [segment["audio_file"] for segment in segments]
 
             print(f"\nGenerated {len(audio_files)} audio files in total")
             
@@ -320,30 +541,50 @@ class PodcastManager:
             
             # Merge all audio files
             final_audio = os.path.join(podcast_temp_dir, "final_podcast.mp3")
+            # Written under another name and renamed, since the file is served as immutable
+            merged_audio = os.path.join(podcast_temp_dir, "final_podcast.part.mp3")
             print(f"Merging to final audio: {final_audio}")
             
-            if not self.merge_audio_files(audio_files, final_audio):
-                raise Exception("Failed to merge audio files")
-                
-            # Calculate audio duration using ffprobe
-            duration = 0
-            try:
-                cmd = [
-                    'ffprobe', 
-                    '-v', 'error', 
-                    '-show_entries', 'format=duration', 
-                    '-of', 'default=noprint_wrappers=1:nokey=1', 
-                    final_audio
-                ]
-                duration_result = subprocess.run(cmd, capture_output=True, text=True)
-                if duration_result.returncode == 0:
-                    duration = float(duration_result.stdout.strip())
-                    print(f"Audio duration: {duration} seconds")
-                else:
-                    print(f"Failed to get audio duration: {duration_result.stderr}")
-            except Exception as e:
-                print(f"Error calculating duration: {str(e)}")
-                # Don't fail the entire process for duration calculation
+            # Honor each block's pause, except before the opening segment
+            silences = [0] + [segment["silence_before"] for segment in segments[1:]]
+            if audio_fx.should_process(segments):
+                # Agent speed/pitch/volume, trimming and loudness in one decode/encode
+                # (progressive previews keep the raw renders)
+                with timed("postprocess"):
+                    durations = await asyncio.to_thread(
+                        audio_fx.process_podcast,
+                        audio_files,
+                        [segment.get("effects") for segment in segments],
+                        [segment["speaker"] for segment in segments],
+                        silences,
+                        merged_audio
+                    )
+                for segment, seconds in zip(segments, durations):
+                    segment["duration"] = seconds
+                pauses = silences
+            else:
+                if not await asyncio.to_thread(self.merge_audio_files, audio_files, merged_audio, silences):
+                    raise Exception("Failed to merge audio files")
+                # Segment offsets in the merged file, from frame headers (no ffprobe)
+                fmt = segments[0]["format"]
+                pauses = [mp3.pause_duration(fmt, pause) if fmt else pause for pause in silences]
+            os.replace(merged_audio, final_audio)
+            timeline = captions.build_timeline(segments, pauses)
+            duration = timeline[-1]["end"]
+            print(f"Audio duration: {duration} seconds")
+
+            caption_files = {
+                "vtt": os.path.join(podcast_temp_dir, "captions.vtt"),
+                "srt": os.path.join(podcast_temp_dir, "captions.srt"),
+                "chapters": os.path.join(podcast_temp_dir, "chapters.vtt")
+            }
+            for kind, build in (
+                ("vtt", captions.to_webvtt),
+                ("srt", captions.to_srt),
+                ("chapters", captions.chapters_webvtt)
+            ):
+                with open(caption_files[kind], "w", encoding="utf-8") as f:
+                    f.write(build(timeline))
 
             podcast_doc = {
                 "topic": topic,
@@ -354,26 +595,46 @@ class PodcastManager:
                 "believer_voice_id": believer_voice_id,
                 "skeptic_voice_id": skeptic_voice_id,
                 "user_id": user_id,
-                "duration": duration  # Add duration to MongoDB document
+                "duration": duration,  # Add duration to MongoDB document
+                # Offset table (speaker, turn, start, end) for seek-to-turn
+                "segments": [
+                    {k: v for k, v in entry.items() if k != "text"} for entry in timeline
+                ],
+                "chapters": captions.chapters(timeline),
+                "captions": caption_files
             }
 
-            result = await podcasts.insert_one(podcast_doc)
-            
-            # Clean up individual audio files but keep the final one
-            for audio_file in audio_files:
-                if os.path.exists(audio_file):
-                    os.remove(audio_file)
+            if playlist:
+                playlist.close()
+                podcast_doc["playlist_path"] = playlist.path
 
-            return {
+            result = await podcasts.insert_one(podcast_doc)
+            podcast = {
                 "podcast_id": str(result.inserted_id),
                 "audio_path": final_audio,
                 "topic": topic,
-                "duration": duration  # Return duration in the result
+                "duration": duration,  # Return duration in the result
+                "playlist_path": playlist.path if playlist else None,
+                "chapters": podcast_doc["chapters"],
+                "captions": caption_files
             }
+            if checkpoint:
+                # Before the segments go, so a resumed run never renders or inserts again
+                await checkpoint.save("podcast", podcast)
+            
+            # Clean up individual audio files but keep the final one
+            # (progressive podcasts keep them, the playlist still points at them)
+            if not playlist:
+                for audio_file in audio_files:
+                    if os.path.exists(audio_file):
+                        os.remove(audio_file)
+
+            return podcast
 
         except Exception as e:
-            # Clean up the temp directory in case of error
-            if os.path.exists(podcast_temp_dir):
+            # Clean up the temp directory in case of error, unless a
+            # checkpoint keeps the rendered segments for a resumed run
+            if not checkpoint and podcast_temp_dir and os.path.exists(podcast_temp_dir):
                 shutil.rmtree(podcast_temp_dir)
             logger.exception(f"Error in podcast creation: {str(e)}")
             return {
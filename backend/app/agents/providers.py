@@ -0,0 +1,98 @@
+"""Registry of lazily built shared objects: LLM clients, tools and agents.
+
+Building these imports langchain and the OpenAI SDK and reads API keys, which
+takes seconds and is not needed to serve most requests. Modules register a
+factory under a name at import time; the object is built on the first get()
+and shared after that:
+
+    @providers.register("believer_llm")
+    def _believer_llm():
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(...)
+
+    llm = await providers.aget("believer_llm")
+
+Async code uses aget(), which builds in a worker thread so a slow factory
+(a network download, seconds of imports) never blocks the event loop;
+get() builds in the calling thread. Each provider has its own lock, so
+building one does not hold up callers of the others.
+
+warm() builds everything ahead of the first request; the app runs it in a
+worker thread on startup.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._build_seconds: Dict[str, float] = {}
+        # One per provider, so building one never holds up callers of another
+        self._locks: Dict[str, Any] = {}
+        # Builds started by aget(), shared by everyone awaiting the same name
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def register(self, name: str, factory: Optional[Callable[[], Any]] = None):
+        """Register factory under name; usable as a decorator."""
+        def add(factory: Callable[[], Any]):
+            if name in self._factories:
+                raise ValueError(f"Provider {name} is already registered")
+            self._factories[name] = factory
+            return factory
+
+        return add(factory) if factory is not None else add
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if name not in self._factories:
+            raise KeyError(f"No provider registered as {name}")
+        with self._locks.setdefault(name, threading.RLock()):
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                self._build_seconds[name] = time.perf_counter() - start
+                logger.info(f"Built {name} in {self._build_seconds[name]:.2f}s")
+            return self._instances[name]
+
+    async def aget(self, name: str) -> Any:
+        """get() for async code: a provider not built yet is built off the event loop."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        build = self._pending.get(name)
+        if build is None:
+            build = asyncio.ensure_future(asyncio.to_thread(self.get, name))
+            self._pending[name] = build
+            build.add_done_callback(lambda _: self._pending.pop(name, None))
+        # A cancelled caller does not cancel the build the others are waiting on
+        return await asyncio.shield(build)
+
+    def warm(self, names: Optional[Iterable[str]] = None):
+        """Build the given providers (all by default) that are not built yet."""
+        for name in list(names or self._factories):
+            self.get(name)
+
+    def reset(self, name: Optional[str] = None):
+        """Drop built instances (one or all) so the next get() rebuilds them."""
+        for key in [name] if name else list(self._instances):
+            with self._locks.setdefault(key, threading.RLock()):
+                self._instances.pop(key, None)
+                self._build_seconds.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {
+            "registered": sorted(self._factories),
+            "built": {name: round(seconds, 3) for name, seconds in self._build_seconds.items()}
+        }
+
+
+providers = ProviderRegistry()
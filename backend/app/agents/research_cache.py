@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from decouple import config
+
+from ..cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long a researched topic is reused; 0 disables the cache
+RESEARCH_CACHE_TTL_SECONDS = config('RESEARCH_CACHE_TTL_SECONDS', default=6 * 3600, cast=int)
+RESEARCH_CACHE_MAX_ENTRIES = config('RESEARCH_CACHE_MAX_ENTRIES', default=256, cast=int)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_topic(topic: str) -> str:
+    """Case, spacing and trailing punctuation do not change the research."""
+    return _WHITESPACE.sub(" ", topic).strip().rstrip(".?!").strip().lower()
+
+
+class ResearchCache:
+    """Two-tier cache of research results keyed by normalized topic.
+
+    An in-process LRU answers repeated topics without a round trip; the Mongo
+    tier shares results between processes and survives restarts, with
+    expired documents removed by a TTL index. Mongo errors are logged and
+    treated as misses so research never fails because of the cache.
+    """
+
+    def __init__(
+        self,
+        collection,
+        ttl_seconds: int = RESEARCH_CACHE_TTL_SECONDS,
+        max_entries: int = RESEARCH_CACHE_MAX_ENTRIES
+    ):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(max_entries, ttl_seconds)
+        self.shared_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def make_key(topic: str) -> str:
+        return hashlib.sha256(normalize_topic(topic).encode("utf-8")).hexdigest()
+
+    async def get(self, topic: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        key = self.make_key(topic)
+        result = self.memory.get(key)
+        if result is not None:
+            return result
+        try:
+            doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        except Exception as e:
+            logger.warning(f"Research cache lookup failed: {str(e)}")
+            return None
+        if not doc:
+            return None
+        self.shared_hits += 1
+        remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+        self.memory.set(key, doc["result"], ttl_seconds=remaining)
+        return doc["result"]
+
+    async def set(self, topic: str, result: str):
+        if not self.enabled:
+            return
+        key = self.make_key(topic)
+        self.memory.set(key, result)
+        now = datetime.utcnow()
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "topic": normalize_topic(topic),
+                    "result": result,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not store research result: {str(e)}")
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.shared_hits
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "memory": memory,
+            "shared_hits": self.shared_hits,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
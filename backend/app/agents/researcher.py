@@ -1,26 +1,25 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain.agents import AgentExecutor, create_openai_functions_agent
 from decouple import config
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator
 import os
-import json
+from .events import StreamEvent
+from .providers import providers
+from .research_cache import ResearchCache
+from .search_cache import SearchCache
+from ..metrics import timed
+from ..database import research_cache as research_cache_collection
 
-# Get API keys from environment
-TAVILY_API_KEY = config('TAVILY_API_KEY')
-OPENAI_API_KEY = config('OPENAI_API_KEY')
+# Any OpenAI-compatible endpoint, e.g. a local stand-in for benchmarks
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='https://api.openai.com/v1')
+TAVILY_API_URL = config('TAVILY_API_URL', default='https://api.tavily.com')
 
-# Debug logging
-print(f"\nLoaded OpenAI API Key: {OPENAI_API_KEY[:7]}...")
-print(f"Key starts with 'sk-proj-': {OPENAI_API_KEY.startswith('sk-proj-')}")
-print(f"Key starts with 'sk-': {OPENAI_API_KEY.startswith('sk-')}\n")
+# Returned by research_topic when the research agent fails
+RESEARCH_ERROR = "Error occurred during research."
 
-# Set Tavily API key in environment
-os.environ["TAVILY_API_KEY"] = TAVILY_API_KEY
+# Finished research by topic, shared by research_topic and research_topic_stream
+research_cache = ResearchCache(research_cache_collection)
 
-# Initialize the search tool
-search_tool = TavilySearchResults(tavily_api_key=TAVILY_API_KEY)
+# Repeated and concurrent identical searches are answered from one Tavily call
+search_cache = SearchCache()
 
 # List of available tools for the prompt
 tools_description = """
@@ -28,9 +27,7 @@ Available tools:
 - TavilySearchResults: A search tool that provides comprehensive web search results. Use this to gather information about topics.
 """
 
-# Create the prompt template
-researcher_prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are an expert researcher tasked with gathering comprehensive information on given topics.
+RESEARCHER_SYSTEM_PROMPT = """You are an expert researcher tasked with gathering comprehensive information on given topics.
     Your goal is to provide detailed, factual information limited to 500 words.
     Focus on key points, recent developments, and verified facts.
     Structure your response clearly with main points and supporting details.
@@ -38,102 +35,88 @@ researcher_prompt = ChatPromptTemplate.from_messages([
     
     {tools}
     
-    Remember to provide accurate and up-to-date information."""),
-    ("user", "{input}"),
-    ("assistant", "{agent_scratchpad}")
-])
+    Remember to provide accurate and up-to-date information."""
 
-# Initialize the LLM with streaming
-researcher_llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.3,
-    api_key=OPENAI_API_KEY,
-    streaming=True
-)
+@providers.register("search_tool")
+def _search_tool():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langchain_community.utilities import tavily_search
+    from .search_tool import CachedSearchTool
 
-# Create the agent
-researcher_agent = create_openai_functions_agent(
-    llm=researcher_llm,
-    prompt=researcher_prompt,
-    tools=[search_tool]
-)
+    tavily_api_key = config('TAVILY_API_KEY')
+    os.environ["TAVILY_API_KEY"] = tavily_api_key
+    # The Tavily wrapper reads its endpoint from this module constant on every call
+    tavily_search.TAVILY_API_URL = TAVILY_API_URL
+    return CachedSearchTool(TavilySearchResults(tavily_api_key=tavily_api_key), cache=search_cache)
 
-# Create the agent executor
-researcher_executor = AgentExecutor(
-    agent=researcher_agent,
-    tools=[search_tool],
-    verbose=True,
-    handle_parsing_errors=True,
-    return_intermediate_steps=True
-)
+@providers.register("researcher_executor")
+def _researcher_executor():
+    from langchain.agents import AgentExecutor, create_openai_functions_agent
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_openai import ChatOpenAI
+    from .token_usage import TokenUsage
 
-def chunk_text(text: str, max_length: int = 3800) -> List[str]:
-    """Split text into chunks of maximum length while preserving sentence boundaries."""
-    # Split into sentences and trim whitespace
-    sentences = [s.strip() for s in text.split('.')]
-    sentences = [s + '.' for s in sentences if s]
-    
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for sentence in sentences:
-        sentence_length = len(sentence)
-        if current_length + sentence_length > max_length:
-            if current_chunk:  # If we have accumulated sentences, join them and add to chunks
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [sentence]
-                current_length = sentence_length
-            else:  # If a single sentence is too long, split it
-                if sentence_length > max_length:
-                    words = sentence.split()
-                    temp_chunk = []
-                    temp_length = 0
-                    for word in words:
-                        if temp_length + len(word) + 1 > max_length:
-                            chunks.append(' '.join(temp_chunk))
-                            temp_chunk = [word]
-                            temp_length = len(word)
-                        else:
-                            temp_chunk.append(word)
-                            temp_length += len(word) + 1
-                    if temp_chunk:
-                        chunks.append(' '.join(temp_chunk))
-                else:
-                    chunks.append(sentence)
-        else:
-            current_chunk.append(sentence)
-            current_length += sentence_length
-    
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    return chunks
+    researcher_prompt = ChatPromptTemplate.from_messages([
+        ("system", RESEARCHER_SYSTEM_PROMPT),
+        ("user", "{input}"),
+        ("assistant", "{agent_scratchpad}")
+    ])
+    researcher_llm = ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.3,
+        api_key=config('OPENAI_API_KEY'),
+        base_url=OPENAI_BASE_URL,
+        streaming=True,
+        stream_usage=True,
+        callbacks=[TokenUsage("researcher")]
+    )
+    search_tool = providers.get("search_tool")
+    researcher_agent = create_openai_functions_agent(
+        llm=researcher_llm,
+        prompt=researcher_prompt,
+        tools=[search_tool]
+    )
+    return AgentExecutor(
+        agent=researcher_agent,
+        tools=[search_tool],
+        verbose=True,
+        handle_parsing_errors=True,
+        return_intermediate_steps=True
+    )
 
-async def research_topic_stream(topic: str) -> AsyncGenerator[str, None]:
+async def research_topic_stream(topic: str) -> AsyncGenerator[StreamEvent, None]:
     """
     Research a topic and stream the results as they are generated.
+    A cached result is replayed as a single final event.
     """
     try:
-        async for chunk in researcher_executor.astream(
-            {
-                "input": f"Research this topic thoroughly: {topic}",
-                "tools": tools_description
-            }
-        ):
-            if isinstance(chunk, dict):
-                # Stream intermediate steps for transparency
-                if "intermediate_steps" in chunk:
-                    for step in chunk["intermediate_steps"]:
-                        yield json.dumps({"type": "intermediate", "content": str(step)}) + "\n"
-                
-                # Stream the final output
-                if "output" in chunk:
-                    yield json.dumps({"type": "final", "content": chunk["output"]}) + "\n"
-            else:
-                yield json.dumps({"type": "chunk", "content": str(chunk)}) + "\n"
+        cached = await research_cache.get(topic)
+        if cached is not None:
+            yield StreamEvent("final", cached)
+            return
+
+        executor = await providers.aget("researcher_executor")
+        with timed("research"):
+            async for chunk in executor.astream(
+                {
+                    "input": f"Research this topic thoroughly: {topic}",
+                    "tools": tools_description
+                }
+            ):
+                if isinstance(chunk, dict):
+                    # Stream intermediate steps for transparency
+                    if "intermediate_steps" in chunk:
+                        for step in chunk["intermediate_steps"]:
+                            yield StreamEvent("intermediate", str(step))
+                    
+                    # Stream the final output
+                    if "output" in chunk:
+                        await research_cache.set(topic, chunk["output"])
+                        yield StreamEvent("final", chunk["output"])
+                else:
+                    yield StreamEvent("chunk", str(chunk))
     except Exception as e:
-        yield json.dumps({"type": "error", "content": str(e)}) + "\n"
+        yield StreamEvent("error", str(e))
 
 async def research_topic(topic: str) -> str:
     """
@@ -141,13 +124,20 @@ async def research_topic(topic: str) -> str:
     Kept for compatibility with existing code.
     """
     try:
-        result = await researcher_executor.ainvoke(
-            {
-                "input": f"Research this topic thoroughly: {topic}",
-                "tools": tools_description
-            }
-        )
+        cached = await research_cache.get(topic)
+        if cached is not None:
+            return cached
+
+        executor = await providers.aget("researcher_executor")
+        with timed("research"):
+            result = await executor.ainvoke(
+                {
+                    "input": f"Research this topic thoroughly: {topic}",
+                    "tools": tools_description
+                }
+            )
+        await research_cache.set(topic, result["output"])
         return result["output"]
     except Exception as e:
         print(f"Error in research: {str(e)}")
-        return "Error occurred during research." 
\ No newline at end of file
+        return RESEARCH_ERROR 
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from decouple import config
+
+from ..cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long search results are reused; 0 disables caching (in-flight searches are still shared)
+SEARCH_CACHE_TTL_SECONDS = config('SEARCH_CACHE_TTL_SECONDS', default=3600, cast=int)
+SEARCH_CACHE_MAX_ENTRIES = config('SEARCH_CACHE_MAX_ENTRIES', default=1024, cast=int)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """Queries differing only in case, spacing, quotes or end punctuation hit the same entry."""
+    return _WHITESPACE.sub(" ", query).strip().strip("\"'").rstrip(".?!").strip().lower()
+
+
+class SearchCache:
+    """Memoizes search results and shares identical in-flight searches.
+
+    Only list results are cached: the Tavily tool reports failures as a
+    string instead of raising, and those must not be replayed.
+    """
+
+    def __init__(self, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.results = TTLCache(max_entries, ttl_seconds)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    async def get_or_search(self, query: str, search: Callable[[str], Awaitable[Any]]) -> Any:
+        key = normalize_query(query)
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._search(key, query, search))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # One caller giving up must not cancel the search for the others
+        return await asyncio.shield(task)
+
+    def get_or_search_sync(self, query: str, search: Callable[[str], Any]) -> Any:
+        key = normalize_query(query)
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        result = search(query)
+        self._record(key, result, time.perf_counter() - start)
+        return result
+
+    async def _search(self, key: str, query: str, search: Callable[[str], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        result = await search(query)
+        self._record(key, result, time.perf_counter() - start)
+        return result
+
+    def _record(self, key: str, result: Any, elapsed: float):
+        self.searches += 1
+        self.search_seconds += elapsed
+        if isinstance(result, list):
+            self.results.set(key, result)
+        else:
+            logger.warning(f"Not caching failed search for '{key}': {result}")
+
+    def stats(self) -> Dict:
+        results = self.results.stats()
+        lookups = results["hits"] + results["misses"]
+        saved = results["hits"] + self.coalesced
+        avg_search = self.search_seconds / self.searches if self.searches else 0.0
+        return {
+            **results,
+            "coalesced": self.coalesced,
+            "searches": self.searches,
+            "avg_search_seconds": round(avg_search, 3),
+            # Estimated from the average latency of the searches actually run
+            "saved_seconds": round(saved * avg_search, 3),
+            "hit_rate": saved / lookups if lookups else 0.0
+        }
+
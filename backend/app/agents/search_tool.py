@@ -0,0 +1,33 @@
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+
+from .search_cache import SearchCache
+
+
+class CachedSearchTool(BaseTool):
+    """Drop-in wrapper around a search tool that answers through a SearchCache.
+
+    It takes the wrapped tool's name, description and argument schema, so
+    the function definition the agent sees (and therefore its prompt) is
+    unchanged.
+    """
+
+    tool: BaseTool
+    cache: Any
+
+    def __init__(self, tool: BaseTool, cache: Optional[SearchCache] = None, **kwargs):
+        super().__init__(
+            tool=tool,
+            cache=cache or SearchCache(),
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            **kwargs
+        )
+
+    def _run(self, query: str, run_manager=None, **kwargs) -> Any:
+        return self.cache.get_or_search_sync(query, lambda q: self.tool.invoke({"query": q}))
+
+    async def _arun(self, query: str, run_manager=None, **kwargs) -> Any:
+        return await self.cache.get_or_search(query, lambda q: self.tool.ainvoke({"query": q}))
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_DIR = config('TTS_CACHE_DIR', default='tts_cache')
+# Byte budget for cached segments; 0 disables the cache
+TTS_CACHE_MAX_BYTES = config('TTS_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+
+
+def _link_or_copy(src: str, dest: str):
+    """Hard-link src to dest, falling back to a copy across filesystems."""
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+class SegmentCache:
+    """Content-addressed on-disk cache of rendered TTS segments.
+
+    Entries are keyed by a hash of everything that affects the rendered audio
+    and evicted least-recently-used once the byte budget is exceeded. Files are
+    never modified in place, so hard links into job directories stay valid.
+    The index lives on the event loop; linking, copying and removing files
+    runs in the default thread pool.
+    """
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._bytes = 0
+        self._storing = set()  # keys being written by store()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, speed: float, response_format: str) -> str:
+        material = json.dumps([text, voice, model, float(speed), response_format], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _load(self):
+        """Rebuild the LRU index from disk, using mtime as last access."""
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_mtime, name, stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._remove(self._evict())
+        logger.info(f"TTS segment cache loaded: {len(self._entries)} entries, {self._bytes} bytes")
+
+    async def fetch(self, key: str, dest: str) -> bool:
+        """Place a cached segment at dest. Returns False on a miss."""
+        if not self.enabled:
+            return False
+        if key in self._entries:
+            try:
+                await asyncio.to_thread(self._place, self._path(key), dest)
+            except FileNotFoundError:
+                # Removed behind our back (e.g. by another process)
+                if key in self._entries:
+                    self._bytes -= self._entries.pop(key)
+            else:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+        self.misses += 1
+        return False
+
+    async def store(self, key: str, src: str):
+        """Add a freshly rendered segment to the cache."""
+        if not self.enabled or key in self._entries or key in self._storing:
+            return
+        self._storing.add(key)
+        try:
+            size = await asyncio.to_thread(self._write, src, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not cache TTS segment {key}: {str(e)}")
+            return
+        finally:
+            self._storing.discard(key)
+        if size is None:
+            return
+        self._entries[key] = size
+        self._bytes += size
+        evicted = self._evict()
+        if evicted:
+            await asyncio.to_thread(self._remove, evicted)
+
+    @staticmethod
+    def _place(path: str, dest: str):
+        _link_or_copy(path, dest)
+        # The access time orders entries when the index is rebuilt
+        os.utime(path)
+
+    def _write(self, src: str, path: str) -> Optional[int]:
+        """Copy src into the cache at path; returns its size, or None if it is too large to cache."""
+        size = os.path.getsize(src)
+        if size > self.max_bytes:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            _link_or_copy(src, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+    def _evict(self) -> List[str]:
+        """Drop least-recently-used entries over the budget; returns the paths to remove."""
+        evicted = []
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            evicted.append(self._path(key))
+        return evicted
+
+    @staticmethod
+    def _remove(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
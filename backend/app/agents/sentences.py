@@ -0,0 +1,138 @@
+"""Sentence segmentation and length-limited chunking of text for TTS.
+
+Sentences end at ".", "!", "?" or "…" (optionally followed by closing quotes
+or brackets) before whitespace, and at blank lines. A period is not an end
+when it belongs to a known abbreviation ("Dr.", "e.g."), an initial ("J.")
+or a dotted acronym ("U.S."), or when the next word starts in lower case.
+Decimals, versions and URLs never split, since no whitespace follows the dot.
+
+The text is scanned once, and either a string or an iterable of string
+pieces (e.g. a file read in blocks) can be passed; only the unfinished
+sentence is kept in memory between pieces.
+"""
+import re
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Union
+
+# Lower-cased, without the final period
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "rev", "gen", "col", "lt", "sgt", "capt", "gov", "sen",
+    "rep", "pres", "vs", "etc", "e.g", "i.e", "cf", "al", "approx", "inc", "ltd", "co", "corp", "dept", "est",
+    "fig", "figs", "no", "nos", "vol", "vols", "pp", "ch", "sec", "ed", "eds", "jan", "feb", "mar", "apr", "jun",
+    "jul", "aug", "sep", "sept", "oct", "nov", "dec", "mon", "tue", "wed", "thu", "fri", "sat", "sun",
+})
+
+# A run of terminators and closers followed by whitespace, or a blank line
+_CANDIDATE = re.compile(r'([.!?…]+)["\'”’)\]]*(?=\s)|\n[ \t]*\n')
+_NON_SPACE = re.compile(r'\S')
+_OPENERS = "\"'“‘(["
+
+TextSource = Union[str, Iterable[str]]
+
+
+def _is_boundary(text: str, match: re.Match, next_char: Optional[str]) -> bool:
+    terminators = match.group(1)
+    if terminators is None:  # blank line
+        return True
+    if next_char is not None and next_char.islower():
+        return False
+    if terminators != ".":
+        return True
+    word_start = max(text.rfind(" ", 0, match.start()), text.rfind("\n", 0, match.start())) + 1
+    word = text[word_start:match.start()].lstrip(_OPENERS)
+    if word.lower() in ABBREVIATIONS:
+        return False
+    # Initials ("J. Smith") and dotted acronyms ("U.S.", "a.m.")
+    parts = word.split(".")
+    return not all(len(part) == 1 and part.isalpha() for part in parts)
+
+
+def iter_sentences(source: TextSource, max_length: Optional[int] = None) -> Iterator[str]:
+    """Yield the sentences of source, stripped, in order.
+
+    With max_length, a sentence that grows past it without ending is cut at
+    its last space (or hard, if it has none), which bounds the memory used
+    on text without punctuation.
+    """
+    pieces = [source] if isinstance(source, str) else source
+    buffer = ""
+    start = 0  # start of the current sentence
+    scan = 0  # where the search for the next end resumes
+    for piece in chain(pieces, [None]):
+        final = piece is None
+        if not final:
+            buffer += piece
+        while True:
+            match = _CANDIDATE.search(buffer, scan)
+            if match is None:
+                break
+            following = _NON_SPACE.search(buffer, match.end())
+            if following is None and not final:
+                # Whether this ends a sentence depends on text not read yet
+                break
+            if _is_boundary(buffer, match, following.group() if following else None):
+                sentence = buffer[start:match.end()].strip()
+                if sentence:
+                    yield sentence
+                start = following.start() if following else len(buffer)
+            scan = match.end()
+        while max_length and len(buffer) - start > max_length and not final:
+            cut = buffer.rfind(" ", start + 1, start + max_length + 1)
+            cut = cut if cut > start else start + max_length
+            sentence = buffer[start:cut].strip()
+            if sentence:
+                yield sentence
+            start = cut
+            scan = max(scan, start)
+        buffer = buffer[start:]
+        scan -= start
+        start = 0
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+
+def _wrap(sentence: str, max_length: int) -> Iterator[str]:
+    """Split an over-long sentence at spaces, and words longer than max_length anywhere."""
+    if len(sentence) <= max_length:
+        yield sentence
+        return
+    line = ""
+    for word in sentence.split():
+        while len(word) > max_length:
+            if line:
+                yield line
+                line = ""
+            yield word[:max_length]
+            word = word[max_length:]
+        if line and len(line) + 1 + len(word) > max_length:
+            yield line
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        yield line
+
+
+def iter_chunks(source: TextSource, max_length: int) -> Iterator[str]:
+    """Yield chunks of at most max_length characters made of whole sentences.
+
+    Sentences are packed greedily and joined with single spaces; only a
+    sentence longer than max_length on its own is split inside.
+    """
+    current: List[str] = []
+    length = 0
+    for sentence in iter_sentences(source, max_length):
+        for part in _wrap(sentence, max_length):
+            if current and length + 1 + len(part) > max_length:
+                yield " ".join(current)
+                current, length = [], 0
+            length += len(part) + (1 if current else 0)
+            current.append(part)
+    if current:
+        yield " ".join(current)
+
+
+def chunk_text(text: TextSource, max_length: int = 3800) -> List[str]:
+    """Split text into chunks of maximum length while preserving sentence boundaries."""
+    return list(iter_chunks(text, max_length))
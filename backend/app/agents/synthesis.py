@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+from decouple import config
+
+from ..metrics import STAGE_ERRORS, timed
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of TTS requests in flight at once (shared by all podcasts)
+TTS_CONCURRENCY = config('TTS_CONCURRENCY', default=6, cast=int)
+TTS_MAX_CONNECTIONS = config('TTS_MAX_CONNECTIONS', default=20, cast=int)
+TTS_TIMEOUT_SECONDS = config('TTS_TIMEOUT_SECONDS', default=120.0, cast=float)
+# Longest input the TTS provider accepts in one request (4096 for OpenAI)
+TTS_MAX_INPUT_CHARS = config('TTS_MAX_INPUT_CHARS', default=4096, cast=int)
+
+
+class SynthesisEngine:
+    """Async TTS client with a pooled HTTP connection and a concurrency limit.
+
+    A single engine is shared by every podcast rendered in the process, so the
+    limit bounds the total number of requests sent to the TTS provider.
+    """
+
+    def __init__(
+        self,
+        tts_url: str,
+        api_key: str,
+        concurrency: int = TTS_CONCURRENCY,
+        max_connections: int = TTS_MAX_CONNECTIONS,
+        timeout: float = TTS_TIMEOUT_SECONDS
+    ):
+        self.tts_url = tts_url
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self.concurrency = max(1, concurrency)
+        self.max_connections = max(self.concurrency, max_connections)
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool lives on the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.concurrency
+                )
+            )
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def synthesize(self, payload: Dict, filename: str) -> bool:
+        """Render one TTS payload into filename. Returns False on any failure."""
+        async with self._get_semaphore():
+            try:
+                with timed("tts_request"):
+                    response = await self._get_client().post(self.tts_url, json=payload)
+            except httpx.HTTPError as e:
+                logger.error(f"TTS request failed for {os.path.basename(filename)}: {str(e)}")
+                return False
+
+        if response.status_code != 200:
+            STAGE_ERRORS.labels("tts_request").inc()
+            logger.error(f"TTS API error response: {response.status_code} - {response.text}")
+            return False
+
+        with open(filename, "wb") as f:
+            f.write(response.content)
+        return True
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
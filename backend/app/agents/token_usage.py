@@ -0,0 +1,21 @@
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..metrics import LLM_TOKENS
+
+
+class TokenUsage(BaseCallbackHandler):
+    """Counts prompt and completion tokens reported by a chat model.
+
+    Streaming models only report usage when created with stream_usage=True.
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(self.agent, "prompt").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(self.agent, "completion").inc(usage.get("output_tokens", 0))
@@ -0,0 +1,69 @@
+import os
+from datetime import datetime
+from typing import Any, Dict
+
+from decouple import config
+
+# Checkpoints of abandoned jobs are dropped after this long (TTL index in indexes.py)
+CHECKPOINT_TTL_SECONDS = config('CHECKPOINT_TTL_SECONDS', default=7 * 24 * 3600, cast=int)
+
+
+class Checkpoint:
+    """Saved stage results of one podcast pipeline run.
+
+    Stages are stored under dotted names (e.g. "research", "debate.skeptic_1")
+    in a single Mongo document, so a retried run can skip everything that
+    already succeeded.
+    """
+
+    def __init__(self, collection, key: str, stages: Dict[str, Any]):
+        self.collection = collection
+        self.key = key
+        self.stages = stages
+
+    def get(self, stage: str, default: Any = None) -> Any:
+        value = self.stages
+        for part in stage.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        return value
+
+    async def save(self, stage: str, value: Any):
+        await self.collection.update_one(
+            {"_id": self.key},
+            {"$set": {f"stages.{stage}": value, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        parts = stage.split(".")
+        target = self.stages
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+
+    def has_segment(self, index: int, digest: str, path: str) -> bool:
+        """True if segment index was rendered from the same content and is still on disk."""
+        segment = self.get(f"segments.{index}")
+        return (
+            segment is not None
+            and segment["hash"] == digest
+            and segment["path"] == path
+            and os.path.exists(path)
+            and os.path.getsize(path) > 0
+        )
+
+    async def save_segment(self, index: int, digest: str, path: str):
+        await self.save(f"segments.{index}", {"hash": digest, "path": path})
+
+    async def clear(self):
+        await self.collection.delete_one({"_id": self.key})
+        self.stages = {}
+
+
+class CheckpointStore:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def load(self, key: str) -> Checkpoint:
+        doc = await self.collection.find_one({"_id": key})
+        return Checkpoint(self.collection, key, doc.get("stages", {}) if doc else {})
@@ -1,13 +1,163 @@
+import threading
+import time
+from typing import Dict
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from decouple import config
 
+from .metrics import CommandTimer
+
 MONGODB_URL = config('MONGODB_URL')
-client = AsyncIOMotorClient(MONGODB_URL)
+
+# Connection pool and timeouts; one client (and so one pool per server) is
+# shared by the whole process
+MONGO_MAX_POOL_SIZE = config('MONGO_MAX_POOL_SIZE', default=100, cast=int)
+MONGO_MIN_POOL_SIZE = config('MONGO_MIN_POOL_SIZE', default=0, cast=int)
+MONGO_MAX_IDLE_TIME_MS = config('MONGO_MAX_IDLE_TIME_MS', default=300000, cast=int)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = config('MONGO_WAIT_QUEUE_TIMEOUT_MS', default=10000, cast=int)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = config('MONGO_SERVER_SELECTION_TIMEOUT_MS', default=5000, cast=int)
+MONGO_CONNECT_TIMEOUT_MS = config('MONGO_CONNECT_TIMEOUT_MS', default=10000, cast=int)
+MONGO_SOCKET_TIMEOUT_MS = config('MONGO_SOCKET_TIMEOUT_MS', default=30000, cast=int)
+# Comma-separated wire compressors, e.g. "zstd,snappy,zlib" (zstd and snappy need extra packages)
+MONGO_COMPRESSORS = config('MONGO_COMPRESSORS', default='')
+# Write concern "w" (a number or "majority"); empty keeps the server default
+MONGO_WRITE_CONCERN = config('MONGO_WRITE_CONCERN', default='')
+MONGO_JOURNAL = config('MONGO_JOURNAL', default=None, cast=lambda value: None if value is None else value.lower() in ('1', 'true', 'yes'))
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters collected from driver (CMAP) events.
+
+    The driver emits these from whichever thread runs the operation, and the
+    check-out started/finished events for one operation come from the same
+    thread, which is how wait time is measured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _checkout_finished(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._checkout_finished()
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_check_out_failed(self, event):
+        self._checkout_finished()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "open_connections": self.open,
+                "checked_out": self.checked_out,
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3)
+            }
+
+
+pool_stats = PoolStats()
+
+
+def client_options() -> Dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "appname": "podcraft",
+        "event_listeners": [pool_stats, CommandTimer()]
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    if MONGO_WRITE_CONCERN:
+        options["w"] = int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN
+    if MONGO_JOURNAL is not None:
+        options["journal"] = MONGO_JOURNAL
+    return options
+
+
+def create_client(url: str = MONGODB_URL) -> AsyncIOMotorClient:
+    """Build a Motor client with the configured pool, timeouts and write concern.
+
+    The app uses the single `client` below; this is for tools that need
+    their own, e.g. against another cluster.
+
+    A "mongomock://" URL gives an in-memory database private to the process
+    (requires mongomock-motor). It is meant for benchmarks and local runs:
+    pool settings and listeners do not apply, and a few operators are missing.
+    """
+    if url.startswith("mongomock://"):
+        from mongomock_motor import AsyncMongoMockClient
+        return AsyncMongoMockClient()
+    return AsyncIOMotorClient(url, **client_options())
+
+
+client = create_client()
 db = client.podcraft
 
 # Collections
 users = db.users
 podcasts = db.podcasts
 agents = db.agents  # New collection for storing agent configurations
-workflows = db.workflows  # Collection for storing workflow configurations 
-workflows = db.workflows  # Collection for storing workflow configurations 
\ No newline at end of file
+workflows = db.workflows  # Collection for storing workflow configurations
+jobs = db.jobs  # Background podcast generation jobs
+checkpoints = db.checkpoints  # Stage results of podcast jobs, for resuming
+research_cache = db.research_cache  # Cached research results by topic
+streams = db.streams  # Streamed generations, for reconnecting clients
+stream_events = db.stream_events  # Events of streamed generations, by stream and sequence number
@@ -0,0 +1,275 @@
+"""Delivery of podcast audio: byte ranges, strong ETags and low-bitrate renditions.
+
+Files under temp_audio are written once and never change (a re-render goes
+to a new podcast directory), so they are served with a long-lived, immutable
+Cache-Control and a strong ETag taken from their content. Clients and CDNs
+revalidate with If-None-Match, and players seek with Range requests. One
+range is served as 206. For several ranges, or an If-Range that no longer
+matches, the whole file is sent. HLS playlists change while a podcast
+renders and are only cached with revalidation.
+
+Renditions are smaller encodings of a podcast built on demand: the first
+request for one starts an ffmpeg encode in the background and later ones
+get the file, which sits next to the original (final_podcast.low.opus) and
+goes away with the podcast directory.
+"""
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from decouple import config
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from .metrics import AUDIO_EGRESS_BYTES, timed
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CACHE_CONTROL = config('AUDIO_CACHE_CONTROL', default='public, max-age=31536000, immutable')
+# Content digests kept for ETags, keyed by path, size and modification time
+AUDIO_ETAG_CACHE_ENTRIES = config('AUDIO_ETAG_CACHE_ENTRIES', default=1024, cast=int)
+AUDIO_CHUNK_BYTES = config('AUDIO_CHUNK_BYTES', default=256 * 1024, cast=int)
+# Rendition encodes run by this process at the same time
+RENDITION_MAX_CONCURRENCY = config('RENDITION_MAX_CONCURRENCY', default=2, cast=int)
+
+# Files that change while a podcast renders
+_MUTABLE_SUFFIXES = (".m3u8",)
+_RANGE = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+mimetypes.add_type("audio/mpeg", ".mp3")
+mimetypes.add_type("audio/ogg", ".opus")
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("text/vtt", ".vtt")
+mimetypes.add_type("application/x-subrip", ".srt")
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    extension: str
+    ffmpeg_args: Tuple[str, ...]
+
+
+# Speech holds up well as mono Opus at 32 kbps, about a quarter of the MP3
+RENDITIONS: Dict[str, Rendition] = {
+    "low": Rendition("low", ".opus", (
+        "-vn", "-ac", "1", "-c:a", "libopus", "-b:a", config('RENDITION_LOW_BITRATE', default='32k'),
+        "-application", "voip"
+    )),
+}
+
+
+def rendition_of(path: str) -> str:
+    """Name of the rendition a file is, or "original"."""
+    for rendition in RENDITIONS.values():
+        if path.endswith(f".{rendition.name}{rendition.extension}"):
+            return rendition.name
+    return "original"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(first, last) byte of a single-range Range header, or None to send the whole file.
+
+    Raises ValueError if the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    ranges = header[len("bytes="):].split(",")
+    if len(ranges) != 1:
+        # Multipart responses are not worth it for audio; 200 is allowed
+        return None
+    match = _RANGE.match(ranges[0])
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # The last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or last < first:
+        raise ValueError("Range outside the file")
+    return first, last
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ETagCache:
+    """Strong ETags from file content, hashed once per version of a file."""
+
+    def __init__(self, capacity: int = AUDIO_ETAG_CACHE_ENTRIES):
+        self.capacity = capacity
+        self.entries: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+    async def get(self, path: str, stat: os.stat_result) -> str:
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        etag = self.entries.get(key)
+        if etag is None:
+            with timed("etag"):
+                etag = f'"{await asyncio.to_thread(self._digest, path)}"'
+            self.entries[key] = etag
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return etag
+
+    @staticmethod
+    def _digest(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()[:32]
+
+
+def _read_range(path: str, first: int, last: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = f.read(min(AUDIO_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class AudioDelivery:
+    """Serves files under a directory and builds their renditions."""
+
+    def __init__(self, directory: str, max_concurrency: int = RENDITION_MAX_CONCURRENCY):
+        self.directory = os.path.abspath(directory)
+        self.etags = ETagCache()
+        self.builds: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def resolve(self, *parts: str) -> Optional[str]:
+        """Absolute path of a file under the directory, or None if it is outside or missing."""
+        path = os.path.realpath(os.path.join(self.directory, *parts))
+        if os.path.commonpath([path, self.directory]) != self.directory or not os.path.isfile(path):
+            return None
+        return path
+
+    async def serve(self, request: Request, path: str) -> Response:
+        stat = await asyncio.to_thread(os.stat, path)
+        etag = await self.etags.get(path, stat)
+        mutable = path.endswith(_MUTABLE_SUFFIXES)
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "no-cache" if mutable else AUDIO_CACHE_CONTROL
+        }
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag, weak=True):
+            return Response(status_code=304, headers=headers)
+
+        size = stat.st_size
+        try:
+            span = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if_range = request.headers.get("if-range")
+        if span and if_range and not _etag_matches(if_range, etag, weak=False):
+            # The client's partial copy is of another version
+            span = None
+
+        first, last = span or (0, size - 1)
+        length = max(last - first + 1, 0)
+        headers["Content-Length"] = str(length)
+        status_code = 200
+        if span:
+            status_code = 206
+            headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        if request.method == "HEAD":
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+        AUDIO_EGRESS_BYTES.labels(rendition_of(path)).inc(length)
+        # Read in large chunks in the threadpool, never the whole file at once
+        return StreamingResponse(
+            _read_range(path, first, last) if length else iter(()),
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type
+        )
+
+    @staticmethod
+    def rendition_path(source: str, name: str) -> str:
+        base, _ = os.path.splitext(source)
+        return f"{base}.{name}{RENDITIONS[name].extension}"
+
+    def rendition_status(self, source: str, name: str) -> str:
+        """"ready", or "building" after starting the encode if it is not running yet."""
+        target = self.rendition_path(source, name)
+        if os.path.isfile(target):
+            return "ready"
+        if target not in self.builds:
+            task = asyncio.create_task(self._build(source, target, RENDITIONS[name]))
+            self.builds[target] = task
+            task.add_done_callback(lambda _: self.builds.pop(target, None))
+        return "building"
+
+    async def _build(self, source: str, target: str, rendition: Rendition):
+        partial = f"{target}.part"
+        async with self._semaphore:
+            try:
+                with timed("rendition"):
+                    process = await asyncio.create_subprocess_exec(
+                        "ffmpeg", "-v", "error", "-y", "-i", source, *rendition.ffmpeg_args, "-f", "ogg", partial,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                    try:
+                        _, stderr = await process.communicate()
+                    except asyncio.CancelledError:
+                        # Cancelled (e.g. by stop()): leave neither the encode nor its output behind
+                        process.kill()
+                        await process.wait()
+                        if os.path.exists(partial):
+                            os.remove(partial)
+                        raise
+                    if process.returncode != 0:
+                        raise RuntimeError(stderr.decode(errors="replace").strip())
+                # Readers only ever see a complete file
+                os.replace(partial, target)
+                logger.info(
+                    f"Built {rendition.name} rendition of {source}: "
+                    f"{os.path.getsize(target)} bytes from {os.path.getsize(source)}"
+                )
+            except Exception as e:
+                # The next request tries again
+                logger.error(f"Could not build {rendition.name} rendition of {source}: {str(e)}")
+                if os.path.exists(partial):
+                    os.remove(partial)
+
+    def renditions(self, source: str) -> List[str]:
+        """Names of the renditions of source that are ready."""
+        return [name for name in RENDITIONS if os.path.isfile(self.rendition_path(source, name))]
+
+    async def stop(self):
+        for task in list(self.builds.values()):
+            task.cancel()
+        await asyncio.gather(*self.builds.values(), return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {"building": len(self.builds), "etags_cached": len(self.etags.entries)}
@@ -0,0 +1,139 @@
+"""Index declarations for every collection, and a query-plan check.
+
+Indexes are created idempotently at startup. The check mode runs explain()
+on the query behind each hot endpoint and reports any that would scan a
+whole collection:
+
+    python -m app.indexes --check
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .checkpoints import CHECKPOINT_TTL_SECONDS
+from .streams import STREAM_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "podcasts": [
+        # Serves keyset pagination on (created_at, _id) and /podcasts/latest
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_created_id"
+        ),
+    ],
+    "agents": [
+        IndexModel([("user_id", ASCENDING)], name="user"),
+    ],
+    "workflows": [
+        IndexModel([("user_id", ASCENDING)], name="user"),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("available_at", ASCENDING)], name="status_available"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+    ],
+    "checkpoints": [
+        IndexModel([("updated_at", ASCENDING)], name="updated_ttl", expireAfterSeconds=CHECKPOINT_TTL_SECONDS),
+    ],
+    "streams": [
+        IndexModel([("created_at", ASCENDING)], name="created_ttl", expireAfterSeconds=STREAM_TTL_SECONDS),
+    ],
+    "stream_events": [
+        # Replay reads a stream's events in order; the unique key makes re-saving a batch harmless
+        IndexModel([("stream_id", ASCENDING), ("seq", ASCENDING)], name="stream_seq", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_ttl", expireAfterSeconds=STREAM_TTL_SECONDS),
+    ],
+    "research_cache": [
+        # Documents carry their own expiry time
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# (description, collection, filter, sort) of the queries behind hot endpoints;
+# the values only need the right shape for explain()
+_SAMPLE_ID = "000000000000000000000000"
+QUERIES: List[Tuple[str, str, Dict, Optional[List]]] = [
+    ("login / get_current_user", "users", {"username": "sample"}, None),
+    ("GET /podcasts", "podcasts", {"user_id": _SAMPLE_ID}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("GET /podcasts/latest", "podcasts", {"user_id": _SAMPLE_ID}, [("created_at", DESCENDING)]),
+    ("GET /agents", "agents", {"user_id": _SAMPLE_ID}, None),
+    ("GET /api/workflows", "workflows", {"user_id": "sample"}, None),
+    ("stream replay", "stream_events", {"stream_id": "sample", "seq": {"$gte": 1}}, [("seq", ASCENDING)]),
+    ("job claim", "jobs", {
+        "kind": {"$in": ["generate-podcast"]},
+        "$or": [
+            {"status": "queued", "available_at": {"$lte": datetime.utcnow()}},
+            {"status": "running", "lease_expires_at": {"$lt": datetime.utcnow()}, "attempts": {"$lt": 3}}
+        ]
+    }, [("available_at", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db):
+    """Create all declared indexes. Existing ones are left alone.
+
+    A failure (e.g. duplicate usernames blocking the unique index) is logged
+    and does not stop the other collections or the app.
+    """
+    for name, indexes in INDEXES.items():
+        try:
+            await db[name].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error(f"Could not create indexes on {name}: {str(e)}")
+
+
+def _stages(plan: Dict):
+    """Every stage name in an explain() plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+async def check_query_plans(db) -> List[str]:
+    """Return a description of every hot query whose winning plan is a COLLSCAN."""
+    failures = []
+    for description, name, query, sort in QUERIES:
+        cursor = db[name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = set(_stages(explain["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            failures.append(f"{description}: COLLSCAN on {name} for {query}")
+        else:
+            logger.info(f"{description}: {', '.join(sorted(stages))}")
+    return failures
+
+
+async def _main(check: bool) -> int:
+    from .database import db
+
+    await ensure_indexes(db)
+    if not check:
+        return 0
+    failures = await check_query_plans(db)
+    for failure in failures:
+        logger.error(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes and optionally verify query plans.")
+    parser.add_argument("--check", action="store_true", help="fail if any hot query does a collection scan")
+    sys.exit(asyncio.run(_main(parser.parse_args().check)))
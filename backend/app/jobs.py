@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from decouple import config
+from pymongo import ASCENDING, ReturnDocument
+
+from .metrics import JOBS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = config('JOB_WORKERS', default=2, cast=int)
+JOB_LEASE_SECONDS = config('JOB_LEASE_SECONDS', default=60, cast=int)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=3, cast=int)
+JOB_POLL_SECONDS = config('JOB_POLL_SECONDS', default=1.0, cast=float)
+JOB_RETRY_BACKOFF_SECONDS = config('JOB_RETRY_BACKOFF_SECONDS', default=5.0, cast=float)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# A handler receives the job document and a callback to record progress
+# (merged into job["progress"]) and returns the job result.
+ReportProgress = Callable[[Dict], Awaitable[None]]
+JobHandler = Callable[[Dict, ReportProgress], Awaitable[Dict]]
+# Called with the job document and its terminal status once it completed or
+# failed for good, e.g. to drop what was kept for resuming it.
+JobFinished = Callable[[Dict, str], Awaitable[None]]
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job after our lease expired."""
+
+
+class JobQueue:
+    """Mongo-backed job queue with leased claims.
+
+    Every app process runs a few async workers that claim queued jobs (or jobs
+    whose lease expired because their worker died) with an atomic
+    find_one_and_update, so jobs survive restarts and spread across processes.
+    Every claim counts as an attempt; a job whose lease expires on its last
+    attempt is failed rather than claimed again. on_finished runs after a job
+    is recorded as completed or failed for good, never before.
+    """
+
+    def __init__(
+        self,
+        collection,
+        workers: int = JOB_WORKERS,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        on_finished: Optional[JobFinished] = None
+    ):
+        self.collection = collection
+        self.workers = workers
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.on_finished = on_finished
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    async def submit(self, kind: str, payload: Dict, user_id: str) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = datetime.utcnow()
+        result = await self.collection.insert_one({
+            "kind": kind,
+            "payload": payload,
+            "user_id": user_id,
+            "status": "queued",
+            "attempts": 0,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now
+        })
+        if self._wakeup:
+            self._wakeup.set()
+        return str(result.inserted_id)
+
+    async def get(self, job_id: str, user_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+
+    async def retry(self, job_id) -> Optional[Dict]:
+        """Requeue a failed job with a fresh set of attempts."""
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {"_id": job_id, "status": "failed"},
+            {"$set": {
+                "status": "queued",
+                "attempts": 0,
+                "error": None,
+                "available_at": now,
+                "updated_at": now
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if job and self._wakeup:
+            self._wakeup.set()
+        return job
+
+    async def claim(self) -> Optional[Dict]:
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {
+                "kind": {"$in": list(self.handlers)},
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    # A job that keeps killing its worker is not retried forever
+                    {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$lt": self.max_attempts}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_owner": self.worker_id,
+                    "lease_expires_at": now + self.lease,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None:
+            await self.fail_abandoned(now)
+        return job
+
+    async def fail_abandoned(self, now: datetime) -> int:
+        """Fail jobs whose lease expired on their last attempt; returns how many."""
+        abandoned = {
+            "kind": {"$in": list(self.handlers)},
+            "status": "running",
+            "lease_expires_at": {"$lt": now},
+            "attempts": {"$gte": self.max_attempts}
+        }
+        failed = 0
+        # One by one, so each job is finished by the process that failed it
+        async for candidate in self.collection.find(abandoned, {"_id": 1}):
+            job = await self.collection.find_one_and_update(
+                {**abandoned, "_id": candidate["_id"]},
+                {"$set": {
+                    "status": "failed",
+                    "error": f"The worker running the job stopped responding on each of its {self.max_attempts} attempts",
+                    "lease_owner": None,
+                    "updated_at": now
+                }},
+                return_document=ReturnDocument.AFTER
+            )
+            if job:
+                failed += 1
+                await self._finished(job, "failed")
+        if failed:
+            logger.warning(f"Failed {failed} jobs that ran out of attempts after losing their worker")
+        return failed
+
+    async def _finished(self, job: Dict, status: str):
+        if not self.on_finished:
+            return
+        try:
+            await self.on_finished(job, status)
+        except Exception as e:
+            logger.error(f"Error finishing job {job['_id']}: {str(e)}")
+
+    async def _update_own(self, job_id, update: Dict) -> bool:
+        """Apply update only while this worker still holds the lease."""
+        result = await self.collection.update_one(
+            {"_id": job_id, "lease_owner": self.worker_id, "status": "running"},
+            update
+        )
+        return result.matched_count == 1
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            now = datetime.utcnow()
+            if not await self._update_own(job_id, {"$set": {"lease_expires_at": now + self.lease, "updated_at": now}}):
+                raise LeaseLost(str(job_id))
+
+    async def _run(self, job: Dict):
+        job_id = job["_id"]
+
+        async def report(progress: Dict):
+            await self._update_own(job_id, {"$set": {
+                **{f"progress.{key}": value for key, value in progress.items()},
+                "updated_at": datetime.utcnow()
+            }})
+
+        logger.info(f"Worker {self.worker_id} running {job['kind']} job {job_id} (attempt {job['attempts']})")
+        JOBS_IN_FLIGHT.labels(job["kind"]).inc()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        work = asyncio.create_task(self.handlers[job["kind"]](job, report))
+        try:
+            await asyncio.wait([heartbeat, work], return_when=asyncio.FIRST_COMPLETED)
+            if not work.done():
+                # The heartbeat only finishes when the lease is gone
+                work.cancel()
+                logger.warning(f"Lost lease on job {job_id}, abandoning it")
+                return
+            result = work.result()
+            if await self._update_own(job_id, {"$set": {
+                "status": "completed",
+                "result": result,
+                "error": None,
+                "lease_owner": None,
+                "finished_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }}):
+                logger.info(f"Job {job_id} completed")
+                await self._finished(job, "completed")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so another worker resumes it
+            work.cancel()
+            await self._update_own(job_id, {
+                "$set": {"status": "queued", "lease_owner": None, "updated_at": datetime.utcnow()},
+                "$inc": {"attempts": -1}
+            })
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed: {str(e)}")
+            retry = job["attempts"] < self.max_attempts
+            backoff = timedelta(seconds=JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1))
+            if await self._update_own(job_id, {"$set": {
+                "status": "queued" if retry else "failed",
+                "error": str(e),
+                "lease_owner": None,
+                "available_at": datetime.utcnow() + backoff,
+                "updated_at": datetime.utcnow()
+            }}) and not retry:
+                await self._finished(job, "failed")
+        finally:
+            heartbeat.cancel()
+            JOBS_IN_FLIGHT.labels(job["kind"]).dec()
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self.claim()
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Bookkeeping failed (e.g. Mongo unreachable); the lease will
+                # expire and another worker picks the job up again
+                logger.error(f"Error running job {job['_id']}: {str(e)}")
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers as {self.worker_id}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def serialize_job(job: Dict) -> Dict:
+    """Public view of a job document."""
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "progress": job.get("progress", {}),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "updated_at": job["updated_at"].isoformat() if job.get("updated_at") else None
+    }
@@ -1,40 +1,51 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, status, Request, Response, Query, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
-from passlib.context import CryptContext
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from decouple import config
 import logging
-from .database import users, podcasts, agents, workflows
+from .database import client, db, users, podcasts, agents, workflows, jobs, checkpoints, streams, stream_events, pool_stats
+from .indexes import ensure_indexes
+from .delivery import RENDITIONS, AudioDelivery
+from .workflow_patch import WorkflowPatch
+from .metrics import caches as metric_caches
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .models import (
     UserCreate, UserLogin, Token, UserUpdate, UserResponse,
-    PodcastRequest, PodcastResponse, AgentCreate, AgentResponse,
-    TextPodcastRequest, TextPodcastResponse,
-    WorkflowCreate, WorkflowResponse, InsightsData, TranscriptEntry
+    PodcastRequest, PodcastResponse, PanelRequest, AgentCreate, AgentResponse,
+    TextPodcastRequest,
+    WorkflowCreate, WorkflowResponse, InsightsData,
+    JobSubmitResponse, JobResponse,
+    WorkflowPatchRequest, WorkflowPatchResponse
 )
-from .agents.researcher import research_topic, research_topic_stream
-from .agents.debaters import generate_debate, generate_debate_stream, chunk_text
+from .agents.audio_fx import agent_effects
+from .agents.researcher import research_topic, research_topic_stream, research_cache, search_cache, RESEARCH_ERROR
+from .agents.debaters import generate_debate_stream
+from .agents.panel import build_panel_blocks, default_schedule, generate_panel_stream, plan_turns
+from .agents.providers import providers
+from .agents.events import StreamEvent
 from .agents.podcast_manager import PodcastManager
+from .jobs import JobQueue, TERMINAL_STATUSES, JOB_POLL_SECONDS, serialize_job
+from .checkpoints import CheckpointStore
+from .streams import StreamManager, StreamStore, parse_last_event_id, sse_frame
+from .cache import TTLCache
+from .passwords import hash_password, verify_password, shutdown_hashing
+import asyncio
+import base64
 import json
 import os
 import shutil
-from typing import List
+from typing import AsyncGenerator, List, Optional
 import time
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, OperationFailure
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Debug environment variables
-openai_key = config('OPENAI_API_KEY')
-logger.info(f"Loaded OpenAI API Key at startup: {openai_key[:7]}...")
-logger.info(f"Key starts with 'sk-proj-': {openai_key.startswith('sk-proj-')}")
-logger.info(f"Key starts with 'sk-': {openai_key.startswith('sk-')}")
-
 app = FastAPI()
 
 # CORS middleware
@@ -53,17 +64,33 @@ os.makedirs("temp_audio", exist_ok=True)
 
 # Make sure the directory paths are absolute
 TEMP_AUDIO_DIR = os.path.abspath("temp_audio")
-print(f"Mounting temp_audio directory: {TEMP_AUDIO_DIR}")
+print(f"Serving temp_audio directory: {TEMP_AUDIO_DIR}")
+
+# Audio files with byte ranges, ETags and cache headers, and their renditions
+audio_delivery = AudioDelivery(TEMP_AUDIO_DIR)
 
-# Mount static directory for audio files
-app.mount("/audio", StaticFiles(directory=TEMP_AUDIO_DIR), name="audio")
+@app.api_route("/audio/{podcast_dir}/{filename}", methods=["GET", "HEAD"])
+async def get_audio_file(podcast_dir: str, filename: str, request: Request):
+    path = audio_delivery.resolve(podcast_dir, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return await audio_delivery.serve(request, path)
+
+def audio_url_for(path: str) -> str:
+    """Public URL of a file inside a podcast directory under temp_audio."""
+    return f"/audio/{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}"
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 SECRET_KEY = config("SECRET_KEY")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(config("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# Authenticated users by username, so polling clients don't hit Mongo per request
+principal_cache = TTLCache(
+    max_entries=config("AUTH_CACHE_MAX_ENTRIES", default=1024, cast=int),
+    ttl_seconds=config("AUTH_CACHE_TTL_SECONDS", default=30, cast=int)
+)
+
 # Helper functions
 def create_access_token(data: dict):
     expires = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -71,40 +98,100 @@ def create_access_token(data: dict):
     token = jwt.encode(data, SECRET_KEY, algorithm="HS256")
     return token
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def authenticate_user(username: str, password: str):
+    """Return the user if the password matches, upgrading an outdated hash."""
+    db_user = await users.find_one({"username": username})
+    if not db_user:
+        return None
+    valid, new_hash = await verify_password(password, db_user["password"])
+    if not valid:
+        return None
+    if new_hash:
+        await users.update_one({"_id": db_user["_id"]}, {"$set": {"password": new_hash}})
+        principal_cache.pop(username)
+        logger.info(f"Upgraded password hash for user: {username}")
+    return db_user
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    logger.info("Authenticating user with token")
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials"
     )
     try:
-        logger.info("Decoding JWT token")
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         username: str = payload.get("sub")
         if username is None:
             logger.error("No username found in token")
             raise credentials_exception
-        logger.info(f"Token decoded successfully for user: {username}")
     except JWTError as e:
         logger.error(f"JWT Error: {str(e)}")
         raise credentials_exception
-        
+
+    # The token is still verified above; the cache only saves the user lookup
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
     user = await users.find_one({"username": username})
     if user is None:
         logger.error(f"No user found for username: {username}")
         raise credentials_exception
-    logger.info(f"User authenticated successfully: {username}")
+    logger.debug(f"User authenticated: {username}")
+    principal_cache.set(username, user)
     return user
 
 # Initialize PodcastManager
 podcast_manager = PodcastManager()
 
+# Cache hit/miss counters are read at scrape time
+metric_caches.register("tts", podcast_manager.segment_cache.stats)
+metric_caches.register("research", research_cache.stats)
+metric_caches.register("search", search_cache.stats)
+metric_caches.register("auth", principal_cache.stats)
+
+# Keep references to podcasts still rendering after their request returned
+background_tasks = set()
+
+# Streamed generations run detached from the request that started them
+stream_manager = StreamManager(StreamStore(streams, stream_events))
+
+# Build the LLM clients and agents in the background after startup, instead
+# of on the first podcast request (or at import, slowing every reload)
+PRELOAD_AGENTS = config("PRELOAD_AGENTS", default=True, cast=bool)
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def preload_agents():
+    if not PRELOAD_AGENTS:
+        return
+
+    async def warm():
+        try:
+            await asyncio.to_thread(providers.warm)
+        except Exception as e:
+            # Left to fail (and be reported) on first use
+            logger.error(f"Could not preload agents: {str(e)}")
+
+    task = asyncio.create_task(warm())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+@app.on_event("shutdown")
+async def close_podcast_manager():
+    # Release pooled TTS connections
+    await podcast_manager.synthesis.aclose()
+    shutdown_hashing()
+
+@app.on_event("shutdown")
+async def stop_streams():
+    await stream_manager.stop()
+
+@app.on_event("shutdown")
+async def stop_renditions():
+    await audio_delivery.stop()
+
 # Routes
 @app.post("/signup")
 async def signup(user: UserCreate):
@@ -114,8 +201,12 @@ async def signup(user: UserCreate):
     
     # Create new user
     user_dict = user.dict()
-    user_dict["password"] = get_password_hash(user.password)
-    await users.insert_one(user_dict)
+    user_dict["password"] = await hash_password(user.password)
+    try:
+        await users.insert_one(user_dict)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup for the same name
+        raise HTTPException(status_code=400, detail="Username already registered")
     
     # Create and return token after signup
     access_token = create_access_token(data={"sub": user.username})
@@ -125,8 +216,8 @@ async def signup(user: UserCreate):
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     logger.info(f"Token request for user: {form_data.username}")
     # Find user
-    db_user = await users.find_one({"username": form_data.username})
-    if not db_user or not verify_password(form_data.password, db_user["password"]):
+    db_user = await authenticate_user(form_data.username, form_data.password)
+    if not db_user:
         logger.error(f"Failed token request for user: {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -143,8 +234,8 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 async def login(request: Request, user: UserLogin):
     logger.info(f"Login attempt for user: {user.username}")
     # Find user
-    db_user = await users.find_one({"username": user.username})
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    db_user = await authenticate_user(user.username, user.password)
+    if not db_user:
         logger.error(f"Failed login attempt for user: {user.username}")
         raise HTTPException(
             status_code=401,
@@ -164,62 +255,36 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
 
 @app.put("/user/update-password")
 async def update_password(user_update: UserUpdate, current_user: dict = Depends(get_current_user)):
-    hashed_password = get_password_hash(user_update.password)
+    hashed_password = await hash_password(user_update.password)
     await users.update_one(
         {"username": current_user["username"]},
         {"$set": {"password": hashed_password}}
     )
+    principal_cache.pop(current_user["username"])
     return {"message": "Password updated successfully"}
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to PodCraft API"}
 
-# New podcast endpoints
-@app.post("/generate-podcast", response_model=PodcastResponse)
-async def generate_podcast(request: Request, podcast_req: PodcastRequest, current_user: dict = Depends(get_current_user)):
-    logger.info(f"Received podcast generation request for topic: {podcast_req.topic}")
-    logger.info(f"Request headers: {dict(request.headers)}")
-    
-    try:
-        # Step 1: Research the topic
-        logger.info("Starting research phase")
-        research_results = await research_topic(podcast_req.topic)
-        logger.info("Research phase completed")
-        
-        # Step 2: Generate debate between believer and skeptic
-        logger.info("Starting debate generation")
-        conversation_blocks = await generate_debate(
-            research=research_results,
-            believer_name=podcast_req.believer_voice_id,
-            skeptic_name=podcast_req.skeptic_voice_id
-        )
-        
-        if not conversation_blocks:
-            logger.error("Failed to generate debate - no conversation blocks returned")
-            raise HTTPException(status_code=500, detail="Failed to generate debate")
-        
-        logger.info("Debate generation completed")
-        
-        # Step 3: Create podcast using TTS and store in MongoDB
-        logger.info("Starting podcast creation with TTS")
-        result = await podcast_manager.create_podcast(
-            topic=podcast_req.topic,
-            research=research_results,
-            conversation_blocks=conversation_blocks,
-            believer_voice_id=podcast_req.believer_voice_id,
-            skeptic_voice_id=podcast_req.skeptic_voice_id
-        )
-        
-        if "error" in result:
-            logger.error(f"Error in podcast creation: {result['error']}")
-            raise HTTPException(status_code=500, detail=result["error"])
-        
-        logger.info(f"Podcast generated successfully with ID: {result.get('podcast_id')}")
-        return result
-    except Exception as e:
-        logger.error(f"Error in podcast generation: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this process."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/stats")
+async def get_stats(current_user: dict = Depends(get_current_user)):
+    """Report cache and connection pool counters for the running process."""
+    return {
+        "tts_cache": podcast_manager.segment_cache.stats(),
+        "research_cache": research_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "auth_cache": principal_cache.stats(),
+        "providers": providers.stats(),
+        "streams": stream_manager.stats(),
+        "audio": audio_delivery.stats(),
+        "mongo_pool": pool_stats.snapshot()
+    }
 
 @app.get("/podcast/{podcast_id}", response_model=PodcastResponse)
 async def get_podcast(podcast_id: str, current_user: dict = Depends(get_current_user)):
@@ -231,151 +296,311 @@ async def get_podcast(podcast_id: str, current_user: dict = Depends(get_current_
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_debate_blocks(skeptic_turns: dict, believer_turns: dict, skeptic_voice_id: str, believer_voice_id: str) -> List[dict]:
+    """Create strictly alternating conversation blocks from debate turns keyed by turn number."""
+    blocks = []
+    
+    # Find the maximum turn number
+    max_turn = max(
+        max(skeptic_turns.keys()) if skeptic_turns else 0,
+        max(believer_turns.keys()) if believer_turns else 0
+    )
+    
+    # Create blocks in strict turn order: Skeptic 1, Believer 1, Skeptic 2, Believer 2, etc.
+    for turn in range(1, max_turn + 1):
+        for role, turns, voice_id in (
+            ("skeptic", skeptic_turns, skeptic_voice_id),
+            ("believer", believer_turns, believer_voice_id)
+        ):
+            if turn in turns and turns[turn].strip():
+                blocks.append({
+                    "name": f"{voice_id}'s Turn {turn}",
+                    "input": turns[turn],
+                    "silence_before": 1,
+                    "voice_id": voice_id,
+                    "emotion": "neutral",
+                    "model": "tts-1",
+                    "speed": 1,
+                    "duration": 0,
+                    "type": role,
+                    "turn": turn
+                })
+    return blocks
+
 @app.post("/generate-podcast/stream")
 async def generate_podcast_stream(request: PodcastRequest, current_user: dict = Depends(get_current_user)):
-    async def generate():
+    async def generate() -> AsyncGenerator[StreamEvent, None]:
         try:
-            # Store complete responses for podcast creation
-            believer_turns = {}  # Store responses by turn number
-            skeptic_turns = {}   # Store responses by turn number
+            # Pieces of each turn's text, by role and turn number
+            turn_pieces = {"believer": {}, "skeptic": {}}
             
             # Stream research results
             logger.info("Starting research phase (streaming)")
             research_results = ""
-            async for chunk in research_topic_stream(request.topic):
-                yield chunk
-                if isinstance(chunk, str) and "final" in chunk:
-                    data = json.loads(chunk)
-                    if data["type"] == "final":
-                        research_results = data["content"]
+            async for event in research_topic_stream(request.topic):
+                yield event
+                if event.type == "final":
+                    research_results = event.content
             
             # Stream debate and track turns properly
             logger.info("Starting debate phase (streaming)")
-            async for chunk in generate_debate_stream(
+            async for event in generate_debate_stream(
                 research=research_results,
                 believer_name=request.believer_voice_id,
                 skeptic_name=request.skeptic_voice_id
             ):
-                yield chunk
-                # Parse the chunk
-                data = json.loads(chunk)
-                
+                yield event
                 # Track responses by turn to maintain proper ordering
-                if data["type"] == "believer" and "turn" in data:
-                    turn = data["turn"]
-                    if turn not in believer_turns:
-                        believer_turns[turn] = ""
-                    believer_turns[turn] += data["content"]
-                elif data["type"] == "skeptic" and "turn" in data:
-                    turn = data["turn"]
-                    if turn not in skeptic_turns:
-                        skeptic_turns[turn] = ""
-                    skeptic_turns[turn] += data["content"]
-            
-            # Create strictly alternating conversation blocks for podcast
-            blocks = []
-            
-            # Find the maximum turn number
-            max_turn = max(
-                max(skeptic_turns.keys()) if skeptic_turns else 0,
-                max(believer_turns.keys()) if believer_turns else 0
-            )
+                if event.type in turn_pieces and event.turn is not None:
+                    turn_pieces[event.type].setdefault(event.turn, []).append(event.content)
             
+            believer_turns = {turn: "".join(pieces) for turn, pieces in turn_pieces["believer"].items()}
+            skeptic_turns = {turn: "".join(pieces) for turn, pieces in turn_pieces["skeptic"].items()}
             logger.info(f"Creating podcast with {len(believer_turns)} believer turns and {len(skeptic_turns)} skeptic turns")
-            logger.info(f"Max turn number: {max_turn}")
-            
-            # Create blocks in strict turn order: Skeptic 1, Believer 1, Skeptic 2, Believer 2, etc.
-            for turn in range(1, max_turn + 1):
-                # First Skeptic's turn
-                if turn in skeptic_turns and skeptic_turns[turn].strip():
-                    blocks.append({
-                        "name": f"{request.skeptic_voice_id}'s Turn {turn}",
-                        "input": skeptic_turns[turn],
-                        "silence_before": 1,
-                        "voice_id": request.skeptic_voice_id,
-                        "emotion": "neutral",
-                        "model": "tts-1",
-                        "speed": 1,
-                        "duration": 0,
-                        "type": "skeptic",
-                        "turn": turn
-                    })
-                
-                # Then Believer's turn
-                if turn in believer_turns and believer_turns[turn].strip():
-                    blocks.append({
-                        "name": f"{request.believer_voice_id}'s Turn {turn}",
-                        "input": believer_turns[turn],
-                        "silence_before": 1,
-                        "voice_id": request.believer_voice_id,
-                        "emotion": "neutral",
-                        "model": "tts-1",
-                        "speed": 1,
-                        "duration": 0,
-                        "type": "believer",
-                        "turn": turn
-                    })
+            blocks = build_debate_blocks(
+                skeptic_turns, believer_turns, request.skeptic_voice_id, request.believer_voice_id
+            )
             
             # Log the conversational structure for debugging
             turn_structure = [f"{block.get('type', 'unknown')}-{block.get('turn', 'unknown')}" for block in blocks]
             logger.info(f"Conversation structure: {turn_structure}")
             
-            # Create podcast using TTS and store in MongoDB
-            logger.info("Starting podcast creation with TTS")
-            result = await podcast_manager.create_podcast(
-                topic=request.topic,
-                research=research_results,
-                conversation_blocks=blocks,
-                believer_voice_id=request.believer_voice_id,
-                skeptic_voice_id=request.skeptic_voice_id,
-                user_id=str(current_user["_id"])
-            )
-            
-            if "error" in result:
-                logger.error(f"Error in podcast creation: {result['error']}")
-                yield json.dumps({"type": "error", "content": result["error"]}) + "\n"
-            else:
-                logger.info(f"Podcast generated successfully with ID: {result.get('podcast_id')}")
-                # Create audio URL from the audio path
-                audio_url = f"/audio/{os.path.basename(os.path.dirname(result['audio_path']))}/final_podcast.mp3"
-                yield json.dumps({
-                    "type": "success",
-                    "content": f"Podcast created successfully! ID: {result.get('podcast_id')}",
-                    "podcast_url": audio_url
-                }) + "\n"
+            async for event in render_podcast_events(
+                request.topic, research_results, blocks, request.believer_voice_id, request.skeptic_voice_id,
+                str(current_user["_id"]), request.progressive
+            ):
+                yield event
                 
         except Exception as e:
             logger.error(f"Error in streaming podcast generation: {str(e)}")
-            yield json.dumps({"type": "error", "content": str(e)}) + "\n"
+            yield StreamEvent("error", str(e))
     
+    # Generation goes on if the client disconnects; it can reconnect below
+    log = await stream_manager.start(str(current_user["_id"]), generate())
+    return sse_response(log.follow(), log.stream_id)
+
+async def render_podcast_events(
+    topic: str,
+    research: str,
+    blocks: List[dict],
+    believer_voice_id: str,
+    skeptic_voice_id: str,
+    user_id: str,
+    progressive: bool
+) -> AsyncGenerator[StreamEvent, None]:
+    """Render and store the podcast of a streamed generation, yielding its segment and result events."""
+    # Create podcast using TTS and store in MongoDB
+    logger.info("Starting podcast creation with TTS")
+    segment_events = asyncio.Queue()
+
+    async def on_segment(event):
+        await segment_events.put(event)
+
+    creation = asyncio.create_task(podcast_manager.create_podcast(
+        topic=topic,
+        research=research,
+        conversation_blocks=blocks,
+        believer_voice_id=believer_voice_id,
+        skeptic_voice_id=skeptic_voice_id,
+        user_id=user_id,
+        on_segment=on_segment if progressive else None
+    ))
+    # Rendering carries on even if the client goes away mid-stream
+    background_tasks.add(creation)
+    creation.add_done_callback(background_tasks.discard)
+    creation.add_done_callback(lambda _: segment_events.put_nowait(None))
+
+    # In progressive mode, announce each segment as soon as it is playable
+    while (event := await segment_events.get()) is not None:
+        yield StreamEvent("audio_segment", data={
+            "index": event["index"],
+            "total": event["total"],
+            "duration": event["duration"],
+            "segment_url": audio_url_for(event["audio_path"]),
+            "playlist_url": audio_url_for(event["playlist_path"])
+        })
+    # Shielded so stopping the stream (e.g. on shutdown) does not cancel the render
+    result = await asyncio.shield(creation)
+
+    if "error" in result:
+        logger.error(f"Error in podcast creation: {result['error']}")
+        yield StreamEvent("error", result["error"])
+    else:
+        logger.info(f"Podcast generated successfully with ID: {result.get('podcast_id')}")
+        # Create audio URL from the audio path
+        audio_url = f"/audio/{os.path.basename(os.path.dirname(result['audio_path']))}/final_podcast.mp3"
+        yield StreamEvent("success", f"Podcast created successfully! ID: {result.get('podcast_id')}", data={
+            "podcast_url": audio_url,
+            "captions_url": audio_url_for(result["captions"]["vtt"]),
+            "chapters": result["chapters"]
+        })
+
+async def load_panel(agent_ids: List[str], user_id: str) -> dict:
+    """The user's agents with the given ids, by id; 404 if any is missing."""
+    if not all(ObjectId.is_valid(agent_id) for agent_id in agent_ids):
+        raise HTTPException(status_code=404, detail="Agent not found")
+    cursor = agents.find({"_id": {"$in": [ObjectId(agent_id) for agent_id in agent_ids]}, "user_id": user_id})
+    found = {str(agent["_id"]): agent async for agent in cursor}
+    missing = [agent_id for agent_id in agent_ids if agent_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Agent not found: {', '.join(missing)}")
+    # In the order given, which is the order panelists are introduced in
+    return {agent_id: found[agent_id] for agent_id in agent_ids}
+
+@app.post("/generate-panel/stream")
+async def generate_panel_podcast_stream(request: PanelRequest, current_user: dict = Depends(get_current_user)):
+    """Stream a panel debate between the user's agents, then render it like /generate-podcast/stream.
+
+    Debate tokens are "panelist" events tagged with the agent's name, id and
+    round; panelists of a round speak concurrently. Reconnect with
+    GET /generate-podcast/stream/{stream_id}.
+    """
+    agent_ids = list(dict.fromkeys(request.agent_ids))
+    if len(agent_ids) < 2:
+        raise HTTPException(status_code=400, detail="A panel needs at least two agents")
+    user_id = str(current_user["_id"])
+    panel = await load_panel(agent_ids, user_id)
+    schedule = request.schedule or default_schedule(agent_ids, request.rounds)
+    try:
+        plan_turns(panel, schedule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def generate() -> AsyncGenerator[StreamEvent, None]:
+        try:
+            logger.info(f"Starting research phase for a panel of {len(panel)} (streaming)")
+            research_results = ""
+            async for event in research_topic_stream(request.topic):
+                yield event
+                if event.type == "final":
+                    research_results = event.content
+
+            logger.info(f"Starting panel debate: {len(schedule)} rounds")
+            turn_pieces = {}
+            async for event in generate_panel_stream(research_results, panel, schedule):
+                yield event
+                if event.type == "panelist":
+                    turn_pieces.setdefault(event.turn, []).append(event.content)
+                elif event.type == "error":
+                    return
+
+            blocks = build_panel_blocks(
+                panel, schedule, {turn: "".join(pieces) for turn, pieces in turn_pieces.items()}
+            )
+            voices = [agent["voice_id"] for agent in panel.values()]
+            async for event in render_podcast_events(
+                request.topic, research_results, blocks, voices[0], voices[1], user_id, request.progressive
+            ):
+                yield event
+
+        except Exception as e:
+            logger.error(f"Error in streaming panel generation: {str(e)}")
+            yield StreamEvent("error", str(e))
+
+    log = await stream_manager.start(user_id, generate())
+    return sse_response(log.follow(), log.stream_id)
+
+def sse_response(entries, stream_id: str) -> StreamingResponse:
+    async def frames():
+        async for batch in entries:
+            yield sse_frame(batch)
+
     return StreamingResponse(
-        generate(),
-        media_type="text/event-stream"
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Stream-Id": stream_id}
     )
 
+@app.get("/generate-podcast/stream/{stream_id}")
+async def resume_podcast_stream(
+    stream_id: str,
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Reconnect to a streamed generation: replay the events after Last-Event-ID, then follow it live."""
+    after = parse_last_event_id(last_event_id_header or last_event_id)
+    entries = await stream_manager.follow(stream_id, str(current_user["_id"]), after)
+    if entries is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return sse_response(entries, stream_id)
+
+# Library view fields; research text, transcript and timing tables are left out
+PODCAST_SUMMARY_PROJECTION = {
+    "topic": 1,
+    "created_at": 1,
+    "duration": 1,
+    "audio_path": 1,
+    "captions": 1,
+    "playlist_path": 1,
+    "believer_voice_id": 1,
+    "skeptic_voice_id": 1,
+    "description": {"$substrCP": [{"$ifNull": ["$research", ""]}, 0, 150]}
+}
+
+def podcast_public(podcast: dict) -> dict:
+    """Prepare a podcast document for the API: string id and public URLs."""
+    podcast["_id"] = str(podcast["_id"])
+    if "audio_path" in podcast:
+        audio_url = f"/audio/{os.path.basename(os.path.dirname(podcast['audio_path']))}/final_podcast.mp3"
+        podcast["audio_url"] = f"http://localhost:8000{audio_url}"
+        # Smaller encodings already built, by name
+        podcast["renditions"] = {
+            name: f"http://localhost:8000{audio_url_for(AudioDelivery.rendition_path(podcast['audio_path'], name))}"
+            for name in audio_delivery.renditions(podcast["audio_path"])
+        }
+    if "captions" in podcast:
+        podcast["captions_url"] = f"http://localhost:8000{audio_url_for(podcast['captions']['vtt'])}"
+    return podcast
+
+def encode_podcast_cursor(podcast: dict) -> str:
+    position = json.dumps([podcast["created_at"].isoformat(), str(podcast["_id"])])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_podcast_cursor(cursor: str) -> dict:
+    """Mongo filter for the podcasts after the cursor position, newest first."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, podcast_id = json.loads(base64.urlsafe_b64decode(padded))
+        created_at, podcast_id = datetime.fromisoformat(created_at), ObjectId(podcast_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": podcast_id}}
+    ]}
+
 @app.get("/podcasts")
-async def list_podcasts(current_user: dict = Depends(get_current_user)):
+async def list_podcasts(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """List the user's podcasts newest first, one page at a time.
+
+    Each entry is a summary; GET /podcasts/{podcast_id} has the full record.
+    When more podcasts follow, the X-Next-Cursor header holds the cursor for
+    the next page.
+    """
+    query = {"user_id": str(current_user["_id"])}
+    if cursor:
+        query.update(decode_podcast_cursor(cursor))
     try:
-        # Query podcasts for the current user
-        cursor = podcasts.find({"user_id": str(current_user["_id"])})
-        podcast_list = []
-        async for podcast in cursor:
-            # Convert MongoDB _id to string and create audio URL
-            podcast["_id"] = str(podcast["_id"])
-            if "audio_path" in podcast:
-                audio_url = f"/audio/{os.path.basename(os.path.dirname(podcast['audio_path']))}/final_podcast.mp3"
-                podcast["audio_url"] = f"http://localhost:8000{audio_url}"
-            podcast_list.append(podcast)
-        return podcast_list
+        # One extra document tells whether another page follows
+        page = await podcasts.find(query, PODCAST_SUMMARY_PROJECTION).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if len(page) > limit:
+        page = page[:limit]
+        response.headers["X-Next-Cursor"] = encode_podcast_cursor(page[-1])
+    return [podcast_public(podcast) for podcast in page]
 
 @app.get("/podcasts/latest")
 async def get_latest_podcast(current_user: dict = Depends(get_current_user)):
     try:
-        # Query podcasts for the current user, sorted by creation date (newest first)
-        from bson.objectid import ObjectId
-        
         # Find the most recent podcast for this user
         latest_podcast = await podcasts.find_one(
             {"user_id": str(current_user["_id"])},
@@ -385,19 +610,48 @@ async def get_latest_podcast(current_user: dict = Depends(get_current_user)):
         if not latest_podcast:
             return {"message": "No podcasts found"}
         
-        # Convert MongoDB _id to string and create audio URL
-        latest_podcast["_id"] = str(latest_podcast["_id"])
-        
-        if "audio_path" in latest_podcast:
-            audio_url = f"/audio/{os.path.basename(os.path.dirname(latest_podcast['audio_path']))}/final_podcast.mp3"
-            latest_podcast["audio_url"] = f"http://localhost:8000{audio_url}"
-        
         logger.info(f"Latest podcast found: {latest_podcast['topic']}")
-        return latest_podcast
+        return podcast_public(latest_podcast)
     except Exception as e:
         logger.error(f"Error getting latest podcast: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/podcasts/{podcast_id}")
+async def get_podcast_detail(podcast_id: str, current_user: dict = Depends(get_current_user)):
+    """Full podcast record, including research, transcript, segments and chapters."""
+    if not ObjectId.is_valid(podcast_id):
+        raise HTTPException(status_code=404, detail="Podcast not found")
+    podcast = await podcasts.find_one({"_id": ObjectId(podcast_id), "user_id": str(current_user["_id"])})
+    if not podcast:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+    return podcast_public(podcast)
+
+@app.get("/podcasts/{podcast_id}/renditions/{name}")
+async def get_podcast_rendition(
+    podcast_id: str,
+    name: str,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """A low-bitrate encoding of the podcast; 202 while it is built in the background."""
+    if name not in RENDITIONS or not ObjectId.is_valid(podcast_id):
+        raise HTTPException(status_code=404, detail="Rendition not found")
+    podcast = await podcasts.find_one(
+        {"_id": ObjectId(podcast_id), "user_id": str(current_user["_id"])}, {"audio_path": 1}
+    )
+    source = podcast and podcast.get("audio_path")
+    if not source or audio_delivery.resolve(os.path.basename(os.path.dirname(source)), os.path.basename(source)) is None:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+    status_name = audio_delivery.rendition_status(source, name)
+    if status_name != "ready":
+        response.status_code = 202
+    return {
+        "rendition": name,
+        "status": status_name,
+        "audio_url": f"http://localhost:8000{audio_url_for(AudioDelivery.rendition_path(source, name))}"
+        if status_name == "ready" else None
+    }
+
 @app.delete("/podcast/{podcast_id}")
 async def delete_podcast(podcast_id: str, current_user: dict = Depends(get_current_user)):
     try:
@@ -493,9 +747,6 @@ async def test_agent_voice(request: Request):
             logger.error("Missing required fields in test voice request")
             raise HTTPException(status_code=400, detail="Missing required fields (text or voice_id)")
 
-        # Initialize the podcast manager
-        manager = PodcastManager()
-
         # Generate a unique filename for this test
         test_filename = f"test_{voice_id}_{int(time.time())}.mp3"
         output_dir = os.path.join("temp_audio", f"test_{int(time.time())}")
@@ -505,7 +756,7 @@ async def test_agent_voice(request: Request):
         logger.info(f"Generating test audio to {output_path}")
 
         # Generate the speech
-        success = manager.generate_speech(text, voice_id, output_path)
+        success = await podcast_manager.generate_speech(text, voice_id, output_path, speed=speed)
 
         if not success:
             logger.error("Failed to generate test audio")
@@ -602,75 +853,36 @@ async def get_agent(agent_id: str, current_user: dict = Depends(get_current_user
         logger.error(f"Error getting agent: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get agent: {str(e)}")
 
-@app.post("/generate-text-podcast", response_model=TextPodcastResponse)
-async def generate_text_podcast(request: TextPodcastRequest, current_user: dict = Depends(get_current_user)):
-    """Generate a podcast from text input with a single voice and emotion."""
-    logger.info(f"Received text-based podcast generation request from user: {current_user['username']}")
+async def create_text_podcast(request: TextPodcastRequest, user_id: str, checkpoint=None) -> dict:
+    """Render a single-voice podcast from plain text."""
+    # Create conversation block for the single voice
+    conversation_blocks = [
+        {
+            "name": "Voice",
+            "input": request.text,
+            "silence_before": 1,
+            "voice_id": request.voice_id,
+            "emotion": request.emotion,
+            "model": "tts-1",
+            "speed": request.speed,
+            "duration": 0
+        }
+    ]
     
-    try:
-        # Create conversation block for the single voice
-        conversation_blocks = [
-            {
-                "name": "Voice",
-                "input": request.text,
-                "silence_before": 1,
-                "voice_id": request.voice_id,
-                "emotion": request.emotion,
-                "model": "tts-1",
-                "speed": request.speed,
-                "duration": 0
-            }
-        ]
-        
-        # Use the provided title if available, otherwise use generic title
-        podcast_title = request.title if hasattr(request, 'title') and request.title else f"Text Podcast {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-        podcast_description = request.text[:150] + "..." if len(request.text) > 150 else request.text
-        
-        # Create podcast using TTS
-        result = await podcast_manager.create_podcast(
-            topic=podcast_title,
-            research=podcast_description,
-            conversation_blocks=conversation_blocks,
-            believer_voice_id=request.voice_id,  # Using same voice for both since we only need one
-            skeptic_voice_id=request.voice_id,
-            user_id=str(current_user["_id"])
-        )
-        
-        if "error" in result:
-            logger.error(f"Error in podcast creation: {result['error']}")
-            return TextPodcastResponse(
-                audio_url="",
-                status="failed",
-                error=result["error"],
-                duration=0,
-                updated_at=datetime.now().isoformat()
-            )
-        
-        # Create audio URL from the audio path
-        audio_url = f"/audio/{os.path.basename(os.path.dirname(result['audio_path']))}/final_podcast.mp3"
-        full_audio_url = f"http://localhost:8000{audio_url}"
-        
-        logger.info("Successfully generated text-based podcast")
-        
-        return TextPodcastResponse(
-            audio_url=full_audio_url,
-            duration=result.get("duration", 0),
-            status="completed",
-            error=None,
-            updated_at=datetime.now().isoformat()
-        )
-        
-    except Exception as e:
-        logger.error(f"Error generating text-based podcast: {str(e)}", exc_info=True)
-        return TextPodcastResponse(
-            audio_url="",
-            status="failed",
-            error=str(e),
-            duration=0,
-            updated_at=datetime.now().isoformat()
-        )
-  
-  
+    # Use the provided title if available, otherwise use generic title
+    podcast_title = request.title if hasattr(request, 'title') and request.title else f"Text Podcast {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    podcast_description = request.text[:150] + "..." if len(request.text) > 150 else request.text
+    
+    return await podcast_manager.create_podcast(
+        topic=podcast_title,
+        research=podcast_description,
+        conversation_blocks=conversation_blocks,
+        believer_voice_id=request.voice_id,  # Using same voice for both since we only need one
+        skeptic_voice_id=request.voice_id,
+        user_id=user_id,
+        checkpoint=checkpoint
+    )
+
 @app.get("/api/workflows", response_model=List[WorkflowResponse])
 async def list_workflows(current_user: dict = Depends(get_current_user)):
     try:
@@ -703,7 +915,8 @@ async def list_workflows(current_user: dict = Depends(get_current_user)):
                 "edges": workflow.get("edges", []),
                 "user_id": workflow["user_id"],
                 "created_at": workflow["created_at"].isoformat() if "created_at" in workflow else None,
-                "updated_at": workflow["updated_at"].isoformat() if "updated_at" in workflow else None
+                "updated_at": workflow["updated_at"].isoformat() if "updated_at" in workflow else None,
+                "version": workflow.get("version", 0)
             }
             
             print(f"Converted workflow data: {workflow_data}")
@@ -756,7 +969,7 @@ async def update_workflow(workflow_id: str, workflow: WorkflowCreate, current_us
         # Update the workflow
         result = await workflows.update_one(
             {"_id": ObjectId(workflow_id), "user_id": current_user.get("username")},
-            {"$set": workflow_data}
+            {"$set": workflow_data, "$inc": {"version": 1}}
         )
         
         if result.modified_count == 0:
@@ -775,7 +988,8 @@ async def update_workflow(workflow_id: str, workflow: WorkflowCreate, current_us
             "insights": updated_workflow.get("insights", ""),  # Add insights field
             "user_id": updated_workflow["user_id"],
             "created_at": updated_workflow["created_at"].isoformat() if "created_at" in updated_workflow else None,
-            "updated_at": updated_workflow["updated_at"].isoformat() if "updated_at" in updated_workflow else None
+            "updated_at": updated_workflow["updated_at"].isoformat() if "updated_at" in updated_workflow else None,
+            "version": updated_workflow.get("version", 0)
         }
         
         print(f"Response data prepared (insights type: {type(response_data['insights'])})")
@@ -793,6 +1007,95 @@ async def update_workflow(workflow_id: str, workflow: WorkflowCreate, current_us
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class WorkflowConflict(Exception):
+    """A workflow patch step found a version other than the one it expected."""
+
+# pymongo's error code for transactions on a server that is not a replica set member
+ILLEGAL_OPERATION = 20
+# and for an update path that runs through a value that is not a document
+PATH_NOT_VIABLE = 28
+
+@app.patch("/api/workflows/{workflow_id}", response_model=WorkflowPatchResponse)
+async def patch_workflow(workflow_id: str, patch: WorkflowPatchRequest, current_user: dict = Depends(get_current_user)):
+    """Apply a list of edit operations to a workflow without rewriting it.
+
+    The request carries the version the client last saw. If the workflow has
+    changed since, nothing is applied and 409 is returned with the current
+    version, so the client can reload and retry. A patch split into several
+    update steps runs in one transaction, so it is applied whole or not at
+    all; without transactions (a standalone server) it is rejected with 422.
+    So is a path into a value that is not a document (e.g. insights.topic
+    while insights is stored as plain text).
+    """
+    if not ObjectId.is_valid(workflow_id):
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    owner = {"_id": ObjectId(workflow_id), "user_id": current_user.get("username")}
+
+    # Only element ids are read, to resolve per-element paths
+    current = await workflows.find_one(owner, {"version": 1, "nodes.id": 1, "edges.id": 1})
+    if current is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    if current.get("version", 0) != patch.version:
+        raise HTTPException(status_code=409, detail={"message": "Workflow was modified", "version": current.get("version", 0)})
+
+    builder = WorkflowPatch({
+        field: {element.get("id") for element in current.get(field, [])} for field in ("nodes", "edges")
+    })
+    try:
+        for operation in patch.operations:
+            builder.apply(operation.op, operation.path, operation.value)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    now = datetime.utcnow()
+
+    async def apply_steps(session=None) -> int:
+        version = patch.version
+        for step in builder.steps:
+            update = step.update()
+            update.setdefault("$set", {})["updated_at"] = now
+            update["$inc"] = {"version": 1}
+            # Documents created before versioning have no version field
+            expected = {"$in": [0, None]} if version == 0 else version
+            result = await workflows.update_one(
+                {**owner, "version": expected},
+                update,
+                array_filters=step.array_filters or None,
+                session=session
+            )
+            if result.matched_count == 0:
+                raise WorkflowConflict()
+            version += 1
+        return version
+
+    try:
+        if len(builder.steps) == 1:
+            version = await apply_steps()
+        else:
+            # All steps or none: a conflict on a later step rolls back the earlier ones
+            async with await client.start_session() as session:
+                version = await session.with_transaction(apply_steps)
+    except WorkflowConflict:
+        latest = await workflows.find_one(owner, {"version": 1})
+        raise HTTPException(status_code=409, detail={
+            "message": "Workflow was modified",
+            "version": latest.get("version", 0) if latest else None
+        })
+    except OperationFailure as e:
+        if e.code == PATH_NOT_VIABLE:
+            message = e.details.get("errmsg") if e.details else str(e)
+            raise HTTPException(status_code=422, detail=f"The patch does not fit the stored workflow: {message}")
+        # Standalone servers have no transactions
+        if e.code != ILLEGAL_OPERATION:
+            raise
+        raise HTTPException(
+            status_code=422,
+            detail="This patch needs several updates, which this database cannot apply atomically; "
+                   "send its operations as separate patches"
+        )
+
+    return {"id": workflow_id, "version": version, "updated_at": now.isoformat()}
+
 @app.delete("/api/workflows/{workflow_id}")
 async def delete_workflow(workflow_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a specific workflow."""
@@ -836,7 +1139,8 @@ async def create_workflow(workflow: WorkflowCreate, current_user: dict = Depends
             "insights": insights_data,  # Use the converted insights
             "user_id": user_id,
             "created_at": now,
-            "updated_at": now
+            "updated_at": now,
+            "version": 0
         }
         
         print(f"Workflow data prepared (insights type: {type(workflow_data['insights'])})")
@@ -854,7 +1158,8 @@ async def create_workflow(workflow: WorkflowCreate, current_user: dict = Depends
             "insights": workflow_data.get("insights"),  # Add insights field
             "user_id": workflow_data["user_id"],
             "created_at": workflow_data["created_at"].isoformat(),
-            "updated_at": workflow_data["updated_at"].isoformat()
+            "updated_at": workflow_data["updated_at"].isoformat(),
+            "version": workflow_data["version"]
         }
         
         print(f"Response data prepared (insights type: {type(response_data['insights'])})")
@@ -912,7 +1217,8 @@ async def get_workflow(workflow_id: str, current_user: dict = Depends(get_curren
             "insights": workflow.get("insights", ""),  # Add insights field
             "user_id": workflow["user_id"],
             "created_at": workflow.get("created_at"),
-            "updated_at": workflow.get("updated_at")
+            "updated_at": workflow.get("updated_at"),
+            "version": workflow.get("version", 0)
         }
         
         print(f"Response data: {response_data}")
@@ -931,90 +1237,261 @@ async def get_workflow(workflow_id: str, current_user: dict = Depends(get_curren
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/direct-podcast", response_model=TextPodcastResponse)
-async def create_direct_podcast(request: Request, current_user: dict = Depends(get_current_user)):
-    """Generate a podcast directly from conversation blocks with different voices."""
-    logger.info(f"Received direct podcast generation request from user: {current_user['username']}")
-    
-    try:
-        # Parse the request body
-        data = await request.json()
-        topic = data.get("topic", "Debate")
-        conversation_blocks = data.get("conversation_blocks", [])
-        
-        logger.info(f"Direct podcast request for topic: {topic}")
-        logger.info(f"Number of conversation blocks: {len(conversation_blocks)}")
-        
-        if not conversation_blocks:
-            raise HTTPException(status_code=400, detail="No conversation blocks provided")
-        
-        # Format conversation blocks for the podcast manager
-        formatted_blocks = []
-        for idx, block in enumerate(conversation_blocks):
-            # Extract data from each block
-            content = block.get("content", "")
-            voice_id = block.get("voice_id", "alloy")  # Default to alloy if not specified
-            block_type = block.get("type", "generic")
-            turn = block.get("turn", idx + 1)
-            agent_id = block.get("agent_id", "")
-            
-            # Format for podcast manager
-            formatted_block = {
-                "name": f"Turn {turn}",
-                "input": content,
-                "silence_before": 0.3,  # Short pause between blocks
-                "voice_id": voice_id,
-                "emotion": "neutral",
-                "model": "tts-1",
-                "speed": 1.0,
-                "duration": 0,
-                "type": block_type,
-                "turn": turn,
-                "agent_id": agent_id
-            }
-            
-            formatted_blocks.append(formatted_block)
-            
-        # Use the podcast manager to create the audio
-        result = await podcast_manager.create_podcast(
-            topic=topic,
-            research=f"Direct podcast on {topic}",
-            conversation_blocks=formatted_blocks,
-            believer_voice_id="alloy",  # These are just placeholders for the manager
-            skeptic_voice_id="echo", 
-            user_id=str(current_user["_id"])
-        )
-        
-        if "error" in result:
-            logger.error(f"Error in direct podcast creation: {result['error']}")
-            return TextPodcastResponse(
-                audio_url="",
-                status="failed",
-                error=result["error"],
-                duration=0,
-                updated_at=datetime.now().isoformat()
-            )
-        
-        # Create audio URL from the audio path
-        audio_url = f"/audio/{os.path.basename(os.path.dirname(result['audio_path']))}/final_podcast.mp3"
-        full_audio_url = f"http://localhost:8000{audio_url}"
-        
-        logger.info(f"Successfully generated direct podcast: {result.get('podcast_id')}")
-        
-        return TextPodcastResponse(
-            audio_url=full_audio_url,
-            duration=result.get("duration", 0),
-            status="completed",
-            error=None,
-            updated_at=datetime.now().isoformat()
-        )
+def format_direct_blocks(conversation_blocks: List[dict]) -> List[dict]:
+    """Convert editor conversation blocks into podcast manager blocks."""
+    formatted_blocks = []
+    for idx, block in enumerate(conversation_blocks):
+        # Extract data from each block
+        content = block.get("content", "")
+        voice_id = block.get("voice_id", "alloy")  # Default to alloy if not specified
+        block_type = block.get("type", "generic")
+        turn = block.get("turn", idx + 1)
+        agent_id = block.get("agent_id", "")
+        
+        # Format for podcast manager
+        formatted_block = {
+            "name": f"Turn {turn}",
+            "input": content,
+            "silence_before": 0.3,  # Short pause between blocks
+            "voice_id": voice_id,
+            "emotion": "neutral",
+            "model": "tts-1",
+            "speed": 1.0,
+            "duration": 0,
+            "type": block_type,
+            "turn": turn,
+            "agent_id": agent_id
+        }
         
-    except Exception as e:
-        logger.error(f"Error generating direct podcast: {str(e)}", exc_info=True)
-        return TextPodcastResponse(
-            audio_url="",
-            status="failed",
-            error=str(e),
-            duration=0,
-            updated_at=datetime.now().isoformat()
-        ) 
\ No newline at end of file
+        formatted_blocks.append(formatted_block)
+    return formatted_blocks
+
+async def attach_agent_effects(blocks: List[dict], user_id: str) -> List[dict]:
+    """Give blocks spoken by one of the user's agents that agent's speed, pitch and volume."""
+    agent_ids = {block["agent_id"] for block in blocks if ObjectId.is_valid(block.get("agent_id") or "")}
+    if not agent_ids:
+        return blocks
+    cursor = agents.find({"_id": {"$in": [ObjectId(agent_id) for agent_id in agent_ids]}, "user_id": user_id})
+    effects = {str(agent["_id"]): agent_effects(agent) async for agent in cursor}
+    for block in blocks:
+        if block.get("agent_id") in effects:
+            block["effects"] = effects[block["agent_id"]]
+    return blocks
+
+# Stage results of running jobs, keyed by job id, so retries resume
+checkpoint_store = CheckpointStore(checkpoints)
+
+async def finish_podcast_job(job: dict, status: str):
+    """Drop a finished job's checkpoint, and the workspace of one that failed for good."""
+    checkpoint = await checkpoint_store.load(str(job["_id"]))
+    workspace = checkpoint.get("workspace")
+    # A saved podcast lives in its workspace, whatever became of the job
+    if status == "failed" and workspace and not checkpoint.get("podcast"):
+        if os.path.dirname(workspace) == podcast_manager.temp_dir:
+            await asyncio.to_thread(shutil.rmtree, workspace, ignore_errors=True)
+    await checkpoint.clear()
+
+# Background jobs
+job_queue = JobQueue(jobs, on_finished=finish_podcast_job)
+
+def podcast_job_result(result: dict) -> dict:
+    """Turn a create_podcast result into a job result, raising on failure."""
+    if "error" in result:
+        raise Exception(result["error"])
+    audio_url = f"/audio/{os.path.basename(os.path.dirname(result['audio_path']))}/final_podcast.mp3"
+    job_result = {
+        "podcast_id": result["podcast_id"],
+        "audio_url": f"http://localhost:8000{audio_url}",
+        "duration": result.get("duration", 0)
+    }
+    if result.get("playlist_path"):
+        job_result["playlist_url"] = f"http://localhost:8000{audio_url_for(result['playlist_path'])}"
+    return job_result
+
+async def run_debate_with_checkpoint(podcast_req: PodcastRequest, research_results: str, checkpoint) -> List[dict]:
+    """Stream the debate, saving each finished turn so a retry only generates the rest."""
+    completed = dict(checkpoint.get("debate", {}))
+    current, pieces = None, []
+    async for event in generate_debate_stream(
+        research=research_results,
+        believer_name=podcast_req.believer_voice_id,
+        skeptic_name=podcast_req.skeptic_voice_id,
+        completed_turns=completed
+    ):
+        if event.type == "error":
+            raise Exception(event.content)
+        key = f"{event.type}_{event.turn}"
+        if key != current:
+            # A new turn started, so the previous one is complete
+            if current:
+                completed[current] = "".join(pieces)
+                await checkpoint.save(f"debate.{current}", completed[current])
+            current, pieces = key, []
+        pieces.append(event.content)
+    if current:
+        completed[current] = "".join(pieces)
+        await checkpoint.save(f"debate.{current}", completed[current])
+
+    turns = {"skeptic": {}, "believer": {}}
+    for key, text in completed.items():
+        role, turn = key.rsplit("_", 1)
+        turns[role][int(turn)] = text
+    return build_debate_blocks(
+        turns["skeptic"], turns["believer"], podcast_req.skeptic_voice_id, podcast_req.believer_voice_id
+    )
+
+async def run_generate_podcast_job(job: dict, report) -> dict:
+    podcast_req = PodcastRequest(**job["payload"])
+    checkpoint = await checkpoint_store.load(str(job["_id"]))
+
+    research_results = checkpoint.get("research")
+    if research_results is None:
+        await report({"stage": "research"})
+        research_results = await research_topic(podcast_req.topic)
+        if research_results == RESEARCH_ERROR:
+            raise Exception("Research failed")
+        await checkpoint.save("research", research_results)
+
+    await report({"stage": "debate"})
+    conversation_blocks = await run_debate_with_checkpoint(podcast_req, research_results, checkpoint)
+    if not conversation_blocks:
+        raise Exception("Failed to generate debate")
+
+    await report({"stage": "tts"})
+    result = await podcast_manager.create_podcast(
+        topic=podcast_req.topic,
+        research=research_results,
+        conversation_blocks=conversation_blocks,
+        believer_voice_id=podcast_req.believer_voice_id,
+        skeptic_voice_id=podcast_req.skeptic_voice_id,
+        user_id=job["user_id"],
+        checkpoint=checkpoint
+    )
+    return podcast_job_result(result)
+
+async def run_text_podcast_job(job: dict, report) -> dict:
+    checkpoint = await checkpoint_store.load(str(job["_id"]))
+    await report({"stage": "tts"})
+    result = await create_text_podcast(TextPodcastRequest(**job["payload"]), job["user_id"], checkpoint=checkpoint)
+    return podcast_job_result(result)
+
+async def run_direct_podcast_job(job: dict, report) -> dict:
+    topic = job["payload"].get("topic", "Debate")
+    checkpoint = await checkpoint_store.load(str(job["_id"]))
+    await report({"stage": "tts"})
+
+    async def on_segment(event):
+        # Playback can start from the playlist long before the podcast is merged
+        await report({
+            "playlist_url": f"http://localhost:8000{audio_url_for(event['playlist_path'])}",
+            "segments_ready": event["index"] + 1,
+            "segments_total": event["total"]
+        })
+
+    result = await podcast_manager.create_podcast(
+        topic=topic,
+        research=f"Direct podcast on {topic}",
+        conversation_blocks=await attach_agent_effects(
+            format_direct_blocks(job["payload"]["conversation_blocks"]), job["user_id"]
+        ),
+        believer_voice_id="alloy",  # These are just placeholders for the manager
+        skeptic_voice_id="echo",
+        user_id=job["user_id"],
+        on_segment=on_segment if job["payload"].get("progressive") else None,
+        checkpoint=checkpoint
+    )
+    return podcast_job_result(result)
+
+job_queue.register("generate-podcast", run_generate_podcast_job)
+job_queue.register("generate-text-podcast", run_text_podcast_job)
+job_queue.register("direct-podcast", run_direct_podcast_job)
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    # Running jobs are handed back to the queue for another process
+    await job_queue.stop()
+
+# Podcasts are only rendered by the job workers; the original endpoints queue a
+# job too and clients follow it with /jobs/{job_id} or /jobs/{job_id}/events
+@app.post("/generate-podcast", response_model=JobSubmitResponse)
+@app.post("/jobs/generate-podcast", response_model=JobSubmitResponse)
+async def submit_podcast_job(podcast_req: PodcastRequest, current_user: dict = Depends(get_current_user)):
+    """Queue research, debate and TTS for a topic; returns immediately."""
+    job_id = await job_queue.submit("generate-podcast", podcast_req.dict(), str(current_user["_id"]))
+    return {"job_id": job_id, "status": "queued"}
+
+@app.post("/generate-text-podcast", response_model=JobSubmitResponse)
+@app.post("/jobs/generate-text-podcast", response_model=JobSubmitResponse)
+async def submit_text_podcast_job(request: TextPodcastRequest, current_user: dict = Depends(get_current_user)):
+    """Queue a single-voice text podcast; returns immediately."""
+    job_id = await job_queue.submit("generate-text-podcast", request.dict(), str(current_user["_id"]))
+    return {"job_id": job_id, "status": "queued"}
+
+@app.post("/direct-podcast", response_model=JobSubmitResponse)
+@app.post("/jobs/direct-podcast", response_model=JobSubmitResponse)
+async def submit_direct_podcast_job(request: Request, current_user: dict = Depends(get_current_user)):
+    """Queue a podcast from ready-made conversation blocks; returns immediately.
+
+    With "progressive" set, the job's progress carries the URL of an HLS
+    playlist as soon as the first segment is ready.
+    """
+    data = await request.json()
+    if not data.get("conversation_blocks"):
+        raise HTTPException(status_code=400, detail="No conversation blocks provided")
+    payload = {
+        "topic": data.get("topic", "Debate"),
+        "conversation_blocks": data["conversation_blocks"],
+        "progressive": bool(data.get("progressive", False))
+    }
+    job_id = await job_queue.submit("direct-podcast", payload, str(current_user["_id"]))
+    return {"job_id": job_id, "status": "queued"}
+
+async def get_user_job(job_id: str, current_user: dict) -> dict:
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await job_queue.get(job_id, str(current_user["_id"]))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Poll the status of a background job."""
+    return serialize_job(await get_user_job(job_id, current_user))
+
+@app.post("/jobs/{job_id}/retry", response_model=JobResponse)
+async def retry_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Requeue a failed job; it starts over, as a failed job's checkpoint is dropped."""
+    job = await get_user_job(job_id, current_user)
+    if job["status"] != "failed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, only failed jobs can be retried")
+    retried = await job_queue.retry(job["_id"])
+    if retried is None:
+        # Retried (or otherwise changed) by someone else since the check above
+        raise HTTPException(status_code=409, detail="Job is no longer failed, only failed jobs can be retried")
+    return serialize_job(retried)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Stream a job's status as NDJSON every time it changes, until it finishes."""
+    job = await get_user_job(job_id, current_user)
+
+    async def generate():
+        last_update = None
+        current = job
+        while True:
+            if current["updated_at"] != last_update:
+                last_update = current["updated_at"]
+                yield json.dumps(serialize_job(current)) + "\n"
+            if current["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            current = await job_queue.get(job_id, str(current_user["_id"]))
+            if current is None:
+                break
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -0,0 +1,87 @@
+"""Prometheus metrics for the podcast pipeline, exported on /metrics."""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+
+# Pipeline stages run from milliseconds (cache hits, merges) to minutes (research)
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+STAGE_SECONDS = Histogram(
+    "podcraft_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=_STAGE_BUCKETS
+)
+STAGE_ERRORS = Counter("podcraft_stage_errors_total", "Pipeline stage failures", ["stage"])
+TTS_CHARACTERS = Counter(
+    "podcraft_tts_characters_total", "Characters of segment text by how they were produced", ["source"]
+)
+LLM_TOKENS = Counter("podcraft_llm_tokens_total", "LLM tokens used", ["agent", "type"])
+DEBATE_PROMPT_TOKENS = Histogram(
+    "podcraft_debate_prompt_tokens", "Prompt tokens of each debate turn", ["role"],
+    buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 8000, 12000)
+)
+JOBS_IN_FLIGHT = Gauge("podcraft_jobs_in_flight", "Background jobs being run by this process", ["kind"])
+AUDIO_EGRESS_BYTES = Counter("podcraft_audio_egress_bytes_total", "Audio bytes sent, by rendition", ["rendition"])
+PODCASTS_IN_FLIGHT = Gauge("podcraft_podcasts_in_flight", "Podcasts being rendered by this process")
+MONGO_COMMAND_SECONDS = Histogram(
+    "podcraft_mongo_command_seconds", "MongoDB command round trips", ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+MONGO_COMMAND_ERRORS = Counter("podcraft_mongo_command_errors_total", "Failed MongoDB commands", ["command"])
+
+
+@contextmanager
+def timed(stage: str):
+    """Observe the duration of a block under stage; count it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Times every MongoDB command the driver sends."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_ERRORS.labels(event.command_name).inc()
+
+
+class CacheCollector:
+    """Exposes the hit/miss counters the caches already keep, read at scrape time."""
+
+    def __init__(self):
+        self._caches: Dict[str, Callable[[], Dict]] = {}
+
+    def register(self, name: str, stats: Callable[[], Dict]):
+        self._caches[name] = stats
+
+    def collect(self):
+        requests = CounterMetricFamily("podcraft_cache_requests", "Cache lookups by result", labels=["cache", "result"])
+        entries = GaugeMetricFamily("podcraft_cache_entries", "Entries held by each cache", labels=["cache"])
+        for name, stats in self._caches.items():
+            values = stats()
+            requests.add_metric([name, "hit"], values.get("hits", 0))
+            requests.add_metric([name, "miss"], values.get("misses", 0))
+            if "coalesced" in values:
+                requests.add_metric([name, "coalesced"], values["coalesced"])
+            if "entries" in values:
+                entries.add_metric([name], values["entries"])
+        yield requests
+        yield entries
+
+
+caches = CacheCollector()
+REGISTRY.register(caches)
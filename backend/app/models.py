@@ -48,6 +48,14 @@ class PodcastRequest(BaseModel):
     topic: str
     believer_voice_id: str
     skeptic_voice_id: str
+    progressive: bool = False  # Stream audio segments as they are rendered
+
+class PanelRequest(BaseModel):
+    topic: str
+    agent_ids: List[str]  # Agents of the user, at least two
+    schedule: Optional[List[List[str]]] = None  # Rounds of agent ids in speaking order; default: all agents, `rounds` times
+    rounds: int = 3
+    progressive: bool = False  # Stream audio segments as they are rendered
 
 class ConversationBlock(BaseModel):
     name: str
@@ -97,6 +105,21 @@ class WorkflowResponse(BaseModel):
     user_id: str
     created_at: Optional[str]
     updated_at: Optional[str]
+    version: int = 0
+
+class WorkflowPatchOperation(BaseModel):
+    op: str  # add, replace, remove or upsert
+    path: str  # e.g. "/nodes/{node_id}/position"; see app/workflow_patch.py
+    value: Optional[Any] = None
+
+class WorkflowPatchRequest(BaseModel):
+    version: int  # Version the client last saw; a mismatch is rejected with 409
+    operations: List[WorkflowPatchOperation]
+
+class WorkflowPatchResponse(BaseModel):
+    id: str
+    version: int
+    updated_at: str
 
 class TextPodcastRequest(BaseModel):
     text: str
@@ -105,10 +128,17 @@ class TextPodcastRequest(BaseModel):
     speed: float = 1.0
     title: Optional[str] = None
 
-class TextPodcastResponse(BaseModel):
-    audio_url: str
-    duration: Optional[float]
+class JobSubmitResponse(BaseModel):
+    job_id: str
     status: str
-    error: Optional[str]
-    updated_at: Optional[str] 
 
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, completed or failed
+    attempts: int
+    progress: Dict[str, Any]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: Optional[str]
+    updated_at: Optional[str]
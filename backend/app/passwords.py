@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from decouple import config
+from passlib.context import CryptContext
+
+# bcrypt cost for new hashes; stored hashes with another cost are upgraded on login
+BCRYPT_ROUNDS = config('BCRYPT_ROUNDS', default=12, cast=int)
+# Hashes computed at once. bcrypt releases the GIL, so each worker uses a core
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=2, cast=int)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Hashing takes hundreds of milliseconds of CPU, so it runs here instead of
+# on the event loop; the pool size bounds how many run concurrently
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor, pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check a password against its stored hash.
+
+    Returns (valid, new_hash). new_hash is set when the password is valid but
+    the stored hash uses an outdated scheme or cost and should be replaced.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, pwd_context.verify_and_update, password, hashed_password
+    )
+
+
+def shutdown_hashing():
+    _executor.shutdown(wait=False, cancel_futures=True)
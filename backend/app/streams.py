@@ -0,0 +1,284 @@
+"""Resumable event streams of podcast generations.
+
+A streamed generation runs as a background task that writes its events to a
+StreamLog, and HTTP responses only follow the log. If the client goes away
+the generation carries on; a reconnect with the id of the last event it got
+(the SSE Last-Event-ID) is sent the events it missed, then the live ones.
+
+Each log keeps its newest events in a bounded ring buffer. Older events
+spill to Mongo (stream_events), and when the stream finishes everything is
+written there, so a finished stream can still be replayed after it is
+dropped from memory, or by another app process. Live following is only
+served by the process running the generation; any other one polls the store.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
+from itertools import chain
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from decouple import config
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+
+from .agents.events import StreamEvent, coalesce
+
+# Events of one stream kept in memory; older ones are only in Mongo
+STREAM_LOG_EVENTS = config('STREAM_LOG_EVENTS', default=512, cast=int)
+# How long a finished stream stays in memory, and in Mongo (TTL index in indexes.py)
+STREAM_RETAIN_SECONDS = config('STREAM_RETAIN_SECONDS', default=300, cast=int)
+STREAM_TTL_SECONDS = config('STREAM_TTL_SECONDS', default=24 * 3600, cast=int)
+# A comment line is sent after this long without events, so proxies keep the connection open
+STREAM_KEEPALIVE_SECONDS = config('STREAM_KEEPALIVE_SECONDS', default=15.0, cast=float)
+# Following a stream that runs in another process: store polling interval, and when to give up
+STREAM_POLL_SECONDS = config('STREAM_POLL_SECONDS', default=1.0, cast=float)
+STREAM_POLL_TIMEOUT_SECONDS = config('STREAM_POLL_TIMEOUT_SECONDS', default=300.0, cast=float)
+
+logger = logging.getLogger(__name__)
+
+# (sequence number, serialized event); sequence numbers start at 1
+Entry = Tuple[int, Dict]
+
+
+def sse_frame(entries: Iterable[Entry]) -> str:
+    """Server-sent events for entries, or a keepalive comment if there are none."""
+    frame = "".join(f"id: {seq}\ndata: {json.dumps(event)}\n\n" for seq, event in entries)
+    return frame or ": keepalive\n\n"
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """Sequence number from a Last-Event-ID value; 0 (replay everything) if missing or invalid."""
+    try:
+        return max(int(value), 0) if value else 0
+    except ValueError:
+        return 0
+
+
+class StreamStore:
+    """Mongo persistence of stream logs: one document per stream, one per event."""
+
+    def __init__(self, streams, events):
+        self.streams = streams
+        self.events = events
+
+    async def create(self, stream_id: str, user_id: str):
+        now = datetime.utcnow()
+        await self.streams.insert_one({
+            "_id": stream_id,
+            "user_id": user_id,
+            "status": "running",
+            "last_seq": 0,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    async def get(self, stream_id: str, user_id: str) -> Optional[Dict]:
+        return await self.streams.find_one({"_id": stream_id, "user_id": user_id})
+
+    async def save_events(self, stream_id: str, entries: List[Entry]):
+        now = datetime.utcnow()
+        try:
+            await self.events.insert_many(
+                [{"stream_id": stream_id, "seq": seq, "event": event, "created_at": now} for seq, event in entries],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Events saved by an earlier, partly failed attempt are already there
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        await self.streams.update_one(
+            {"_id": stream_id},
+            {"$max": {"last_seq": entries[-1][0]}, "$set": {"updated_at": now}}
+        )
+
+    async def load_events(self, stream_id: str, start: int, end: Optional[int] = None) -> List[Entry]:
+        """Stored entries with start <= seq < end, in order."""
+        seq = {"$gte": start}
+        if end is not None:
+            seq["$lt"] = end
+        cursor = self.events.find({"stream_id": stream_id, "seq": seq}).sort("seq", ASCENDING)
+        return [(doc["seq"], doc["event"]) async for doc in cursor]
+
+    async def finish(self, stream_id: str, status: str):
+        await self.streams.update_one(
+            {"_id": stream_id},
+            {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+        )
+
+
+class StreamLog:
+    """Events of one running or recently finished stream."""
+
+    def __init__(self, store: StreamStore, stream_id: str, user_id: str, capacity: int = STREAM_LOG_EVENTS):
+        self.store = store
+        self.stream_id = stream_id
+        self.user_id = user_id
+        self.capacity = capacity
+        self.ring: deque = deque()
+        # Evicted from the ring but not yet confirmed written to the store
+        self.spilled: List[Entry] = []
+        self.last_seq = 0
+        self.finished = False
+        self._flusher: Optional[asyncio.Task] = None
+        # Replaced on every change, so each follower waits on the one it last checked against
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, event: StreamEvent):
+        self.last_seq += 1
+        self.ring.append((self.last_seq, event.to_dict()))
+        if len(self.ring) > self.capacity:
+            self.spilled.append(self.ring.popleft())
+            if self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.create_task(self._flush())
+        self._notify()
+
+    def extend(self, events: Iterable[StreamEvent]):
+        for event in events:
+            self.append(event)
+
+    async def _flush(self):
+        while self.spilled:
+            batch = self.spilled[:]
+            try:
+                await self.store.save_events(self.stream_id, batch)
+            except Exception as e:
+                # Kept in memory (and replayable) until the next eviction retries
+                logger.error(f"Could not spill events of stream {self.stream_id}: {str(e)}")
+                if len(self.spilled) > self.capacity:
+                    dropped = len(self.spilled) - self.capacity
+                    del self.spilled[:dropped]
+                    logger.error(f"Dropped {dropped} events of stream {self.stream_id}")
+                return
+            del self.spilled[:len(batch)]
+
+    def _first_in_memory(self) -> int:
+        if self.spilled:
+            return self.spilled[0][0]
+        return self.ring[0][0] if self.ring else self.last_seq + 1
+
+    async def close(self, status: str):
+        """Mark the stream finished and persist all of it."""
+        self.finished = True
+        self._notify()
+        if self._flusher is not None:
+            await self._flusher
+        try:
+            entries = self.spilled + list(self.ring)
+            if entries:
+                await self.store.save_events(self.stream_id, entries)
+            await self.store.finish(self.stream_id, status)
+        except Exception as e:
+            logger.error(f"Could not persist stream {self.stream_id}: {str(e)}")
+
+    async def follow(self, after: int = 0) -> AsyncIterator[List[Entry]]:
+        """Batches of entries with seq > after, until the stream is finished.
+
+        Spilled entries are read from the store first; an empty batch means
+        nothing happened for STREAM_KEEPALIVE_SECONDS.
+        """
+        next_seq = after + 1
+        while True:
+            changed = self._changed
+            first = self._first_in_memory()
+            if next_seq < first:
+                batch = await self.store.load_events(self.stream_id, next_seq, first)
+                if batch:
+                    yield batch
+                # Skips entries lost to a failed spill
+                next_seq = first
+                continue
+            batch = [entry for entry in chain(self.spilled, self.ring) if entry[0] >= next_seq]
+            if batch:
+                next_seq = batch[-1][0] + 1
+                yield batch
+                continue
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield []
+
+
+class StreamManager:
+    """Runs streamed generations in the background and serves their logs."""
+
+    def __init__(self, store: StreamStore, capacity: int = STREAM_LOG_EVENTS, retain_seconds: int = STREAM_RETAIN_SECONDS):
+        self.store = store
+        self.capacity = capacity
+        self.retain_seconds = retain_seconds
+        self.logs: Dict[str, StreamLog] = {}
+        self._tasks = set()
+
+    async def start(self, user_id: str, source: AsyncIterator[StreamEvent]) -> StreamLog:
+        """Start consuming source into a new log; its first event carries the stream id."""
+        stream_id = uuid.uuid4().hex
+        await self.store.create(stream_id, user_id)
+        log = StreamLog(self.store, stream_id, user_id, self.capacity)
+        log.append(StreamEvent("stream", data={"stream_id": stream_id}))
+        self.logs[stream_id] = log
+        task = asyncio.create_task(self._run(log, source))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return log
+
+    async def _run(self, log: StreamLog, source: AsyncIterator[StreamEvent]):
+        status = "completed"
+        try:
+            # Tokens are merged here once, rather than per follower
+            async for batch in coalesce(source):
+                log.extend(batch)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Error in stream {log.stream_id}: {str(e)}")
+            log.append(StreamEvent("error", str(e)))
+            status = "failed"
+        finally:
+            await log.close(status)
+            asyncio.get_running_loop().call_later(self.retain_seconds, self.logs.pop, log.stream_id, None)
+
+    async def follow(self, stream_id: str, user_id: str, after: int = 0) -> Optional[AsyncIterator[List[Entry]]]:
+        """Entries of a stream owned by user_id after seq `after`, or None if there is no such stream."""
+        log = self.logs.get(stream_id)
+        if log is not None:
+            return log.follow(after) if log.user_id == user_id else None
+        if await self.store.get(stream_id, user_id) is None:
+            return None
+        return self._follow_stored(stream_id, user_id, after)
+
+    async def _follow_stored(self, stream_id: str, user_id: str, after: int) -> AsyncIterator[List[Entry]]:
+        next_seq = after + 1
+        idle = 0.0
+        while True:
+            doc = await self.store.get(stream_id, user_id)
+            batch = await self.store.load_events(stream_id, next_seq)
+            if batch:
+                next_seq = batch[-1][0] + 1
+                idle = 0.0
+                yield batch
+            # Events are all saved before the status changes, so the load above saw the last ones
+            if doc is None or doc["status"] != "running" or idle >= STREAM_POLL_TIMEOUT_SECONDS:
+                return
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+            idle += STREAM_POLL_SECONDS
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "running": len(self._tasks),
+            "in_memory": len(self.logs),
+            "buffered_events": sum(len(log.ring) + len(log.spilled) for log in self.logs.values())
+        }
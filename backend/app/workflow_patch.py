@@ -0,0 +1,193 @@
+"""Translate workflow patch operations into targeted MongoDB updates.
+
+Paths follow JSON Pointer syntax, except that nodes and edges are addressed
+by their "id" rather than their position, so concurrent editors cannot shift
+each other's targets:
+
+    /name, /description             replace
+    /insights[/...]                  add, replace, remove ("/-" appends to a list)
+    /nodes/-, /edges/-               add (value must carry an "id")
+    /nodes/{id}, /edges/{id}         add/upsert, replace, remove
+    /nodes/{id}/..., /edges/{id}/... add, replace, remove inside one element
+
+Operations become $set/$unset on dotted paths, $set through arrayFilters for
+single elements, and $push/$pull for adding and removing elements. MongoDB
+rejects one update that touches a path and its parent (e.g. pushing a node
+and moving another), so such patches are split into several ordered steps,
+which the caller runs in one transaction.
+"""
+from typing import Dict, List, Set
+
+ARRAY_FIELDS = ("nodes", "edges")
+SCALAR_FIELDS = ("name", "description")
+
+
+def _split_path(path: str) -> List[str]:
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid path: {path}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _overlaps(a: str, b: str) -> bool:
+    return a == b or a.startswith(b + ".") or b.startswith(a + ".")
+
+
+class UpdateStep:
+    """One update_one call: operators plus the arrayFilters they use."""
+
+    def __init__(self):
+        self.set: Dict = {}
+        self.unset: Dict = {}
+        self.push: Dict[str, List] = {}
+        self.pull: Dict[str, List] = {}
+        self.identifiers: Dict = {}  # (field, element id) -> arrayFilters identifier
+        self.paths: Dict[str, str] = {}  # touched path -> operator
+
+    def fits(self, path: str, operator: str) -> bool:
+        for existing, existing_operator in self.paths.items():
+            if not _overlaps(path, existing):
+                continue
+            # Several pushes (or pulls) on one array merge into $each / $in
+            if path == existing and operator == existing_operator and operator in ("$push", "$pull"):
+                continue
+            return False
+        return True
+
+    def element(self, field: str, element_id) -> str:
+        key = (field, element_id)
+        if key not in self.identifiers:
+            self.identifiers[key] = f"{field[0]}{len(self.identifiers)}"
+        return f"{field}.$[{self.identifiers[key]}]"
+
+    def add(self, operator: str, path: str, value=None):
+        self.paths[path] = operator
+        if operator == "$set":
+            self.set[path] = value
+        elif operator == "$unset":
+            self.unset[path] = ""
+        elif operator == "$push":
+            self.push.setdefault(path, []).append(value)
+        elif operator == "$pull":
+            self.pull.setdefault(path, []).append(value)
+
+    def update(self) -> Dict:
+        update = {}
+        if self.set:
+            update["$set"] = dict(self.set)
+        if self.unset:
+            update["$unset"] = dict(self.unset)
+        if self.push:
+            update["$push"] = {path: {"$each": values} for path, values in self.push.items()}
+        if self.pull:
+            update["$pull"] = {path: {"id": {"$in": ids}} for path, ids in self.pull.items()}
+        return update
+
+    @property
+    def array_filters(self) -> List[Dict]:
+        return [{f"{identifier}.id": element_id} for (_, element_id), identifier in self.identifiers.items()]
+
+
+class WorkflowPatch:
+    """Builds the update steps for a list of operations.
+
+    element_ids holds the ids currently in "nodes" and "edges"; it is updated
+    as operations add and remove elements so later operations see the result.
+    """
+
+    def __init__(self, element_ids: Dict[str, Set]):
+        self.element_ids = {field: set(element_ids.get(field, ())) for field in ARRAY_FIELDS}
+        self.steps: List[UpdateStep] = [UpdateStep()]
+
+    def _emit(self, operator: str, path: str, value=None, element=None):
+        """Add an operation to the current step, or start a new one on conflict.
+
+        element is (field, id, rest) for a path inside one array element,
+        whose positional path depends on the step it lands in.
+        """
+        step = self.steps[-1]
+        if element:
+            field, element_id, rest = element
+            probe = UpdateStep()
+            probe.identifiers = dict(step.identifiers)
+            path = ".".join([probe.element(field, element_id)] + rest)
+            if not step.fits(path, operator):
+                step = UpdateStep()
+                self.steps.append(step)
+            path = ".".join([step.element(field, element_id)] + rest)
+        elif not step.fits(path, operator):
+            step = UpdateStep()
+            self.steps.append(step)
+        step.add(operator, path, value)
+
+    def apply(self, op: str, path: str, value=None):
+        parts = _split_path(path)
+        field = parts[0]
+        if op not in ("add", "replace", "remove", "upsert"):
+            raise ValueError(f"Unsupported operation: {op}")
+
+        if field in SCALAR_FIELDS and len(parts) == 1:
+            if op == "remove":
+                raise ValueError(f"{path} cannot be removed")
+            self._emit("$set", field, value)
+
+        elif field == "insights":
+            dotted = ".".join(parts)
+            if parts[-1] == "-":
+                if op != "add":
+                    raise ValueError(f"Only add can append to {path}")
+                self._emit("$push", ".".join(parts[:-1]), value)
+            elif op == "remove":
+                if parts[-1].isdigit():
+                    raise ValueError(f"Remove list items through /insights/... with a replace of the list: {path}")
+                self._emit("$unset", dotted)
+            else:
+                self._emit("$set", dotted, value)
+
+        elif field in ARRAY_FIELDS and len(parts) >= 2:
+            self._apply_element(op, field, parts[1], parts[2:], value, path)
+
+        else:
+            raise ValueError(f"Unsupported path: {path}")
+
+    def _apply_element(self, op: str, field: str, element_id: str, rest: List[str], value, path: str):
+        ids = self.element_ids[field]
+        if element_id == "-":
+            if op != "add" or rest:
+                raise ValueError(f"Only add can append to /{field}/-")
+            if not isinstance(value, dict) or "id" not in value:
+                raise ValueError(f"Value added to /{field} needs an id")
+            element_id = value["id"]
+            if element_id in ids:
+                raise ValueError(f"/{field} already has an element with id {element_id}")
+            ids.add(element_id)
+            self._emit("$push", field, value)
+            return
+
+        exists = element_id in ids
+        if not rest:
+            if op == "remove":
+                if not exists:
+                    raise ValueError(f"No element with id {element_id} in /{field}")
+                ids.discard(element_id)
+                self._emit("$pull", field, element_id)
+                return
+            if not isinstance(value, dict):
+                raise ValueError(f"Value for {path} must be an object")
+            value = {**value, "id": element_id}
+            if exists:
+                self._emit("$set", None, value, element=(field, element_id, []))
+            elif op == "replace":
+                raise ValueError(f"No element with id {element_id} in /{field}")
+            else:
+                ids.add(element_id)
+                self._emit("$push", field, value)
+            return
+
+        if not exists:
+            raise ValueError(f"No element with id {element_id} in /{field}")
+        if rest == ["id"]:
+            raise ValueError(f"{path} cannot be changed")
+        if op == "remove":
+            self._emit("$unset", None, element=(field, element_id, rest))
+        else:
+            self._emit("$set", None, value, element=(field, element_id, rest))
@@ -0,0 +1,106 @@
+"""Throughput of the audio post-processing stage, in seconds of audio per CPU-second.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_audio_fx --segments 12 --seconds 20
+
+Builds synthetic speech-like segments (harmonic voices with syllable
+envelopes and pauses, two speakers at different levels) and times each
+operation of app.agents.audio_fx on them, then the whole chain as
+process_podcast runs it between decoding and encoding. Decoding and
+encoding are left out: they are one ffmpeg pipe per file whatever the
+effects. One JSON object per operation.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.agents import audio_fx
+from app.agents.audio_fx import Effects
+
+
+def make_segment(seconds: float, pitch_hz: float, level: float, rng: np.random.Generator, rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    # Wobbling fundamental with decaying harmonics
+    f0 = pitch_hz * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    # Syllables of about 200 ms, some of them silent
+    syllables = np.repeat(rng.random(int(seconds * 5) + 1) > 0.25, rate // 5)[:len(t)]
+    envelope = np.convolve(syllables.astype(float), np.hanning(rate // 50) / (rate // 100), mode="same")
+    signal = level * voice * envelope / np.max(np.abs(voice)) + 0.001 * rng.standard_normal(len(t))
+    # Leading and trailing silence, as TTS renders have
+    pad = np.zeros(int(0.4 * rate))
+    return np.concatenate([pad, signal, pad]).astype(np.float32)
+
+
+def measure(name: str, operation, segments, rate: int, repeat: int) -> dict:
+    audio_seconds = sum(len(x) for x in segments) / rate * repeat
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        operation(segments)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return {
+        "operation": name,
+        "audio_seconds": round(audio_seconds, 1),
+        "cpu_seconds": round(cpu, 3),
+        "audio_seconds_per_cpu_second": round(audio_seconds / cpu, 1) if cpu else None,
+        "realtime_factor": round(audio_seconds / wall, 1) if wall else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=12)
+    parser.add_argument("--seconds", type=float, default=20.0, help="length of each segment")
+    parser.add_argument("--speed", type=float, default=1.25)
+    parser.add_argument("--pitch", type=float, default=0.9)
+    parser.add_argument("--volume", type=float, default=1.2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rate = audio_fx.AUDIO_SAMPLE_RATE
+    rng = np.random.default_rng(args.seed)
+    speakers = [("a", "b")[i % 2] for i in range(args.segments)]
+    segments = [
+        make_segment(args.seconds, 120 if speaker == "a" else 210, 0.6 if speaker == "a" else 0.15, rng, rate)
+        for speaker in speakers
+    ]
+    effects = Effects.from_dict({"speed": args.speed, "pitch": args.pitch, "volume": args.volume})
+    chain = [effects if speaker == "a" else Effects() for speaker in speakers]
+
+    operations = [
+        ("gain", lambda xs: [x * np.float32(effects.volume) for x in xs]),
+        ("time_stretch", lambda xs: [audio_fx.time_stretch(x, effects.speed) for x in xs]),
+        ("pitch_shift", lambda xs: [audio_fx.resample(audio_fx.time_stretch(x, 1 / effects.pitch), effects.pitch) for x in xs]),
+        ("speed_and_pitch", lambda xs: [audio_fx.apply_effects(x, effects) for x in xs]),
+        ("trim_silence", lambda xs: [audio_fx.trim_silence(x, rate) for x in xs]),
+        ("loudness", lambda xs: [audio_fx.loudness(x, rate) for x in xs]),
+        ("normalize_speakers", lambda xs: audio_fx.normalize_speakers(xs, speakers, rate)),
+        ("chain", lambda xs: audio_fx.process_segments(xs, chain, speakers, rate)),
+    ]
+    for name, operation in operations:
+        print(json.dumps(measure(name, operation, segments, rate, args.repeat)))
+
+    def speaker_loudness(xs) -> dict:
+        return {
+            name: round(audio_fx.loudness(np.concatenate([x for x, s in zip(xs, speakers) if s == name]), rate), 2)
+            for name in ("a", "b")
+        }
+
+    # Speakers should end up at the same loudness, and speaker "a" shorter by its speed
+    processed = audio_fx.process_segments(segments, chain, speakers, rate)
+    print(json.dumps({
+        "operation": "check",
+        "loudness_before": speaker_loudness(segments),
+        "loudness_after": speaker_loudness(processed),
+        "seconds_before": round(sum(len(x) for x in segments) / rate, 1),
+        "seconds_after": round(sum(len(x) for x in processed) / rate, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compare debate prompt sizes: the whole research every turn against the token budget.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_debate_prompt --research-words 500 2000 8000
+
+For each research length, builds the prompts of a six-turn debate (with
+stand-in responses of --response-words words) both ways and reports prompt
+tokens per turn and per debate, the prefix shared by all turns of a speaker
+(what a provider-side prompt cache can reuse), and the time spent building
+prompts. One JSON object per research length.
+
+No LLM is called. Tokens are counted with tiktoken if its encoding is
+available locally, estimated otherwise (see "tokenizer" in the output).
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from app.agents.debate_prompt import DebatePromptBuilder, count_tokens, estimate_tokens
+from app.agents.debaters import BELIEVER_TURN_MESSAGES, SKEPTIC_TURN_MESSAGES
+from app.agents.providers import providers
+
+_TOPICS = [
+    "solar adoption", "grid storage", "battery recycling", "rural broadband", "heat pumps", "public transit",
+    "carbon pricing", "water rights", "wildfire insurance", "urban farming", "nuclear licensing", "ev charging",
+]
+_FILLER = (
+    "analysts reported that costs fell while deployment grew in several regions and critics pointed to "
+    "uneven results and the need for longer studies before drawing firm conclusions"
+).split()
+
+# The prompts before the budget: research in the middle of the user message, sent whole
+_LEGACY_USER = {
+    "skeptic": "Based on this research and the believer's last response (if any), provide your perspective for "
+               "turn {turn_number}:\n\nResearch: {research}\nBeliever's last response: {believer_response}",
+    "believer": "Based on this research and the skeptic's last response (if any), provide your perspective for "
+                "turn {turn_number}:\n\nResearch: {research}\nSkeptic's last response: {skeptic_response}",
+}
+
+
+def make_research(words: int, rng: random.Random) -> str:
+    """Paragraphs of about 80 words, each mostly about one topic."""
+    paragraphs = []
+    while sum(len(p.split()) for p in paragraphs) < words:
+        topic = rng.choice(_TOPICS)
+        sentences = [
+            f"On {topic}, " + " ".join(rng.choice(_FILLER) for _ in range(12)) + f" for {topic}."
+            for _ in range(5)
+        ]
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def make_response(words: int, rng: random.Random) -> str:
+    topics = rng.sample(_TOPICS, 2)
+    return " ".join(rng.choice(_FILLER + topics * 4) for _ in range(words))
+
+
+def common_prefix(texts) -> int:
+    """Tokens of the longest common prefix of texts."""
+    prefix = os.path.commonprefix(list(texts))
+    return count_tokens(prefix) if prefix else 0
+
+
+def prompt_text(messages) -> str:
+    return "\n".join(f"{message.type}: {message.content}" for message in messages)
+
+
+def run_debate(research: str, response_words: int, seed: int, budgeted: bool) -> dict:
+    from langchain_core.prompts import ChatPromptTemplate
+
+    rng = random.Random(seed)
+    templates = {
+        "skeptic": ChatPromptTemplate.from_messages(
+            SKEPTIC_TURN_MESSAGES if budgeted else [SKEPTIC_TURN_MESSAGES[0], ("user", _LEGACY_USER["skeptic"])]
+        ),
+        "believer": ChatPromptTemplate.from_messages(
+            BELIEVER_TURN_MESSAGES if budgeted else [BELIEVER_TURN_MESSAGES[0], ("user", _LEGACY_USER["believer"])]
+        ),
+    }
+    start = time.perf_counter()
+    builder = DebatePromptBuilder(research) if budgeted else DebatePromptBuilder(research, budget=10 ** 9)
+    turns, texts = [], {"skeptic": [], "believer": []}
+    last = {"skeptic": "", "believer": ""}
+    for turn in range(1, 4):
+        for role, other in (("skeptic", "believer"), ("believer", "skeptic")):
+            prompt = builder.build(
+                templates[role], role, last[other],
+                name=role.title(), turn_number=turn, **{f"{other}_response": last[other]}
+            )
+            turns.append(prompt.tokens)
+            texts[role].append(prompt_text(prompt.messages))
+            last[role] = make_response(response_words, rng)
+    seconds = time.perf_counter() - start
+    return {
+        "tokens_per_turn": turns,
+        "tokens_per_debate": sum(turns),
+        "shared_prefix_tokens": {role: common_prefix(role_texts) for role, role_texts in texts.items()},
+        "build_ms": round(seconds * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--research-words", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--response-words", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tokenizer = "estimate" if providers.get("tokenizer") is estimate_tokens else "tiktoken"
+    for words in args.research_words:
+        research = make_research(words, random.Random(args.seed))
+        legacy = run_debate(research, args.response_words, args.seed, budgeted=False)
+        budgeted = run_debate(research, args.response_words, args.seed, budgeted=True)
+        print(json.dumps({
+            "research_words": words,
+            "research_tokens": count_tokens(research),
+            "tokenizer": tokenizer,
+            "legacy": legacy,
+            "budgeted": budgeted,
+            "saved_tokens_pct": round(100 * (1 - budgeted["tokens_per_debate"] / legacy["tokens_per_debate"]), 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
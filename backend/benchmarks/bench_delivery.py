@@ -0,0 +1,110 @@
+"""Bytes sent per listening session: the old StaticFiles mount against the audio endpoint.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_delivery --megabytes 20 --sessions 50
+
+A session plays part of a podcast the way a media element does: it fetches
+the file in Range windows from the start, seeks a few times and fetches
+windows from there, then comes back later and revalidates with
+If-None-Match. The StaticFiles mount of this Starlette version ignores
+Range and sends the whole file for every request. Both are driven in
+process over ASGI. One JSON object per server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.staticfiles import StaticFiles
+
+from app.delivery import AudioDelivery
+
+_WINDOW = 1024 * 1024
+
+
+def static_app(directory: str) -> FastAPI:
+    app = FastAPI()
+    app.mount("/audio", StaticFiles(directory=directory), name="audio")
+    return app
+
+
+def delivery_app(directory: str) -> FastAPI:
+    app = FastAPI()
+    delivery = AudioDelivery(directory)
+
+    @app.get("/audio/{podcast_dir}/{filename}")
+    async def get_audio_file(podcast_dir: str, filename: str, request: Request):
+        path = delivery.resolve(podcast_dir, filename)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return await delivery.serve(request, path)
+
+    return app
+
+
+async def listen(client: httpx.AsyncClient, url: str, size: int, rng: random.Random, seeks: int, windows: int) -> int:
+    """Bytes received by one session."""
+    received = 0
+    etag = None
+    starts = [0] + [rng.randrange(0, size) for _ in range(seeks)]
+    for start in starts:
+        for window in range(windows):
+            first = start + window * _WINDOW
+            if first >= size:
+                break
+            response = await client.get(url, headers={"Range": f"bytes={first}-{first + _WINDOW - 1}"})
+            received += len(response.content)
+            etag = response.headers.get("etag", etag)
+    # Coming back to the same episode
+    response = await client.get(url, headers={"If-None-Match": etag} if etag else {})
+    return received + len(response.content)
+
+
+async def run(name: str, app: FastAPI, url: str, size: int, args) -> dict:
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        sent = [await listen(client, url, size, rng, args.seeks, args.windows) for _ in range(args.sessions)]
+        seconds = time.perf_counter() - start
+    return {
+        "server": name,
+        "file_bytes": size,
+        "sessions": args.sessions,
+        "bytes_per_session": round(sum(sent) / len(sent)),
+        "full_files_per_session": round(sum(sent) / len(sent) / size, 2),
+        "seconds": round(seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=20)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seeks", type=int, default=3)
+    parser.add_argument("--windows", type=int, default=2, help="1 MB Range windows fetched after each seek")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(directory, "podcast"))
+        size = int(args.megabytes * 1024 * 1024)
+        with open(os.path.join(directory, "podcast", "final_podcast.mp3"), "wb") as f:
+            f.write(os.urandom(size))
+        url = "/audio/podcast/final_podcast.mp3"
+        for name, app in (("static_files", static_app(directory)), ("audio_endpoint", delivery_app(directory))):
+            print(json.dumps(asyncio.run(run(name, app, url, size, args))))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
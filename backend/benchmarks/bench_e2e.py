@@ -0,0 +1,398 @@
+"""End-to-end load benchmark of the app against local stand-ins for every upstream.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_e2e --concurrency 4 --requests 20 --output before.json
+    python -m benchmarks.bench_e2e --scenarios crud --concurrency 32 --requests 2000
+
+Starts benchmarks.fake_upstreams (OpenAI chat/TTS and Tavily) and the app
+under uvicorn, each in its own process, then drives the selected scenarios
+one after another at the given concurrency:
+
+    stream   POST /generate-podcast/stream (research, debate, TTS, merge)
+    resume   the same, disconnecting after the first debate event and
+             reconnecting with Last-Event-ID; checks no event is lost
+    direct   POST /direct-podcast
+    text     POST /generate-text-podcast
+    crud     agents, workflows, podcast library and profile endpoints
+             (the library listing needs a real Mongo)
+
+The app uses an in-memory Mongo by default (mongomock://, requires
+mongomock-motor) or the one given with --mongo-url. Its research, search and
+TTS caches are off unless --warm-caches is given, so every request does the
+full work. The app runs in a temporary directory, so rendered audio does not
+land in temp_audio.
+
+Reports, per scenario, latency and time-to-first-byte percentiles, throughput,
+errors and the app's peak RSS, as one JSON object (see --output) that can be
+compared between commits. Options not listed here are passed to the fake
+upstreams (token rate, latencies, payload sizes); see its --help.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from benchmarks.fake_upstreams import add_arguments as add_upstream_arguments
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("stream", "resume", "direct", "text", "crud")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def pick(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(samples[-1] * 1000, 2)}
+
+
+def read_status(pid: int, field: str):
+    """A memory figure from /proc/<pid>/status in MiB, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss(pid: int):
+    # Linux resets VmHWM to the current RSS when "5" is written to clear_refs
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def start(module_args, port: int, env: dict, cwd: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", *module_args, "--host", "127.0.0.1", "--port", str(port)],
+        env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                await client.get(url, timeout=1.0)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not start within {timeout}s")
+
+
+class Result:
+    """Samples for one scenario."""
+
+    def __init__(self):
+        self.latencies = []
+        self.ttfb = []
+        self.errors = 0
+        self.error_samples = []
+        self.by_operation = {}
+
+    def record(self, operation: str, latency: float, ttfb: float, error: str = None):
+        self.latencies.append(latency)
+        self.ttfb.append(ttfb)
+        self.by_operation.setdefault(operation, []).append(latency)
+        if error:
+            self.errors += 1
+            if len(self.error_samples) < 5:
+                self.error_samples.append(f"{operation}: {error}"[:300])
+
+
+async def timed_request(client: httpx.AsyncClient, method: str, url: str, **kwargs):
+    """(latency, ttfb, status, body) with TTFB taken at the first body byte."""
+    start = time.perf_counter()
+    ttfb = None
+    body = bytearray()
+    async with client.stream(method, url, **kwargs) as response:
+        async for data in response.aiter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            body.extend(data)
+    latency = time.perf_counter() - start
+    return latency, ttfb if ttfb is not None else latency, response.status_code, bytes(body)
+
+
+def topic() -> str:
+    return f"Benchmark topic {uuid.uuid4().hex[:8]}: community solar programs"
+
+
+def direct_blocks(count: int):
+    voices = ("alloy", "echo")
+    return [
+        {
+            "content": f"Turn {i + 1}. " + "This is a sentence of benchmark dialogue. " * 8,
+            "voice_id": voices[i % 2],
+            "type": ("believer", "skeptic")[i % 2],
+            "turn": i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def parse_sse(text: str):
+    """(id, event) of each complete server-sent event in text."""
+    events = []
+    for block in text.split("\n\n")[:-1]:
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if "data" in fields:
+            events.append((int(fields["id"]), json.loads(fields["data"])))
+    return events
+
+
+def stream_error(status: int, events) -> str:
+    if status != 200:
+        return f"HTTP {status}"
+    if not any(event.get("type") == "success" for _, event in events):
+        return next((str(e.get("content")) for _, e in events if e.get("type") == "error"), "no success event")
+    return None
+
+
+def stream_payload() -> dict:
+    return {"topic": topic(), "believer_voice_id": "alloy", "skeptic_voice_id": "echo"}
+
+
+async def run_stream(client, headers, index, result: Result):
+    latency, ttfb, status, body = await timed_request(
+        client, "POST", "/generate-podcast/stream", json=stream_payload(), headers=headers
+    )
+    events = parse_sse(body.decode())
+    result.record("generate-podcast/stream", latency, ttfb, stream_error(status, events))
+
+
+async def run_resume(client, headers, index, result: Result):
+    start = time.perf_counter()
+    text, ttfb = "", None
+    async with client.stream("POST", "/generate-podcast/stream", json=stream_payload(), headers=headers) as response:
+        stream_id = response.headers.get("x-stream-id")
+        async for data in response.aiter_text():
+            ttfb = ttfb or time.perf_counter() - start
+            text += data
+            if any(event["type"] in ("believer", "skeptic") for _, event in parse_sse(text)):
+                break
+    events = parse_sse(text)
+    await asyncio.sleep(0.5)
+    resume_headers = {**headers, "Last-Event-ID": str(events[-1][0])}
+    _, _, status, body = await timed_request(
+        client, "GET", f"/generate-podcast/stream/{stream_id}", headers=resume_headers
+    )
+    events += parse_sse(body.decode())
+    error = stream_error(status, events)
+    if error is None and [seq for seq, _ in events] != list(range(1, len(events) + 1)):
+        error = "event ids not contiguous after reconnecting"
+    result.record("generate-podcast/stream resume", time.perf_counter() - start, ttfb, error)
+
+
+async def run_podcast(client, headers, index, result: Result, operation: str, payload: dict):
+    latency, ttfb, status, body = await timed_request(client, "POST", f"/{operation}", json=payload, headers=headers)
+    error = None
+    if status != 200:
+        error = f"HTTP {status}"
+    elif json.loads(body).get("status") != "completed":
+        error = json.loads(body).get("error") or "not completed"
+    result.record(operation, latency, ttfb, error)
+
+
+async def run_direct(client, headers, index, result: Result, blocks: int):
+    payload = {"topic": topic(), "conversation_blocks": direct_blocks(blocks)}
+    await run_podcast(client, headers, index, result, "direct-podcast", payload)
+
+
+async def run_text(client, headers, index, result: Result):
+    payload = {"text": "A paragraph of benchmark narration for a single voice. " * 10, "voice_id": "nova"}
+    await run_podcast(client, headers, index, result, "generate-text-podcast", payload)
+
+
+def crud_operations(index: int, library: bool):
+    """(name, method, url, request options) of one request of a fixed read-heavy mix."""
+    agent = {"name": f"Agent {index}", "voice_id": "alloy", "voice_name": "Alloy", "voice_description": "",
+             "speed": 1.0, "pitch": 1.0, "volume": 1.0, "output_format": "mp3", "personality": "curious"}
+    workflow = {"name": f"Workflow {index}", "description": "benchmark",
+                "nodes": [{"id": f"n{i}", "type": "agent", "data": {}} for i in range(10)],
+                "edges": [{"id": f"e{i}", "source": f"n{i}", "target": f"n{i + 1}"} for i in range(9)]}
+    operations = [
+        ("create agent", "POST", "/agents/create", {"json": agent}),
+        ("create workflow", "POST", "/api/workflows", {"json": workflow}),
+        ("list agents", "GET", "/agents", {}),
+        ("list workflows", "GET", "/api/workflows", {}),
+        ("profile", "GET", "/user/me", {}),
+    ]
+    if library:
+        operations.append(("list podcasts", "GET", "/podcasts", {"params": {"limit": 20}}))
+    return operations[index % len(operations)]
+
+
+async def run_crud(client, headers, index, result: Result, library: bool):
+    name, method, url, kwargs = crud_operations(index, library)
+    latency, ttfb, status, _ = await timed_request(client, method, url, headers=headers, **kwargs)
+    result.record(name, latency, ttfb, None if status < 400 else f"HTTP {status}")
+
+
+async def run_scenario(client, headers, runner, requests: int, concurrency: int) -> dict:
+    result = Result()
+    indexes = iter(range(requests))
+
+    async def worker():
+        for index in indexes:
+            try:
+                await runner(client, headers, index, result)
+            except (httpx.HTTPError, ValueError) as e:
+                result.record("request", 0.0, 0.0, f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+    report = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": result.errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(requests / wall, 3) if wall else None,
+        "latency": percentiles(result.latencies),
+        "ttfb": percentiles(result.ttfb),
+    }
+    if len(result.by_operation) > 1:
+        report["operations"] = {name: percentiles(samples) for name, samples in result.by_operation.items()}
+    if result.error_samples:
+        report["error_samples"] = result.error_samples
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, upstream_args, upstream_settings):
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    upstream_port, app_port = free_port(), free_port()
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    upstream = start(["benchmarks.fake_upstreams", *upstream_args], upstream_port, env, BACKEND_DIR)
+
+    app_env = {
+        **env,
+        "MONGODB_URL": args.mongo_url,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{upstream_port}/v1",
+        "TAVILY_API_URL": f"http://127.0.0.1:{upstream_port}",
+        "OPENAI_API_KEY": "sk-benchmark",
+        "TAVILY_API_KEY": "tvly-benchmark",
+        "SECRET_KEY": env.get("SECRET_KEY", "benchmark"),
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache"),
+    }
+    if not args.warm_caches:
+        app_env.update(TTS_CACHE_MAX_BYTES="0", RESEARCH_CACHE_TTL_SECONDS="0", SEARCH_CACHE_TTL_SECONDS="0")
+    server = start(["uvicorn", "app.main:app", "--log-level", "warning"], app_port, app_env, workdir)
+
+    report = {
+        "commit": git_commit(),
+        "mongo": args.mongo_url.split("://")[0],
+        "warm_caches": args.warm_caches,
+        "upstreams": vars(upstream_settings),
+        "scenarios": {},
+    }
+    try:
+        await wait_ready(f"http://127.0.0.1:{upstream_port}/counters", upstream)
+        await wait_ready(f"http://127.0.0.1:{app_port}/", server)
+        report["idle_rss_mb"] = read_status(server.pid, "VmRSS")
+
+        timeout = httpx.Timeout(args.timeout, connect=10.0)
+        limits = httpx.Limits(max_connections=args.concurrency + 4)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=timeout, limits=limits) as client:
+            username, password = f"bench_{uuid.uuid4().hex[:8]}", "benchmark-password"
+            (await client.post("/signup", json={"username": username, "password": password})).raise_for_status()
+            login = await client.post("/login", json={"username": username, "password": password})
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            runners = {
+                "stream": run_stream,
+                "resume": run_resume,
+                "direct": lambda *a: run_direct(*a, blocks=args.direct_blocks),
+                "text": run_text,
+                # mongomock cannot run the library's summary projection
+                "crud": lambda *a: run_crud(*a, library=not args.mongo_url.startswith("mongomock://")),
+            }
+            for name in args.scenarios:
+                reset_peak_rss(server.pid)
+                requests = args.crud_requests if name == "crud" else args.requests
+                scenario = await run_scenario(client, headers, runners[name], requests, args.concurrency)
+                scenario["peak_rss_mb"] = read_status(server.pid, "VmHWM")
+                report["scenarios"][name] = scenario
+                print(f"{name}: {json.dumps(scenario)}", file=sys.stderr)
+
+        async with httpx.AsyncClient() as client:
+            report["upstream_calls"] = (await client.get(f"http://127.0.0.1:{upstream_port}/counters")).json()
+    finally:
+        for process in (server, upstream):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        subprocess.run(["rm", "-rf", workdir])
+    return report
+
+
+def upstream_args_namespace(upstream_args):
+    parser = argparse.ArgumentParser()
+    add_upstream_arguments(parser)
+    return parser.parse_args(upstream_args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=8, help="requests per podcast scenario")
+    parser.add_argument("--crud-requests", type=int, default=600)
+    parser.add_argument("--direct-blocks", type=int, default=6, help="conversation blocks per direct podcast")
+    parser.add_argument("--mongo-url", default="mongomock://benchmark")
+    parser.add_argument("--warm-caches", action="store_true", help="leave the research, search and TTS caches on")
+    parser.add_argument("--timeout", type=float, default=600.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args, upstream_args = parser.parse_known_args()
+    # Parsed here too so unknown options fail before anything starts
+    upstream_settings = upstream_args_namespace(upstream_args)
+
+    report = asyncio.run(run(args, upstream_args, upstream_settings))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Measure how a login storm affects the latency of unrelated endpoints.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_login_storm --logins 100
+    python -m benchmarks.bench_login_storm --logins 100 --inline   # hash on the event loop, for comparison
+
+The app is driven in-process through httpx's ASGI transport, so every request
+shares one event loop exactly like under uvicorn. While the logins run, GET /
+is probed continuously and its p50/p99 latency is compared with an idle
+baseline. Uses the Mongo at MONGODB_URL, or an in-memory one with --in-memory
+(requires mongomock-motor). Prints one JSON object.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("TTS_CACHE_MAX_BYTES", "0")
+
+import httpx  # noqa: E402
+
+from app import main as app_main  # noqa: E402
+from app.passwords import pwd_context  # noqa: E402
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def pick(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+
+    return {"n": len(samples), "p50_ms": pick(0.50), "p99_ms": pick(0.99), "max_ms": round(samples[-1] * 1000, 2)}
+
+
+async def probe(client, until: asyncio.Event, interval: float):
+    """Request GET / on a fixed schedule until the event is set.
+
+    Latency is measured from the planned send time, so time the probe spent
+    waiting for a blocked event loop counts against it.
+    """
+    latencies = []
+    next_at = time.perf_counter()
+    while True:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        response = await client.get("/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - next_at)
+        if until.is_set():
+            return latencies
+        next_at += interval
+
+
+async def timed_login(client, username, password):
+    start = time.perf_counter()
+    response = await client.post("/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(args):
+    if args.in_memory:
+        from mongomock_motor import AsyncMongoMockClient
+        app_main.users = AsyncMongoMockClient().podcraft.users
+    if args.inline:
+        # The pre-executor behaviour: bcrypt runs on the event loop
+        async def verify_inline(password, hashed_password):
+            return pwd_context.verify_and_update(password, hashed_password)
+
+        async def hash_inline(password):
+            return pwd_context.hash(password)
+
+        app_main.verify_password = verify_inline
+        app_main.hash_password = hash_inline
+
+    username, password = f"bench_{uuid.uuid4().hex[:8]}", "benchmark-password"
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.post("/signup", json={"username": username, "password": password})).raise_for_status()
+
+        idle = asyncio.Event()
+        baseline_task = asyncio.create_task(probe(client, idle, args.probe_interval))
+        await asyncio.sleep(args.baseline_seconds)
+        idle.set()
+        baseline = await baseline_task
+
+        done = asyncio.Event()
+        storm_probe = asyncio.create_task(probe(client, done, args.probe_interval))
+        start = time.perf_counter()
+        logins = await asyncio.gather(*[timed_login(client, username, password) for _ in range(args.logins)])
+        storm_seconds = time.perf_counter() - start
+        done.set()
+        during = await storm_probe
+
+        await app_main.users.delete_one({"username": username})
+
+    return {
+        "mode": "inline" if args.inline else "executor",
+        "logins": args.logins,
+        "bcrypt_rounds": pwd_context.to_dict().get("bcrypt__rounds"),
+        "storm_seconds": round(storm_seconds, 3),
+        "login_latency": percentiles(logins),
+        "probe_idle": percentiles(baseline),
+        "probe_during_storm": percentiles(during),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop instead of the executor")
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of MONGODB_URL")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
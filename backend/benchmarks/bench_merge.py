@@ -0,0 +1,98 @@
+"""Benchmark the frame-level MP3 merge against the ffmpeg re-encode path.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_merge --segments 10 50 200
+
+Prints one JSON object per podcast size. The ffmpeg path is skipped when
+ffmpeg is not on PATH (the fixture is then built from blank MP3 frames).
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TTS_CACHE_MAX_BYTES", "0")
+
+from app.agents import mp3  # noqa: E402
+from app.agents.podcast_manager import PodcastManager  # noqa: E402
+
+
+def make_segment(path: str, seconds: float):
+    """Write one TTS-like segment: 24 kHz mono MP3 at 64 kbps."""
+    if shutil.which("ffmpeg"):
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+            "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "64k", path
+        ], capture_output=True, check=True)
+        return
+    header = mp3.parse_header(mp3._encode_header(2, 3, 64, 24000, mp3.MONO))
+    frame = mp3._encode_header(2, 3, 64, 24000, mp3.MONO) + bytes(header.frame_length - 4)
+    with open(path, "wb") as f:
+        f.write(frame * round(seconds / header.duration))
+
+
+def timed(fn, *args):
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    start_children = os.times()
+    # Keep the merge's progress prints out of the JSON output
+    with contextlib.redirect_stdout(sys.stderr):
+        ok = fn(*args)
+    end_children = os.times()
+    children_cpu = (end_children.children_user - start_children.children_user
+                    + end_children.children_system - start_children.children_system)
+    return ok, time.perf_counter() - start_wall, time.process_time() - start_cpu + children_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--segment-seconds", type=float, default=20.0)
+    parser.add_argument("--silence", type=float, default=1.0)
+    args = parser.parse_args()
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    workdir = tempfile.mkdtemp(prefix="bench_merge_")
+    try:
+        os.chdir(workdir)
+        manager = PodcastManager()
+        segment = os.path.join(workdir, "segment.mp3")
+        make_segment(segment, args.segment_seconds)
+
+        for count in args.segments:
+            files = []
+            for i in range(count):
+                path = os.path.join(workdir, f"part_{i}.mp3")
+                shutil.copyfile(segment, path)
+                files.append(path)
+            silences = [0] + [args.silence] * (count - 1)
+
+            ok, wall, cpu = timed(mp3.concat_files, files, os.path.join(workdir, "frames.mp3"), silences)
+            result = {
+                "segments": count,
+                "audio_seconds": round(mp3.probe_duration(os.path.join(workdir, "frames.mp3")), 2),
+                "frame_merge": {"ok": ok, "wall_s": round(wall, 4), "cpu_s": round(cpu, 4)},
+                "ffmpeg_merge": None,
+            }
+            if has_ffmpeg:
+                ok, wall, cpu = timed(manager._merge_with_ffmpeg, files, os.path.join(workdir, "ffmpeg.mp3"), silences)
+                result["ffmpeg_merge"] = {"ok": ok, "wall_s": round(wall, 4), "cpu_s": round(cpu, 4)}
+                result["speedup"] = round(result["ffmpeg_merge"]["wall_s"] / result["frame_merge"]["wall_s"], 1)
+            print(json.dumps(result))
+            sys.stdout.flush()
+    finally:
+        os.chdir("/")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Time a panel debate generated concurrently against the same panel one turn at a time.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_panel --agents 4 --rounds 3 --token-rate 50
+
+Starts benchmarks.fake_upstreams as the OpenAI endpoint and runs
+generate_panel_stream on a panel of --agents stand-in agents, first with
+--max-concurrency, then with one turn at a time (the sequential cost).
+Reports time to the first token and to the full transcript of each, and
+their ratio, as one JSON object. Options not listed here are passed to the
+fake upstreams (token rate, first token latency, turn length).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+
+from benchmarks.bench_e2e import BACKEND_DIR, free_port, start, wait_ready
+
+
+def make_panel(count: int):
+    voices = ("alloy", "echo", "fable", "onyx", "nova", "shimmer")
+    return {
+        f"agent{i}": {
+            "_id": f"agent{i}", "name": f"Panelist {i + 1}", "voice_id": voices[i % len(voices)],
+            "personality": ("optimistic", "skeptical", "pragmatic", "contrarian")[i % 4], "speed": 1.0,
+        }
+        for i in range(count)
+    }
+
+
+async def run_panel(panel, schedule, max_concurrency: int) -> dict:
+    from app.agents.panel import generate_panel_stream
+
+    start_time = time.perf_counter()
+    first_token = None
+    tokens = 0
+    async for event in generate_panel_stream("Stand-in research. " * 50, panel, schedule, max_concurrency):
+        if event.type == "error":
+            raise RuntimeError(event.content)
+        first_token = first_token or time.perf_counter() - start_time
+        tokens += 1
+    return {
+        "max_concurrency": max_concurrency,
+        "first_token_s": round(first_token, 3),
+        "transcript_s": round(time.perf_counter() - start_time, 3),
+        "token_events": tokens,
+    }
+
+
+async def run(args):
+    from app.agents.panel import default_schedule
+    from app.agents.providers import providers
+
+    # Built up front so neither run pays for importing the LLM libraries
+    providers.warm(["panel_llm", "panelist_turn_prompt", "tokenizer"])
+    panel = make_panel(args.agents)
+    schedule = default_schedule(list(panel), args.rounds)
+    concurrent = await run_panel(panel, schedule, args.max_concurrency)
+    sequential = await run_panel(panel, schedule, 1)
+    return {
+        "agents": args.agents,
+        "rounds": args.rounds,
+        "turns": args.agents * args.rounds,
+        "concurrent": concurrent,
+        "sequential": sequential,
+        "speedup": round(sequential["transcript_s"] / concurrent["transcript_s"], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args, upstream_args = parser.parse_known_args()
+
+    port = free_port()
+    upstream = start(["benchmarks.fake_upstreams", *upstream_args], port, {**os.environ}, BACKEND_DIR)
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{port}/counters", upstream))
+        # Read by the agent modules at import
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+        print(json.dumps(asyncio.run(run(args))))
+    finally:
+        upstream.terminate()
+        try:
+            upstream.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            upstream.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Measure cold-start cost: importing app.main, time to ready, and building the agents.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup --runs 5 --budget 2.5
+
+Every measurement runs in a fresh interpreter. Reported medians:
+
+    import_s    python -c "import app.main"
+    warm_s      building every registered provider (LLM clients, agents) afterwards
+    ready_s     from starting uvicorn until GET / answers
+
+Exits with status 1 if the median import time is over --budget seconds, or if
+importing app.main loads any of the agent libraries (langchain, openai,
+tavily) that are meant to be imported on first use. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_PREFIXES = ("langchain", "langchain_core", "langchain_community", "langchain_openai", "openai", "tavily")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+import_s = time.perf_counter() - start
+lazy = sorted({name.split(".")[0] for name in sys.modules if name.split(".")[0] in %r})
+from app.agents.providers import providers
+start = time.perf_counter()
+providers.warm()
+warm_s = time.perf_counter() - start
+print(json.dumps({"import_s": import_s, "warm_s": warm_s, "lazy_loaded": lazy, "providers": providers.stats()}))
+""" % (LAZY_PREFIXES,)
+
+
+def environment(mongo_url: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    env.setdefault("SECRET_KEY", "benchmark")
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+    env.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+    env["MONGODB_URL"] = mongo_url
+    env["PRELOAD_AGENTS"] = "false"
+    return env
+
+
+def measure_import(env: dict, workdir: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE], env=env, cwd=workdir, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_ready(env: dict, workdir: str, timeout: float = 60.0) -> float:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"app not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.5, help="maximum median import time in seconds")
+    parser.add_argument("--mongo-url", default="mongomock://benchmark",
+                        help="the startup hooks create indexes, so ready_s includes the Mongo round trips")
+    args = parser.parse_args()
+
+    env = environment(args.mongo_url)
+    # The app creates temp directories relative to its working directory
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        imports = [measure_import(env, workdir) for _ in range(args.runs)]
+        ready = [measure_ready(env, workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import_s = statistics.median(run["import_s"] for run in imports)
+    lazy_loaded = imports[0]["lazy_loaded"]
+    report = {
+        "runs": args.runs,
+        "import_s": round(import_s, 3),
+        "warm_s": round(statistics.median(run["warm_s"] for run in imports), 3),
+        "ready_s": round(statistics.median(ready), 3),
+        "providers": imports[0]["providers"]["built"],
+        "lazy_loaded_at_import": lazy_loaded,
+        "budget_s": args.budget,
+        "within_budget": import_s <= args.budget and not lazy_loaded,
+    }
+    print(json.dumps(report))
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
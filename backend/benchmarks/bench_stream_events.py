@@ -0,0 +1,106 @@
+"""Benchmark the debate event stream: per-token NDJSON against coalesced typed events.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_stream_events --turns 6 --tokens-per-turn 400 --token-rate 200
+
+A simulated debate yields tokens at --token-rate per second (0 for as fast
+as possible) and each pipeline writes the stream to a counting sink:
+
+    legacy     json.dumps per token, json.loads of every line by the
+               endpoint and string += per turn, one frame per token
+    coalesced  StreamEvent per token, pieces joined per turn, frames
+               written by encode_stream()
+
+Reports frames, bytes, wall and CPU seconds of each as one JSON object.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.agents.events import StreamEvent, encode_stream
+
+_WORDS = "the evidence suggests that adoption will keep growing although costs remain".split()
+
+
+def token(i: int) -> str:
+    return " " + _WORDS[i % len(_WORDS)]
+
+
+async def tokens(args):
+    delay = 1 / args.token_rate if args.token_rate else 0
+    for turn in range(1, args.turns + 1):
+        role = "believer" if turn % 2 else "skeptic"
+        for i in range(args.tokens_per_turn):
+            if delay:
+                await asyncio.sleep(delay)
+            yield role, (turn + 1) // 2, token(i)
+
+
+async def legacy(args):
+    async def debate():
+        async for role, turn, text in tokens(args):
+            yield json.dumps({"type": role, "name": role, "content": text, "turn": turn}) + "\n"
+
+    async def endpoint():
+        turns = {}
+        async for chunk in debate():
+            yield chunk
+            data = json.loads(chunk)
+            key = (data["type"], data["turn"])
+            if key not in turns:
+                turns[key] = ""
+            turns[key] += data["content"]
+
+    return endpoint()
+
+
+async def coalesced(args):
+    async def debate():
+        async for role, turn, text in tokens(args):
+            yield StreamEvent(role, text, name=role, turn=turn, partial=True)
+
+    async def endpoint():
+        turns = {}
+        async for event in debate():
+            yield event
+            turns.setdefault((event.type, event.turn), []).append(event.content)
+        for key, pieces in turns.items():
+            turns[key] = "".join(pieces)
+
+    return encode_stream(endpoint(), window=args.window_ms / 1000, max_chars=args.max_chars)
+
+
+async def run(pipeline, args) -> dict:
+    frames = size = 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    async for frame in await pipeline(args):
+        frames += 1
+        size += len(frame.encode())
+    return {
+        "frames": frames,
+        "bytes": size,
+        "wall_s": round(time.perf_counter() - wall, 3),
+        "cpu_s": round(time.process_time() - cpu, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--tokens-per-turn", type=int, default=400)
+    parser.add_argument("--token-rate", type=float, default=200, help="tokens per second; 0 for no delay")
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--max-chars", type=int, default=1024)
+    args = parser.parse_args()
+
+    report = {"tokens": args.turns * args.tokens_per_turn, "token_rate": args.token_rate}
+    for name, pipeline in (("legacy", legacy), ("coalesced", coalesced)):
+        report[name] = asyncio.run(run(pipeline, args))
+    report["frame_reduction"] = round(report["legacy"]["frames"] / max(report["coalesced"]["frames"], 1), 1)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Local stand-ins for the OpenAI chat/TTS and Tavily APIs, for benchmarks.
+
+Run from the backend directory:
+
+    python -m benchmarks.fake_upstreams --port 9100 --token-rate 50
+
+and point the app at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1 and
+TAVILY_API_URL=http://127.0.0.1:9100. Responses are shaped like the real
+APIs as far as the app reads them:
+
+- POST /v1/chat/completions streams SSE chunks at --token-rate tokens per
+  second after --first-token-latency. Requests offering functions (or tools)
+  get one call to the first of them with the last user message as "query",
+  which is what the research agent expects; once a function result (or an
+  assistant message naming a function) is in the conversation the reply is text. Usage is
+  reported when asked for.
+- POST /v1/audio/speech returns an MP3 of silent frames, sized at
+  --speech-chars-per-second of input, after --tts-latency.
+- POST /search returns --search-results Tavily results after --search-latency.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from app.agents import mp3
+
+# The same format the TTS API returns: 24 kHz mono, 64 kbps
+_FRAME_HEADER = mp3._encode_header(2, 3, 64, 24000, mp3.MONO)
+_FRAME = _FRAME_HEADER + bytes(mp3.parse_header(_FRAME_HEADER).frame_length - 4)
+_FRAME_SECONDS = mp3.parse_header(_FRAME_HEADER).duration
+
+_WORDS = (
+    "the quick analysis shows several promising results while experts remain cautious about costs "
+    "and long term effects on markets communities and research programs around the world"
+).split()
+
+
+def words(count: int):
+    """count words of filler text, ending a sentence every twelve words."""
+    cycle = itertools.cycle(_WORDS)
+    for i in range(1, count + 1):
+        yield next(cycle) + ("." if i % 12 == 0 or i == count else "")
+
+
+def create_app(args) -> FastAPI:
+    app = FastAPI()
+    counters = {"chat": 0, "speech": 0, "search": 0}
+
+    def chunk(model: str, delta: dict, finish_reason=None, usage=None) -> str:
+        body = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        if usage:
+            body["usage"] = usage
+        return f"data: {json.dumps(body)}\n\n"
+
+    def plan_reply(body: dict):
+        """(function name, arguments) for a function call, or (None, text tokens)."""
+        messages = body.get("messages", [])
+        functions = body.get("functions") or [t["function"] for t in body.get("tools", [])]
+        # The research prompt renders its scratchpad, calls included, into an assistant message
+        answered = any(
+            m.get("role") in ("function", "tool")
+            or (m.get("role") == "assistant" and any(f["name"] in str(m.get("content")) for f in functions))
+            for m in messages
+        )
+        if functions and not answered:
+            query = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+            return functions[0]["name"], json.dumps({"query": str(query)[:200]})
+        tokens = args.research_tokens if answered else args.completion_tokens
+        return None, list(words(tokens))
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters["chat"] += 1
+        model = body.get("model", "gpt-4o-mini")
+        function_name, reply = plan_reply(body)
+        prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in body.get("messages", []))
+        completion_tokens = len(reply) if function_name is None else len(reply.split())
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+
+        if not body.get("stream"):
+            await asyncio.sleep(args.first_token_latency + completion_tokens / args.token_rate)
+            message = {"role": "assistant", "content": None if function_name else " ".join(reply)}
+            if function_name:
+                message["function_call"] = {"name": function_name, "arguments": reply}
+            return {
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "function_call" if function_name else "stop"}],
+                "usage": usage,
+            }
+
+        async def stream():
+            await asyncio.sleep(args.first_token_latency)
+            if function_name:
+                yield chunk(model, {"role": "assistant", "content": None,
+                                    "function_call": {"name": function_name, "arguments": reply}})
+                yield chunk(model, {}, "function_call")
+            else:
+                yield chunk(model, {"role": "assistant", "content": ""})
+                for i, word in enumerate(reply):
+                    await asyncio.sleep(1 / args.token_rate)
+                    yield chunk(model, {"content": word if i == 0 else " " + word})
+                yield chunk(model, {}, "stop")
+            if body.get("stream_options", {}).get("include_usage"):
+                yield chunk(model, {}, usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/audio/speech")
+    async def speech(request: Request):
+        body = await request.json()
+        counters["speech"] += 1
+        await asyncio.sleep(args.tts_latency)
+        seconds = max(0.5, len(body.get("input", "")) / args.speech_chars_per_second / float(body.get("speed") or 1.0))
+        return Response(_FRAME * round(seconds / _FRAME_SECONDS), media_type="audio/mpeg")
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        counters["search"] += 1
+        await asyncio.sleep(args.search_latency)
+        return JSONResponse({
+            "query": body.get("query", ""),
+            "results": [
+                {
+                    "title": f"Result {i + 1}",
+                    "url": f"https://example.com/{uuid.uuid4().hex[:8]}",
+                    "content": " ".join(words(args.search_result_words)),
+                    "score": round(1 - i / 10, 2),
+                }
+                for i in range(args.search_results)
+            ],
+        })
+
+    @app.get("/counters")
+    async def get_counters():
+        return counters
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--token-rate", type=float, default=50.0, help="streamed tokens per second")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--completion-tokens", type=int, default=100, help="length of each debate turn")
+    parser.add_argument("--research-tokens", type=int, default=400, help="length of the research summary")
+    parser.add_argument("--tts-latency", type=float, default=0.5)
+    parser.add_argument("--speech-chars-per-second", type=float, default=15.0, help="audio length per input")
+    parser.add_argument("--search-latency", type=float, default=0.8)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--search-result-words", type=int, default=120)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -123,6 +123,67 @@ const isValidConnection = (connection, nodes) => {
 // Add this as a new component at the top of the file, after imports
 // This will be used to manage and display toasts
 
+// Podcasts render as background jobs on the server: submit one, then follow
+// its status stream (one JSON object per line) until it completes or fails.
+// The job carries on if the connection drops, so reconnect and keep following.
+const runPodcastJob = async (path, body, onProgress = () => {}) => {
+    const headers = {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+    };
+    const response = await fetch(`http://localhost:8000${path}`, {
+        method: 'POST',
+        headers,
+        body: JSON.stringify(body)
+    });
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || 'Failed to generate podcast');
+    }
+    const { job_id: jobId } = await response.json();
+
+    let finished = null;
+    for (let attempt = 0; !finished && attempt <= 5; attempt++) {
+        if (attempt > 0) {
+            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        }
+        try {
+            const events = await fetch(`http://localhost:8000/jobs/${jobId}/events`, { headers });
+            if (!events.ok) {
+                throw new Error(`HTTP error! status: ${events.status}`);
+            }
+            const reader = events.body.getReader();
+            const decoder = new TextDecoder();
+            // A read may stop in the middle of a line
+            let buffered = '';
+            while (!finished) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                for (const line of lines.filter(line => line.trim())) {
+                    const job = JSON.parse(line);
+                    if (job.status === 'completed' || job.status === 'failed') {
+                        finished = job;
+                        break;
+                    }
+                    onProgress(job.progress || {});
+                }
+            }
+        } catch (error) {
+            console.error('Job status stream interrupted, reconnecting:', error);
+        }
+    }
+    if (!finished) {
+        throw new Error('Lost track of the podcast job');
+    }
+    if (finished.status === 'failed') {
+        throw new Error(finished.error || 'Failed to generate podcast');
+    }
+    return finished.result;
+};
+
 const ToastContainer = ({ toast, setToast }) => {
     if (!toast || !toast.message) return null;
 
@@ -1537,26 +1598,12 @@ Understanding this topic has significant implications for policy, practice, and
         setIsGenerating(true);
         setSuccessMessage('');
         try {
-            const response = await fetch('http://localhost:8000/generate-text-podcast', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${localStorage.getItem('token')}`
-                },
-                body: JSON.stringify({
-                    text: podcastText,
-                    voice_id: selectedVoice,
-                    emotion: selectedEmotion,
-                    speed: voiceSpeed
-                })
+            const data = await runPodcastJob('/generate-text-podcast', {
+                text: podcastText,
+                voice_id: selectedVoice,
+                emotion: selectedEmotion,
+                speed: voiceSpeed
             });
-
-            if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.detail || 'Failed to generate podcast');
-            }
-
-            const data = await response.json();
             console.log('Podcast generated:', data);
 
             if (data.audio_url) {
@@ -2127,24 +2174,10 @@ Understanding this topic has significant implications for policy, practice, and
                 console.log('Generating podcast with conversation blocks:', conversationBlocks);
 
                 // Use the direct-podcast endpoint to generate the audio with multiple voices
-                const response = await fetch('http://localhost:8000/direct-podcast', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Authorization': `Bearer ${localStorage.getItem('token')}`
-                    },
-                    body: JSON.stringify({
-                        topic: topic, // Use the actual topic as the title
-                        conversation_blocks: conversationBlocks
-                    })
+                const data = await runPodcastJob('/direct-podcast', {
+                    topic: topic, // Use the actual topic as the title
+                    conversation_blocks: conversationBlocks
                 });
-
-                if (!response.ok) {
-                    const errorData = await response.json();
-                    throw new Error(errorData.detail || 'Failed to generate podcast');
-                }
-
-                const data = await response.json();
                 console.log('Debate podcast generated:', data);
 
                 if (data.audio_url) {
@@ -321,79 +321,127 @@ const Home = () => {
                 return;
             }
 
-            const response = await fetch('http://localhost:8000/generate-podcast/stream', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
-                },
-                body: JSON.stringify({
-                    topic: prompt,
-                    believer_voice_id: selectedBelieverVoice.id,
-                    skeptic_voice_id: selectedSkepticVoice.id
-                })
-            });
+            const handleEvent = (data) => {
+                switch (data.type) {
+                    case 'intermediate':
+                        setResearchSteps(prev => [...prev, data.content]);
+                        break;
+                    case 'final':
+                        setResearchSteps(prev => [...prev, 'Research completed!']);
+                        break;
+                    case 'believer':
+                        if (data.turn) {
+                            setBelieverResponses(prev => {
+                                const newResponses = [...prev];
+                                newResponses[data.turn - 1] = (newResponses[data.turn - 1] || '') + data.content;
+                                return newResponses;
+                            });
+                        }
+                        break;
+                    case 'skeptic':
+                        if (data.turn) {
+                            setSkepticResponses(prev => {
+                                const newResponses = [...prev];
+                                newResponses[data.turn - 1] = (newResponses[data.turn - 1] || '') + data.content;
+                                return newResponses;
+                            });
+                        }
+                        break;
+                    case 'success':
+                        setIsSuccess(true);
+                        setSuccessMessage(data.content || 'Podcast created successfully!');
+                        if (data.podcast_url) {
+                            setAudioUrl(`http://localhost:8000${data.podcast_url}`);
+                        }
+                        break;
+                    case 'error':
+                        console.error('Error:', data.content);
+                        break;
+                }
+                // Auto-scroll to the bottom of insights
+                if (insightsRef.current) {
+                    insightsRef.current.scrollTop = insightsRef.current.scrollHeight;
+                }
+            };
 
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
+            // Generation goes on on the server if the connection drops; reconnect
+            // with the id of the last event received to get the rest
+            let streamId = null;
+            let lastEventId = null;
+            let finished = false;
 
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-
-            while (true) {
-                const { value, done } = await reader.read();
-                if (done) break;
-
-                const chunk = decoder.decode(value);
-                const lines = chunk.split('\n').filter(line => line.trim());
-
-                for (const line of lines) {
-                    try {
-                        const data = JSON.parse(line);
-                        switch (data.type) {
-                            case 'intermediate':
-                                setResearchSteps(prev => [...prev, data.content]);
-                                break;
-                            case 'final':
-                                setResearchSteps(prev => [...prev, 'Research completed!']);
-                                break;
-                            case 'believer':
-                                if (data.turn) {
-                                    setBelieverResponses(prev => {
-                                        const newResponses = [...prev];
-                                        newResponses[data.turn - 1] = (newResponses[data.turn - 1] || '') + data.content;
-                                        return newResponses;
-                                    });
-                                }
-                                break;
-                            case 'skeptic':
-                                if (data.turn) {
-                                    setSkepticResponses(prev => {
-                                        const newResponses = [...prev];
-                                        newResponses[data.turn - 1] = (newResponses[data.turn - 1] || '') + data.content;
-                                        return newResponses;
-                                    });
+            for (let attempt = 0; !finished && attempt <= 5; attempt++) {
+                if (attempt > 0) {
+                    if (!streamId) break;
+                    await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+                }
+                try {
+                    const response = attempt === 0
+                        ? await fetch('http://localhost:8000/generate-podcast/stream', {
+                            method: 'POST',
+                            headers: {
+                                'Content-Type': 'application/json',
+                                'Authorization': `Bearer ${token}`
+                            },
+                            body: JSON.stringify({
+                                topic: prompt,
+                                believer_voice_id: selectedBelieverVoice.id,
+                                skeptic_voice_id: selectedSkepticVoice.id
+                            })
+                        })
+                        : await fetch(`http://localhost:8000/generate-podcast/stream/${streamId}`, {
+                            headers: {
+                                'Authorization': `Bearer ${token}`,
+                                ...(lastEventId ? { 'Last-Event-ID': lastEventId } : {})
+                            }
+                        });
+
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! status: ${response.status}`);
+                    }
+
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    // Server-sent events end with a blank line; a read may stop inside one
+                    let buffered = '';
+
+                    while (true) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+
+                        buffered += decoder.decode(value, { stream: true });
+                        const blocks = buffered.split('\n\n');
+                        buffered = blocks.pop();
+
+                        for (const block of blocks) {
+                            let id = null;
+                            const dataLines = [];
+                            for (const line of block.split('\n')) {
+                                if (line.startsWith('id:')) {
+                                    id = line.slice(3).trim();
+                                } else if (line.startsWith('data:')) {
+                                    dataLines.push(line.slice(5).replace(/^ /, ''));
                                 }
-                                break;
-                            case 'success':
-                                setIsSuccess(true);
-                                setSuccessMessage(data.content || 'Podcast created successfully!');
-                                if (data.podcast_url) {
-                                    setAudioUrl(`http://localhost:8000${data.podcast_url}`);
+                            }
+                            // Comment-only blocks are keepalives
+                            if (dataLines.length === 0) continue;
+                            if (id) lastEventId = id;
+                            try {
+                                const data = JSON.parse(dataLines.join('\n'));
+                                if (data.type === 'stream') {
+                                    streamId = data.stream_id;
+                                } else if (data.type === 'success' || data.type === 'error') {
+                                    finished = true;
                                 }
-                                break;
-                            case 'error':
-                                console.error('Error:', data.content);
-                                break;
-                        }
-                        // Auto-scroll to the bottom of insights
-                        if (insightsRef.current) {
-                            insightsRef.current.scrollTop = insightsRef.current.scrollHeight;
+                                handleEvent(data);
+                            } catch (e) {
+                                console.error('Error parsing JSON:', e);
+                            }
                         }
-                    } catch (e) {
-                        console.error('Error parsing JSON:', e);
                     }
+                } catch (error) {
+                    if (attempt === 0 && !streamId) throw error;
+                    console.error('Stream interrupted, reconnecting:', error);
                 }
             }
         } catch (error) {
@@ -6,8 +6,13 @@ import DeleteModal from '../components/DeleteModal';
 import Toast from '../components/Toast';
 import './Podcasts.css';
 
-const AudioPlayer = ({ audioUrl }) => {
+// Phones and data-saver connections play the low-bitrate rendition once it is built
+const prefersLowBitrate = () =>
+    Boolean(navigator.connection?.saveData) || Boolean(window.matchMedia?.('(pointer: coarse)').matches);
+
+const AudioPlayer = ({ audioUrl, onFirstPlay }) => {
     const [isPlaying, setIsPlaying] = useState(false);
+    const playedRef = useRef(false);
     const [progress, setProgress] = useState(0);
     const [currentTime, setCurrentTime] = useState(0);
     const [audioDuration, setAudioDuration] = useState(0);
@@ -49,6 +54,10 @@ const AudioPlayer = ({ audioUrl }) => {
                 if (prevIsPlaying) {
                     audioRef.current.pause();
                 } else {
+                    if (!playedRef.current) {
+                        playedRef.current = true;
+                        onFirstPlay?.();
+                    }
                     audioRef.current.play().catch(err => {
                         console.error("Error playing audio:", err);
                         setIsPlaying(false);
@@ -111,15 +120,21 @@ const Podcasts = () => {
     const [error, setError] = useState(null);
     const [deleteModal, setDeleteModal] = useState({ isOpen: false, podcast: null });
     const [toast, setToast] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         fetchPodcasts();
     }, []);
 
-    const fetchPodcasts = async () => {
+    const fetchPodcasts = async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
-            const response = await fetch('http://localhost:8000/podcasts', {
+            const params = new URLSearchParams({ limit: '24' });
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`http://localhost:8000/podcasts?${params}`, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
@@ -134,7 +149,9 @@ const Podcasts = () => {
             }
 
             const data = await response.json();
-            setPodcasts(data);
+            setPodcasts(previous => cursor ? [...previous, ...data] : data);
+            // The next page's cursor comes in a header; absent on the last page
+            setNextCursor(response.headers.get('X-Next-Cursor'));
         } catch (err) {
             setError(err.message);
         } finally {
@@ -142,6 +159,23 @@ const Podcasts = () => {
         }
     };
 
+    // Starts building the low-bitrate rendition; later visits get it in podcast.renditions
+    const requestRendition = (podcast) => {
+        if (!prefersLowBitrate() || podcast.renditions?.low) return;
+        const token = localStorage.getItem('token');
+        fetch(`http://localhost:8000/podcasts/${podcast._id}/renditions/low`, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        }).catch(err => console.error('Error requesting rendition:', err));
+    };
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchPodcasts(nextCursor);
+        setLoadingMore(false);
+    };
+
     const handleDelete = async () => {
         if (!deleteModal.podcast?._id) return;
 
@@ -229,7 +263,7 @@ const Podcasts = () => {
                                 <div className="podcast-header">
                                     <h3>{podcast.topic}</h3>
                                 </div>
-                                <p>{podcast.research ? podcast.research.substring(0, 150) + '...' : 'No description available'}</p>
+                                <p>{podcast.description ? podcast.description + '...' : 'No description available'}</p>
                                 <div className="podcast-meta">
                                     <span className="date">
                                         <MdDateRange />
@@ -237,7 +271,8 @@ const Podcasts = () => {
                                     </span>
                                 </div>
                                 <AudioPlayer
-                                    audioUrl={podcast.audio_url || ''}
+                                    audioUrl={(prefersLowBitrate() && podcast.renditions?.low) || podcast.audio_url || ''}
+                                    onFirstPlay={() => requestRendition(podcast)}
                                 />
                             </div>
                         </div>
@@ -245,6 +280,14 @@ const Podcasts = () => {
                 )}
             </div>
 
+            {nextCursor && (
+                <div className="load-more">
+                    <button onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
+
             <DeleteModal
                 isOpen={deleteModal.isOpen}
                 onClose={() => setDeleteModal({ isOpen: false, podcast: null })}